@@ -272,6 +272,12 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 DATA_UPLOAD_MAX_NUMBER_FIELDS = 11000  # Set a higher limit (default is 1000)
 
+# Background jobs (payroll calculations, summary rebuilds) are run by a
+# `manage.py run_workers` process, or on Vercel by the cron in vercel.json
+# calling /api/jobs/run/ with 'Authorization: Bearer <CRON_SECRET>'.
+# The endpoint is disabled while CRON_SECRET is empty.
+CRON_SECRET = config('CRON_SECRET', default='')
+
 # Security Settings for Production
 if not DEBUG:
     SECURE_BROWSER_XSS_FILTER = True
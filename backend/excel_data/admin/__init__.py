@@ -6,7 +6,7 @@ Admin classes are organized in separate modules but imported here for registrati
 from .tenant_admin import TenantAdmin
 from .auth_admin import CustomUserAdmin, UserPermissionsAdmin
 from .employee_admin import EmployeeProfileAdmin
-from .attendance_admin import AttendanceAdmin, DailyAttendanceAdmin
+from .attendance_admin import AttendanceAdmin, DailyAttendanceAdmin, TenantHolidayAdmin
 from .salary_admin import SalaryDataAdmin
 from .ledger_admin import AdvanceLedgerAdmin, PaymentAdmin
 from .leave_admin import LeaveAdmin
@@ -18,6 +18,7 @@ __all__ = [
     'EmployeeProfileAdmin',
     'AttendanceAdmin',
     'DailyAttendanceAdmin',
+    'TenantHolidayAdmin',
     'SalaryDataAdmin',
     'AdvanceLedgerAdmin',
     'PaymentAdmin',
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from ..models import Attendance, DailyAttendance
+from ..models import Attendance, DailyAttendance, TenantHoliday
 
 
 @admin.register(Attendance)
@@ -56,4 +56,13 @@ class DailyAttendanceAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
         })
-    )
\ No newline at end of file
+    )
+
+
+@admin.register(TenantHoliday)
+class TenantHolidayAdmin(admin.ModelAdmin):
+    list_display = ['tenant', 'date', 'name']
+    list_filter = ['tenant', 'date']
+    search_fields = ['name', 'description']
+    ordering = ['-date']
+    readonly_fields = ['created_at', 'updated_at']
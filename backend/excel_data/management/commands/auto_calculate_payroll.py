@@ -1,13 +1,98 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
 from django.utils import timezone
-from datetime import datetime, timedelta
-from excel_data.models import Tenant
-from excel_data.salary_service import SalaryCalculationService
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import calendar
+import json
 import logging
+import os
+import signal
+import time
 
 logger = logging.getLogger(__name__)
 
+LOCK_NAME = 'auto_calculate_payroll'
+
+
+class TenantTimeout(Exception):
+    """Raised inside a worker when a tenant exceeds its time budget"""
+
+
+def _init_worker():
+    """
+    Pool initializer. Under the spawn/forkserver start methods the worker has to
+    set Django up itself; with fork it inherits the configured app registry.
+    Each worker opens its own database connection on first use.
+    """
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def _raise_timeout(signum, frame):
+    raise TenantTimeout()
+
+
+def calculate_tenant_payroll(tenant_id, year, month_name, timeout):
+    """
+    Calculate payroll for one tenant. Runs in a pool worker (or inline when
+    concurrency is 1) and returns a JSON-serialisable result dict.
+    """
+    from excel_data.models import Tenant
+    from excel_data.services.locks import tenant_lock
+    from excel_data.services.salary_service import SalaryCalculationService
+
+    started = time.time()
+    result = {'tenant_id': tenant_id, 'year': year, 'month': month_name, 'pid': os.getpid()}
+
+    use_alarm = bool(timeout) and hasattr(signal, 'SIGALRM')
+    previous_handler = None
+    try:
+        tenant = Tenant.objects.get(id=tenant_id)
+        result['tenant'] = tenant.name
+
+        if use_alarm:
+            previous_handler = signal.signal(signal.SIGALRM, _raise_timeout)
+            signal.alarm(int(timeout))
+
+        # The advisory lock and the statement timeout only last for this
+        # transaction, which also holds the payroll writes: the database is
+        # reached through a transaction-mode pooler, so nothing session-level
+        # may outlive it
+        with transaction.atomic():
+            connection = connections['default']
+            if timeout and connection.vendor == 'postgresql':
+                # Also bound individual statements; the alarm can't interrupt a running query
+                with connection.cursor() as cursor:
+                    cursor.execute(f'SET LOCAL statement_timeout = {int(timeout * 1000)}')
+
+            with tenant_lock(LOCK_NAME, tenant_id, timeout=int(timeout) if timeout else 3600) as acquired:
+                if not acquired:
+                    result['status'] = 'locked'
+                    result['error'] = 'Payroll calculation already running for this tenant on another worker'
+                else:
+                    results = SalaryCalculationService.calculate_salary_for_period(
+                        tenant, year, month_name, force_recalculate=True
+                    )
+                    result['status'] = 'success' if not results.get('errors') else 'partial'
+                    result['results'] = results
+    except TenantTimeout:
+        result['status'] = 'timeout'
+        result['error'] = f'Exceeded {timeout}s'
+    except Exception as e:
+        logger.error(f"Error calculating payroll for tenant {tenant_id}: {str(e)}")
+        result['status'] = 'error'
+        result['error'] = str(e)
+    finally:
+        if use_alarm:
+            signal.alarm(0)
+            signal.signal(signal.SIGALRM, previous_handler or signal.SIG_DFL)
+
+    result['duration_seconds'] = round(time.time() - started, 3)
+    return result
+
+
 class Command(BaseCommand):
     help = 'Automatically calculate payroll for previous month for tenants with auto_calculate_payroll enabled'
 
@@ -17,10 +102,38 @@ class Command(BaseCommand):
             action='store_true',
             help='Force calculation even if not 1st of month',
         )
+        parser.add_argument(
+            '--tenants',
+            type=str,
+            default='',
+            help='Comma-separated tenant IDs or subdomains to process (ignores the auto_calculate_payroll flag)',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=min(4, os.cpu_count() or 1),
+            help='Number of worker processes (1 runs tenants inline)',
+        )
+        parser.add_argument(
+            '--timeout',
+            type=int,
+            default=900,
+            help='Per-tenant time limit in seconds (0 disables it)',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Emit one JSON line per tenant plus a final summary line',
+        )
 
     def handle(self, *args, **options):
+        from excel_data.models import Tenant
+
         today = timezone.now().date()
-        
+        json_output = options['json']
+        concurrency = max(1, options['concurrency'])
+        timeout = max(0, options['timeout'])
+
         # Check if today is 1st of month or force is enabled
         if today.day != 1 and not options['force']:
             self.stdout.write(
@@ -37,42 +150,86 @@ class Command(BaseCommand):
             prev_year = today.year
 
         prev_month_name = calendar.month_name[prev_month].upper()
-        
-        self.stdout.write(f'Starting auto payroll calculation for {prev_month_name} {prev_year}')
-
-        # Get all tenants with auto calculate enabled
-        tenants = Tenant.objects.filter(auto_calculate_payroll=True)
-        
-        success_count = 0
-        error_count = 0
-
-        for tenant in tenants:
-            try:
-                self.stdout.write(f'Processing tenant: {tenant.name}')
-                
-                # Calculate payroll for previous month
-                results = SalaryCalculationService.calculate_salary_for_period(
-                    tenant, prev_year, prev_month_name, force_recalculate=True
-                )
-                
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f'✓ Successfully calculated payroll for {tenant.name}: {results}'
-                    )
-                )
-                success_count += 1
-                
-            except Exception as e:
-                logger.error(f"Error calculating payroll for tenant {tenant.name}: {str(e)}")
-                self.stdout.write(
-                    self.style.ERROR(
-                        f'✗ Failed to calculate payroll for {tenant.name}: {str(e)}'
-                    )
-                )
-                error_count += 1
 
-        self.stdout.write(
-            self.style.SUCCESS(
-                f'\nAuto payroll calculation completed: {success_count} successful, {error_count} failed'
+        # Select tenants: explicit list, or every tenant with auto calculate enabled
+        if options['tenants']:
+            tenant_refs = [ref.strip() for ref in options['tenants'].split(',') if ref.strip()]
+            tenant_ids = [int(ref) for ref in tenant_refs if ref.isdigit()]
+            subdomains = [ref for ref in tenant_refs if not ref.isdigit()]
+            tenants = Tenant.objects.filter(id__in=tenant_ids) | Tenant.objects.filter(subdomain__in=subdomains)
+        else:
+            tenants = Tenant.objects.filter(auto_calculate_payroll=True)
+        tenants = list(tenants.filter(is_active=True).order_by('id').values_list('id', flat=True))
+
+        if options['tenants'] and not tenants:
+            raise CommandError(f"No active tenants match --tenants={options['tenants']}")
+
+        if not json_output:
+            self.stdout.write(
+                f'Starting auto payroll calculation for {prev_month_name} {prev_year}: '
+                f'{len(tenants)} tenants, concurrency {concurrency}'
+            )
+
+        started = time.time()
+        counts = {'success': 0, 'partial': 0, 'error': 0, 'timeout': 0, 'locked': 0}
+
+        def report(result, done):
+            counts[result['status']] = counts.get(result['status'], 0) + 1
+            if json_output:
+                self.stdout.write(json.dumps({'event': 'tenant', **result}, default=str))
+                return
+            label = f"[{done}/{len(tenants)}] {result.get('tenant', result['tenant_id'])}"
+            if result['status'] in ('success', 'partial'):
+                results = result['results']
+                self.stdout.write(self.style.SUCCESS(
+                    f"✓ {label}: {results['calculated']} calculated, {results['updated']} updated, "
+                    f"{results.get('unchanged', 0)} unchanged, {len(results['errors'])} errors in {result['duration_seconds']}s"
+                ))
+            elif result['status'] == 'locked':
+                self.stdout.write(self.style.WARNING(f"- {label}: skipped, {result['error']}"))
+            else:
+                self.stdout.write(self.style.ERROR(f"✗ {label}: {result['status']} - {result.get('error')}"))
+
+        if concurrency == 1 or len(tenants) <= 1:
+            for done, tenant_id in enumerate(tenants, start=1):
+                report(calculate_tenant_payroll(tenant_id, prev_year, prev_month_name, timeout), done)
+        else:
+            # Workers must not share the parent's database connection
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=concurrency, initializer=_init_worker) as executor:
+                futures = {
+                    executor.submit(calculate_tenant_payroll, tenant_id, prev_year, prev_month_name, timeout): tenant_id
+                    for tenant_id in tenants
+                }
+                for done, future in enumerate(as_completed(futures), start=1):
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # Worker process died (e.g. killed by the OS)
+                        result = {'tenant_id': futures[future], 'status': 'error', 'error': str(e)}
+                    report(result, done)
+
+        # Markers for periods no calculation will pick up again would otherwise accumulate
+        from excel_data.services.payroll_change_tracker import purge_stale_dirty_markers
+        purged_markers = purge_stale_dirty_markers(tenants)
+
+        summary = {
+            'event': 'summary',
+            'year': prev_year,
+            'month': prev_month_name,
+            'tenants': len(tenants),
+            'concurrency': concurrency,
+            'duration_seconds': round(time.time() - started, 3),
+            'purged_dirty_markers': purged_markers,
+            **counts,
+        }
+        if json_output:
+            self.stdout.write(json.dumps(summary))
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"\nAuto payroll calculation completed in {summary['duration_seconds']}s: "
+                    f"{counts['success'] + counts['partial']} successful, "
+                    f"{counts['error'] + counts['timeout']} failed, {counts['locked']} skipped (locked)"
+                )
             )
-        ) 
\ No newline at end of file
@@ -0,0 +1,124 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import NotSupportedError, connection
+
+
+def _month(value):
+    try:
+        year, month = value.split('-')
+        return date(int(year), int(month), 1)
+    except ValueError:
+        raise CommandError(f"Invalid month '{value}'. Use YYYY-MM")
+
+
+class Command(BaseCommand):
+    help = (
+        'Manage monthly PostgreSQL partitions of excel_data_dailyattendance: convert the table once, '
+        'pre-create future months (run monthly), detach old months and check partition pruning'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert',
+            action='store_true',
+            help='Rebuild the table as a partitioned table (locks attendance while it runs; '
+                 'the old table is kept as excel_data_dailyattendance_unpartitioned)',
+        )
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=3,
+            help='Make sure partitions exist up to this many months after the current one',
+        )
+        parser.add_argument(
+            '--detach-before',
+            type=_month,
+            help='Detach the partitions of months before YYYY-MM',
+        )
+        parser.add_argument(
+            '--archive-schema',
+            type=str,
+            help='Move detached partitions into this schema',
+        )
+        parser.add_argument(
+            '--drop',
+            action='store_true',
+            help='Drop detached partitions instead of keeping them as tables',
+        )
+        parser.add_argument(
+            '--check-pruning',
+            type=_month,
+            metavar='YYYY-MM',
+            help='EXPLAIN the month-scoped attendance queries for this month and report the partitions they read',
+        )
+        parser.add_argument(
+            '--tenant',
+            type=int,
+            help='Tenant ID used in the --check-pruning queries (default: the first active tenant)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report the partitions that would be created or detached without changing anything',
+        )
+
+    def handle(self, *args, **options):
+        from django.utils import timezone
+        from excel_data.models import Tenant
+        from excel_data.services import attendance_partition_service as partitions
+        from excel_data.services.calendar_service import add_months
+
+        if connection.vendor != 'postgresql':
+            raise CommandError('DailyAttendance partitioning requires PostgreSQL')
+        prefix = '[dry run] ' if options['dry_run'] else ''
+
+        try:
+            if options['convert']:
+                if options['dry_run']:
+                    raise CommandError('--convert has no dry run; try it on a copy of the database first')
+                result = partitions.convert_to_partitioned(options['months_ahead'])
+                self.stdout.write(self.style.SUCCESS(
+                    f"Copied {result['rows']} rows into {len(result['partitions'])} partitions. "
+                    f"Drop {partitions.UNPARTITIONED_TABLE} once the application has been checked."
+                ))
+
+            this_month = timezone.localdate().replace(day=1)
+            created = partitions.ensure_month_partitions(
+                this_month, add_months(this_month, max(options['months_ahead'], 0)), dry_run=options['dry_run']
+            )
+            for name in created:
+                self.stdout.write(f'{prefix}Created {name}')
+
+            if options['detach_before']:
+                detached = partitions.detach_partitions(
+                    options['detach_before'],
+                    archive_schema=options['archive_schema'],
+                    drop=options['drop'],
+                    dry_run=options['dry_run'],
+                )
+                action = 'Dropped' if options['drop'] else 'Detached'
+                for name in detached:
+                    self.stdout.write(self.style.WARNING(f'{prefix}{action} {name}'))
+
+            if options['check_pruning']:
+                tenant_id = options['tenant'] or Tenant.objects.filter(is_active=True).values_list(
+                    'id', flat=True
+                ).order_by('id').first()
+                month = options['check_pruning']
+                all_pruned = True
+                for label, scanned, pruned in partitions.check_partition_pruning(tenant_id, month.year, month.month):
+                    all_pruned &= pruned
+                    line = f"{label}: {', '.join(scanned) or 'no partitions'}"
+                    self.stdout.write(self.style.SUCCESS(f'✓ {line}') if pruned else self.style.ERROR(f'✗ {line}'))
+                if not all_pruned:
+                    raise CommandError('Some attendance queries read partitions outside the month')
+        except NotSupportedError as e:
+            raise CommandError(str(e))
+
+        with connection.cursor() as cursor:
+            listed = partitions.list_partitions(cursor)
+        self.stdout.write(f'{len(listed)} partitions:')
+        for partition in listed:
+            bounds = f"{partition['start']} – {partition['end']}" if partition['start'] else 'DEFAULT'
+            self.stdout.write(f"  {partition['name']}: {bounds}, ~{partition['estimated_rows']} rows")
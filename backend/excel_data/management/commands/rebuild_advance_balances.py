@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Reconcile the materialized employee advance balances with the advance ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenants',
+            type=str,
+            help='Comma-separated tenant IDs to rebuild (default: all active tenants)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drift without writing any changes',
+        )
+
+    def handle(self, *args, **options):
+        from excel_data.models import Tenant
+        from excel_data.services.advance_balance_service import rebuild_advance_balances
+
+        tenants = Tenant.objects.filter(is_active=True)
+        if options['tenants']:
+            tenant_ids = [int(t.strip()) for t in options['tenants'].split(',') if t.strip()]
+            tenants = tenants.filter(id__in=tenant_ids)
+
+        prefix = '[dry run] ' if options['dry_run'] else ''
+        total_drift = 0
+        for tenant in tenants.order_by('id'):
+            stats = rebuild_advance_balances(tenant.id, dry_run=options['dry_run'])
+            drift = stats['created'] + stats['corrected'] + stats['removed']
+            total_drift += drift
+            line = (
+                f"{prefix}{tenant.name}: {stats['checked']} checked, {stats['created']} created, "
+                f"{stats['corrected']} corrected, {stats['removed']} removed"
+            )
+            self.stdout.write(self.style.WARNING(line) if drift else line)
+
+        self.stdout.write(self.style.SUCCESS(f'{prefix}Done: {total_drift} balance rows out of sync'))
@@ -0,0 +1,13 @@
+from excel_data.models import JobType
+
+from .run_workers import Command as WorkerCommand
+
+
+class Command(WorkerCommand):
+    help = 'Run queued payroll calculation jobs (run_workers restricted to payroll calculations)'
+
+    default_job_types = [JobType.PAYROLL_CALCULATION]
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.set_defaults(concurrency=1)
@@ -0,0 +1,144 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+import signal
+import threading
+import time
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (payroll calculations, monthly summary rebuilds) with a pool of worker threads'
+
+    # Job types this command runs when --types is not given (None = all)
+    default_job_types = None
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=2,
+            help='Number of jobs to run at the same time',
+        )
+        parser.add_argument(
+            '--types',
+            nargs='+',
+            help='Only run these job types (e.g. PAYROLL_CALCULATION MONTHLY_SUMMARY_REBUILD)',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the queue and exit instead of polling for new jobs',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=5.0,
+            help='Seconds to wait between polls when the queue is empty',
+        )
+        parser.add_argument(
+            '--max-jobs',
+            type=int,
+            default=0,
+            help='Exit after running this many jobs (0 = no limit)',
+        )
+        parser.add_argument(
+            '--stale-after',
+            type=int,
+            default=None,
+            help='Requeue RUNNING jobs whose heartbeat is older than this many seconds',
+        )
+
+    def handle(self, *args, **options):
+        from excel_data.models import JobStatus, JobType
+        from excel_data.services.job_service import STALE_JOB_SECONDS, requeue_stale_jobs, run_next_job
+
+        job_types = options['types'] or self.default_job_types
+        if job_types:
+            unknown = set(job_types) - set(JobType.values)
+            if unknown:
+                raise CommandError(f"Unknown job types: {', '.join(sorted(unknown))}")
+        concurrency = max(options['concurrency'], 1)
+        stale_after = options['stale_after'] or STALE_JOB_SECONDS
+
+        stopping = threading.Event()
+        counter_lock = threading.Lock()
+        processed = [0]
+
+        def request_stop(signum, frame):
+            # Finish the current jobs, then exit
+            stopping.set()
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        def claim_slot():
+            """Reserve one of --max-jobs; False once the limit is reached"""
+            with counter_lock:
+                if options['max_jobs'] and processed[0] >= options['max_jobs']:
+                    return False
+                processed[0] += 1
+                return True
+
+        def release_slot():
+            with counter_lock:
+                processed[0] -= 1
+
+        def work():
+            try:
+                while not stopping.is_set():
+                    if not claim_slot():
+                        break
+                    close_old_connections()
+                    try:
+                        job = run_next_job(job_types)
+                    except Exception as e:
+                        # Claiming or saving the outcome failed (e.g. database unavailable);
+                        # the job is requeued as stale if it was claimed
+                        release_slot()
+                        self.stdout.write(self.style.ERROR(f"✗ Worker error: {str(e)}"))
+                        stopping.wait(options['poll_interval'])
+                        continue
+                    if job is None:
+                        release_slot()
+                        if options['once']:
+                            break
+                        stopping.wait(options['poll_interval'])
+                        continue
+
+                    duration = (job.finished_at or job.updated_at) - job.started_at
+                    if job.status == JobStatus.SUCCEEDED:
+                        self.stdout.write(self.style.SUCCESS(
+                            f"✓ Job {job.id} {job.job_type} (tenant {job.tenant_id}): "
+                            f"{job.progress_done}/{job.progress_total} in {duration.total_seconds():.1f}s"
+                        ))
+                    elif job.status == JobStatus.QUEUED:
+                        self.stdout.write(self.style.WARNING(
+                            f"↻ Job {job.id} {job.job_type} (tenant {job.tenant_id}): attempt "
+                            f"{job.attempts}/{job.max_attempts} failed, retrying at {job.run_after:%H:%M:%S}: {job.error}"
+                        ))
+                    else:
+                        self.stdout.write(self.style.ERROR(
+                            f"✗ Job {job.id} {job.job_type} (tenant {job.tenant_id}): {job.error}"
+                        ))
+            finally:
+                connection.close()
+
+        recovered = requeue_stale_jobs(stale_after)
+        if recovered:
+            self.stdout.write(self.style.WARNING(f'Requeued {recovered} abandoned jobs'))
+
+        self.stdout.write(f'Job worker started with {concurrency} threads')
+        workers = [threading.Thread(target=work, name=f'job-worker-{n}') for n in range(concurrency)]
+        for worker in workers:
+            worker.start()
+
+        # Keep looking for jobs abandoned by other worker processes while the pool runs
+        last_check = time.monotonic()
+        while any(worker.is_alive() for worker in workers):
+            for worker in workers:
+                worker.join(timeout=1.0)
+            if time.monotonic() - last_check >= stale_after / 2:
+                close_old_connections()
+                requeue_stale_jobs(stale_after)
+                last_check = time.monotonic()
+
+        self.stdout.write(f'Job worker stopped after {processed[0]} jobs')
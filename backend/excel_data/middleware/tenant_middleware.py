@@ -33,6 +33,7 @@ class TenantMiddleware(MiddlewareMixin):
         '/media/',
         '/api/employees/directory_data/',  # Make directory_data endpoint public
         '/api/dropdown-options/',  # Make dropdown options public too
+        '/api/jobs/run/',  # Scheduled job runner, authorised by CRON_SECRET
     ]
 
     def __call__(self, request):
@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-17 02:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('excel_data', '0025_add_active_session_model'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayrollDirtyEmployee',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('employee_id', models.CharField(max_length=50)),
+                ('year', models.IntegerField()),
+                ('month', models.IntegerField()),
+                ('reason', models.CharField(blank=True, default='', max_length=50)),
+                ('marked_at', models.DateTimeField()),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='excel_data.tenant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tenant', 'year', 'month'], name='payroll_dirty_period_idx')],
+                'unique_together': {('tenant', 'employee_id', 'year', 'month')},
+            },
+        ),
+    ]
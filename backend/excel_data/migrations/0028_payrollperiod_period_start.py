@@ -0,0 +1,50 @@
+# Generated by Django 5.2 on 2026-10-17 02:51
+
+import datetime
+
+from django.db import migrations, models
+
+MONTH_NUMBERS = {
+    'JANUARY': 1, 'FEBRUARY': 2, 'MARCH': 3, 'APRIL': 4,
+    'MAY': 5, 'JUNE': 6, 'JULY': 7, 'AUGUST': 8,
+    'SEPTEMBER': 9, 'OCTOBER': 10, 'NOVEMBER': 11, 'DECEMBER': 12,
+    'JAN': 1, 'FEB': 2, 'MAR': 3, 'APR': 4, 'JUN': 6, 'JUL': 7,
+    'AUG': 8, 'SEP': 9, 'SEPT': 9, 'OCT': 10, 'NOV': 11, 'DEC': 12,
+}
+
+
+def backfill_period_start(apps, schema_editor):
+    """Derive period_start from the free-text month name of existing periods"""
+    PayrollPeriod = apps.get_model('excel_data', 'PayrollPeriod')
+    periods = []
+    for period in PayrollPeriod.objects.filter(period_start__isnull=True).only('id', 'year', 'month'):
+        month = str(period.month or '').strip()
+        month_num = int(month) if month.isdigit() else MONTH_NUMBERS.get(month.upper())
+        if period.year and month_num and 1 <= month_num <= 12:
+            period.period_start = datetime.date(period.year, month_num, 1)
+            periods.append(period)
+    PayrollPeriod.objects.bulk_update(periods, ['period_start'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('excel_data', '0027_backgroundjob'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='payrollperiod',
+            options={'ordering': [models.OrderBy(models.F('period_start'), descending=True, nulls_last=True), '-year']},
+        ),
+        migrations.AddField(
+            model_name='payrollperiod',
+            name='period_start',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='payrollperiod',
+            index=models.Index(fields=['tenant', 'period_start'], name='payroll_period_start_idx'),
+        ),
+        migrations.RunPython(backfill_period_start, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2 on 2026-10-17 02:53
+
+import datetime
+import re
+
+from django.db import migrations, models
+
+# Frozen copy of calendar_service.parse_month_label as of this migration;
+# runtime code must use calendar_service, not this module.
+MONTH_NUMBERS = {
+    'JANUARY': 1, 'FEBRUARY': 2, 'MARCH': 3, 'APRIL': 4,
+    'MAY': 5, 'JUNE': 6, 'JULY': 7, 'AUGUST': 8,
+    'SEPTEMBER': 9, 'OCTOBER': 10, 'NOVEMBER': 11, 'DECEMBER': 12,
+    'JAN': 1, 'FEB': 2, 'MAR': 3, 'APR': 4, 'JUN': 6, 'JUL': 7,
+    'AUG': 8, 'SEP': 9, 'SEPT': 9, 'OCT': 10, 'NOV': 11, 'DEC': 12,
+}
+
+
+def parse_month_label(label):
+    """'Mar 2025' / 'March 2025' / '2025-03' / '03/2025' -> first day of that month"""
+    label = str(label or '').strip()
+    year_match = re.search(r'\b(\d{4})\b', label)
+    if not year_match:
+        return None
+    rest = (label[:year_match.start()] + ' ' + label[year_match.end():]).strip(' -/.,')
+    month_token = re.search(r'[A-Za-z]+|\d{1,2}', rest)
+    if not month_token:
+        return None
+    token = month_token.group(0)
+    month_num = int(token) if token.isdigit() else MONTH_NUMBERS.get(token.upper())
+    if not month_num or not 1 <= month_num <= 12:
+        return None
+    return datetime.date(int(year_match.group(1)), month_num, 1)
+
+
+def backfill_for_period(apps, schema_editor):
+    """Parse for_month of existing advances into for_period"""
+    AdvanceLedger = apps.get_model('excel_data', 'AdvanceLedger')
+    advances = []
+    for advance in AdvanceLedger.objects.filter(for_period__isnull=True).only('id', 'for_month').iterator():
+        advance.for_period = parse_month_label(advance.for_month)
+        if advance.for_period:
+            advances.append(advance)
+    AdvanceLedger.objects.bulk_update(advances, ['for_period'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('excel_data', '0028_payrollperiod_period_start'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='advanceledger',
+            name='advance_month_idx',
+        ),
+        migrations.AddField(
+            model_name='advanceledger',
+            name='for_period',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='advanceledger',
+            index=models.Index(fields=['tenant', 'for_period', 'status'], name='advance_period_idx'),
+        ),
+        migrations.RunPython(backfill_for_period, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2 on 2026-10-17 02:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_advance_balances(apps, schema_editor):
+    """Aggregate open advances into one balance row per (tenant, employee_id)"""
+    AdvanceLedger = apps.get_model('excel_data', 'AdvanceLedger')
+    EmployeeAdvanceBalance = apps.get_model('excel_data', 'EmployeeAdvanceBalance')
+    totals = AdvanceLedger.objects.filter(
+        status__in=['PENDING', 'PARTIALLY_PAID']
+    ).values('tenant_id', 'employee_id').order_by().annotate(
+        balance=Sum('remaining_balance'),
+        open_advances=Count('id'),
+    )
+    EmployeeAdvanceBalance.objects.bulk_create(
+        [
+            EmployeeAdvanceBalance(
+                tenant_id=row['tenant_id'],
+                employee_id=row['employee_id'],
+                balance=row['balance'] or 0,
+                open_advances=row['open_advances'],
+            )
+            for row in totals
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('excel_data', '0029_advanceledger_for_period'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeAdvanceBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('employee_id', models.CharField(max_length=50)),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('open_advances', models.IntegerField(default=0, help_text='Number of advances not yet fully repaid')),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='excel_data.tenant')),
+            ],
+            options={
+                'unique_together': {('tenant', 'employee_id')},
+            },
+        ),
+        migrations.RunPython(backfill_advance_balances, migrations.RunPython.noop),
+    ]
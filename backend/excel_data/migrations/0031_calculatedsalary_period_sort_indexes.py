@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-17 03:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('excel_data', '0030_employeeadvancebalance'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='calculatedsalary',
+            index=models.Index(fields=['payroll_period', 'employee_name', 'id'], name='calc_salary_period_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='calculatedsalary',
+            index=models.Index(fields=['payroll_period', 'net_payable', 'id'], name='calc_salary_period_net_idx'),
+        ),
+    ]
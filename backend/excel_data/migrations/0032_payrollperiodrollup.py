@@ -0,0 +1,62 @@
+# Generated by Django 5.2 on 2026-10-17 03:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_period_rollups(apps, schema_editor):
+    """Aggregate existing calculated salaries into one rollup row per payroll period"""
+    CalculatedSalary = apps.get_model('excel_data', 'CalculatedSalary')
+    PayrollPeriodRollup = apps.get_model('excel_data', 'PayrollPeriodRollup')
+    totals = CalculatedSalary.objects.values('tenant_id', 'payroll_period_id').order_by().annotate(
+        employee_count=Count('id'),
+        paid_count=Count('id', filter=Q(is_paid=True)),
+        total_gross_salary=Sum('gross_salary'),
+        total_net_salary=Sum('net_payable'),
+        total_advance_deductions=Sum('advance_deduction_amount'),
+        total_tds=Sum('tds_amount'),
+    )
+    PayrollPeriodRollup.objects.bulk_create(
+        [
+            PayrollPeriodRollup(
+                tenant_id=row['tenant_id'],
+                payroll_period_id=row['payroll_period_id'],
+                employee_count=row['employee_count'],
+                paid_count=row['paid_count'],
+                total_gross_salary=row['total_gross_salary'] or 0,
+                total_net_salary=row['total_net_salary'] or 0,
+                total_advance_deductions=row['total_advance_deductions'] or 0,
+                total_tds=row['total_tds'] or 0,
+            )
+            for row in totals
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('excel_data', '0031_calculatedsalary_period_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayrollPeriodRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('employee_count', models.IntegerField(default=0)),
+                ('paid_count', models.IntegerField(default=0)),
+                ('total_gross_salary', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_net_salary', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_advance_deductions', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_tds', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('payroll_period', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rollup', to='excel_data.payrollperiod')),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='excel_data.tenant')),
+            ],
+        ),
+        migrations.RunPython(backfill_period_rollups, migrations.RunPython.noop),
+    ]
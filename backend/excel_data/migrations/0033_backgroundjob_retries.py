@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-17 03:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('excel_data', '0032_payrollperiodrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backgroundjob',
+            name='attempts',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='backgroundjob',
+            name='max_attempts',
+            field=models.IntegerField(default=3),
+        ),
+        migrations.AddField(
+            model_name='backgroundjob',
+            name='run_after',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='backgroundjob',
+            name='job_type',
+            field=models.CharField(choices=[('PAYROLL_CALCULATION', 'Payroll Calculation'), ('MONTHLY_SUMMARY_REBUILD', 'Monthly Attendance Summary Rebuild')], max_length=50),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.2 on 2026-10-17 03:30
+
+import struct
+from decimal import ROUND_HALF_UP, Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of the attendance_bitmap_service encoding as of this migration
+DAYS = 31
+STATUS_CODES = {'PRESENT': 1, 'ABSENT': 2, 'HALF_DAY': 3, 'PAID_LEAVE': 4, 'OFF': 5}
+OTHER_STATUS = 255
+DAY_VALUES = struct.Struct('<31i')
+
+
+def encode_days(days):
+    """{day: (attendance_status, ot_hours, late_minutes)} -> (statuses, ot_tenths, late_minutes)"""
+    statuses = bytearray(DAYS)
+    ot_tenths = [0] * DAYS
+    late_minutes = [0] * DAYS
+    for day, (attendance_status, ot_hours, late) in days.items():
+        statuses[day - 1] = STATUS_CODES.get(attendance_status, OTHER_STATUS)
+        ot_tenths[day - 1] = int((Decimal(str(ot_hours or 0)) * 10).to_integral_value(rounding=ROUND_HALF_UP))
+        late_minutes[day - 1] = int(late or 0)
+    return bytes(statuses), DAY_VALUES.pack(*ot_tenths), DAY_VALUES.pack(*late_minutes)
+
+
+def backfill_attendance_bitmaps(apps, schema_editor):
+    """Encode existing DailyAttendance into one bitmap per employee-month"""
+    DailyAttendance = apps.get_model('excel_data', 'DailyAttendance')
+    MonthlyAttendanceBitmap = apps.get_model('excel_data', 'MonthlyAttendanceBitmap')
+    rows = DailyAttendance.objects.order_by('tenant_id', 'employee_id', 'date').values_list(
+        'tenant_id', 'employee_id', 'date', 'attendance_status', 'ot_hours', 'late_minutes'
+    )
+    bitmaps = []
+    key, days = None, {}
+
+    def add_bitmap():
+        statuses, ot_tenths, late_minutes = encode_days(days)
+        tenant_id, employee_id, year, month = key
+        bitmaps.append(MonthlyAttendanceBitmap(
+            tenant_id=tenant_id, employee_id=employee_id, year=year, month=month,
+            statuses=statuses, ot_tenths=ot_tenths, late_minutes=late_minutes,
+        ))
+
+    for tenant_id, employee_id, day, attendance_status, ot_hours, late_minutes in rows.iterator(chunk_size=5000):
+        row_key = (tenant_id, employee_id, day.year, day.month)
+        if row_key != key:
+            if days:
+                add_bitmap()
+            if len(bitmaps) >= 1000:
+                MonthlyAttendanceBitmap.objects.bulk_create(bitmaps)
+                bitmaps = []
+            key, days = row_key, {}
+        days[day.day] = (attendance_status, ot_hours, late_minutes)
+    if days:
+        add_bitmap()
+    MonthlyAttendanceBitmap.objects.bulk_create(bitmaps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('excel_data', '0033_backgroundjob_retries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyAttendanceBitmap',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('employee_id', models.CharField(max_length=50)),
+                ('year', models.IntegerField()),
+                ('month', models.IntegerField()),
+                ('statuses', models.BinaryField(max_length=31)),
+                ('ot_tenths', models.BinaryField(max_length=124)),
+                ('late_minutes', models.BinaryField(max_length=124)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='excel_data.tenant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tenant', 'year', 'month'], name='attendance_bitmap_month_idx')],
+                'unique_together': {('tenant', 'employee_id', 'year', 'month')},
+            },
+        ),
+        migrations.RunPython(backfill_attendance_bitmaps, migrations.RunPython.noop),
+    ]
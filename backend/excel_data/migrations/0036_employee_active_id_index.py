@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-17 04:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('excel_data', '0035_tenantholiday'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='employeeprofile',
+            name='employee_active_idx',
+        ),
+        migrations.AddIndex(
+            model_name='employeeprofile',
+            index=models.Index(fields=['tenant', 'is_active', 'employee_id'], name='employee_active_id_idx'),
+        ),
+    ]
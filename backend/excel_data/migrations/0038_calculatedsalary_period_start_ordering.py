@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-17 05:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('excel_data', '0037_backgroundjob_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='calculatedsalary',
+            options={'ordering': [models.OrderBy(models.F('payroll_period__period_start'), descending=True, nulls_last=True), 'employee_name']},
+        ),
+    ]
@@ -46,6 +46,12 @@ from .attendance import (
     Attendance,
     DailyAttendance,
     MonthlyAttendanceSummary,
+    MonthlyAttendanceBitmap,
+)
+
+# Holiday Models
+from .holiday import (
+    TenantHoliday,
 )
 
 # Payroll Models
@@ -54,6 +60,15 @@ from .payroll import (
     PayrollPeriod,
     CalculatedSalary,
     SalaryAdjustment,
+    PayrollDirtyEmployee,
+    PayrollPeriodRollup,
+)
+
+# Background Job Models
+from .jobs import (
+    JobStatus,
+    JobType,
+    BackgroundJob,
 )
 
 # Salary Models
@@ -64,6 +79,7 @@ from .salary import (
 # Ledger Models
 from .ledger import (
     AdvanceLedger,
+    EmployeeAdvanceBalance,
     Payment,
 )
 
@@ -92,17 +108,29 @@ __all__ = [
     'Attendance',
     'DailyAttendance',
     'MonthlyAttendanceSummary',
+    'MonthlyAttendanceBitmap',
+    
+    # Holiday Models
+    'TenantHoliday',
     
     # Payroll Models
     'DataSource',
     'PayrollPeriod',
     'CalculatedSalary',
     'SalaryAdjustment',
+    'PayrollDirtyEmployee',
+    'PayrollPeriodRollup',
+    
+    # Background Job Models
+    'JobStatus',
+    'JobType',
+    'BackgroundJob',
     
     # Salary Models
     'SalaryData',
     
     # Ledger Models
     'AdvanceLedger',
+    'EmployeeAdvanceBalance',
     'Payment',
 ]
\ No newline at end of file
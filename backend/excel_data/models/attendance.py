@@ -127,4 +127,32 @@ class MonthlyAttendanceSummary(TenantAwareModel):
         verbose_name_plural = "Monthly attendance summaries"
 
     def __str__(self):
-        return f"{self.employee_id} – {self.month}/{self.year}"
\ No newline at end of file
+        return f"{self.employee_id} – {self.month}/{self.year}"
+
+class MonthlyAttendanceBitmap(TenantAwareModel):
+    """
+    Compact copy of one employee's DailyAttendance for a month. Each day is one
+    byte of ``statuses`` (0 = no record) and one little-endian int32 in
+    ``ot_tenths`` (OT in tenths of an hour) and ``late_minutes``, so range
+    reports read one row per employee-month instead of one row per day.
+    Maintained by services/attendance_bitmap_service.py alongside
+    MonthlyAttendanceSummary.
+    """
+
+    employee_id = models.CharField(max_length=50)
+    year = models.IntegerField()
+    month = models.IntegerField()
+
+    statuses = models.BinaryField(max_length=31)
+    ot_tenths = models.BinaryField(max_length=124)
+    late_minutes = models.BinaryField(max_length=124)
+
+    class Meta:
+        app_label = 'excel_data'
+        unique_together = ["tenant", "employee_id", "year", "month"]
+        indexes = [
+            models.Index(fields=['tenant', 'year', 'month'], name='attendance_bitmap_month_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} – {self.month}/{self.year} (bitmap)"
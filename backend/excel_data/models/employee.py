@@ -70,7 +70,8 @@ class EmployeeProfile(TenantAwareModel):
         managed = True
         db_table = 'excel_data_employeeprofile'
         indexes = [
-            models.Index(fields=['tenant', 'is_active'], name='employee_active_idx'),
+            # Also serves (tenant, is_active) lookups; keyset pages of active employees by employee_id
+            models.Index(fields=['tenant', 'is_active', 'employee_id'], name='employee_active_id_idx'),
             models.Index(fields=['tenant', 'employee_id'], name='employee_id_idx'),
             models.Index(fields=['is_active', 'employee_id'], name='employee_lookup_idx'),
         ]
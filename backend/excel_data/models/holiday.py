@@ -0,0 +1,21 @@
+from django.db import models
+from .tenant import TenantAwareModel
+
+
+class TenantHoliday(TenantAwareModel):
+    """
+    A public or company holiday for a tenant. Holidays are non-working days for
+    every employee, so they are excluded from working-day counts and nobody is
+    expected to have attendance marked on them.
+    """
+    date = models.DateField()
+    name = models.CharField(max_length=100)
+    description = models.TextField(blank=True, default='')
+
+    class Meta:
+        app_label = 'excel_data'
+        ordering = ['date']
+        unique_together = ['tenant', 'date']
+
+    def __str__(self):
+        return f"{self.name} ({self.date})"
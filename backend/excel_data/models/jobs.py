@@ -0,0 +1,61 @@
+from django.db import models
+from .tenant import TenantAwareModel
+
+
+class JobStatus(models.TextChoices):
+    """Lifecycle of a background job"""
+    QUEUED = 'QUEUED', 'Queued'
+    RUNNING = 'RUNNING', 'Running'
+    SUCCEEDED = 'SUCCEEDED', 'Succeeded'
+    FAILED = 'FAILED', 'Failed'
+
+
+class JobType(models.TextChoices):
+    """Kinds of work that can be queued as a background job"""
+    PAYROLL_CALCULATION = 'PAYROLL_CALCULATION', 'Payroll Calculation'
+    MONTHLY_SUMMARY_REBUILD = 'MONTHLY_SUMMARY_REBUILD', 'Monthly Attendance Summary Rebuild'
+
+
+class BackgroundJob(TenantAwareModel):
+    """
+    Work queued by an API request and executed by a worker process
+    (manage.py run_workers), so long calculations don't run inside the request.
+    Without a worker process a scheduled request drains the queue instead
+    (see services/job_service.drain_jobs).
+    A failed job goes back to the queue until it has used max_attempts, waiting
+    longer before each retry.
+    """
+    job_type = models.CharField(max_length=50, choices=JobType.choices)
+    status = models.CharField(max_length=20, choices=JobStatus.choices, default=JobStatus.QUEUED)
+    params = models.JSONField(default=dict, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+
+    # Progress reported by the worker, e.g. employees done/total
+    progress_done = models.IntegerField(default=0)
+    progress_total = models.IntegerField(default=0)
+
+    created_by = models.ForeignKey('excel_data.CustomUser', on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='background_jobs')
+    # Retries: a queued job is not claimed before run_after
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    run_after = models.DateTimeField(null=True, blank=True)
+
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Refreshed every few seconds while the job runs, even without progress;
+    # a RUNNING job whose heartbeat stops is requeued
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        app_label = 'excel_data'
+        ordering = ['-created_at']
+        indexes = [
+            # Workers claim the oldest queued job
+            models.Index(fields=['status', 'created_at'], name='bg_job_queue_idx'),
+            models.Index(fields=['tenant', 'job_type', 'status'], name='bg_job_tenant_type_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_job_type_display()} #{self.id} ({self.status})"
@@ -20,6 +20,8 @@ class AdvanceLedger(TenantAwareModel):
     amount = models.DecimalField(max_digits=12, decimal_places=2, help_text="Original advance amount")
     remaining_balance = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Remaining balance to be repaid")
     for_month = models.CharField(max_length=20)  # e.g., 'Mar 2025'
+    # First day of the month named by for_month, set on save; month lookups use this column
+    for_period = models.DateField(null=True, blank=True, editable=False)
     payment_method = models.CharField(max_length=20, choices=PAYMENT_METHOD_CHOICES)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
     remarks = models.TextField(blank=True, null=True)
@@ -29,6 +31,11 @@ class AdvanceLedger(TenantAwareModel):
         if self.remaining_balance == 0 and self.amount > 0 and not self.pk:
             # This is a new record (no pk yet) with amount > 0, set remaining_balance = amount
             self.remaining_balance = self.amount
+        from ..services.calendar_service import parse_month_label
+        self.for_period = parse_month_label(self.for_month)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'for_month' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'for_period'}
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -40,11 +47,30 @@ class AdvanceLedger(TenantAwareModel):
         db_table = 'excel_data_advanceledger'
         indexes = [
             models.Index(fields=['tenant', 'employee_id', 'status'], name='advance_payroll_idx'),
-            models.Index(fields=['tenant', 'for_month'], name='advance_month_idx'),
+            models.Index(fields=['tenant', 'for_period', 'status'], name='advance_period_idx'),
             models.Index(fields=['employee_id', 'status'], name='advance_status_idx'),
         ]
 
 
+class EmployeeAdvanceBalance(TenantAwareModel):
+    """
+    Outstanding advance balance per employee: the sum of remaining_balance over
+    their PENDING / PARTIALLY_PAID advances. Maintained in the same transaction
+    as ledger writes (see services/advance_balance_service.py) so payroll can
+    read balances without aggregating the ledger.
+    """
+    employee_id = models.CharField(max_length=50)
+    balance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    open_advances = models.IntegerField(default=0, help_text="Number of advances not yet fully repaid")
+
+    class Meta:
+        app_label = 'excel_data'
+        unique_together = ['tenant', 'employee_id']
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.balance}"
+
+
 class Payment(TenantAwareModel):
     PAYMENT_METHOD_CHOICES = [
         ('CASH', 'Cash'),
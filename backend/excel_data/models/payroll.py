@@ -1,4 +1,5 @@
 from django.db import models
+from datetime import date
 from decimal import Decimal
 from .tenant import TenantAwareModel
 
@@ -16,6 +17,9 @@ class PayrollPeriod(TenantAwareModel):
     """
     year = models.IntegerField()
     month = models.CharField(max_length=20)
+    # First day of the period's month, derived from year/month on save; used for
+    # chronological ordering and range selection (NULL if month is unrecognised)
+    period_start = models.DateField(null=True, blank=True, editable=False)
     data_source = models.CharField(max_length=20, choices=DataSource.choices, default=DataSource.FRONTEND)
     is_locked = models.BooleanField(default=False, help_text="Locked periods cannot be modified")
     calculation_date = models.DateTimeField(auto_now_add=True)
@@ -27,10 +31,29 @@ class PayrollPeriod(TenantAwareModel):
     class Meta:
         app_label = 'excel_data'
         unique_together = ['tenant', 'year', 'month']
-        ordering = ['-year', '-month']
+        ordering = [models.F('period_start').desc(nulls_last=True), '-year']
+        indexes = [
+            models.Index(fields=['tenant', 'period_start'], name='payroll_period_start_idx'),
+        ]
     
     def __str__(self):
         return f"{self.month} {self.year} - {self.get_data_source_display()}"
+    
+    @staticmethod
+    def period_start_for(year, month):
+        """First day of the month for a year and month name ('JUNE', 'Jun') or number"""
+        from ..services.calendar_service import month_number
+        month_num = month_number(month)
+        if not year or not month_num:
+            return None
+        return date(int(year), month_num, 1)
+    
+    def save(self, *args, **kwargs):
+        self.period_start = self.period_start_for(self.year, self.month)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and ('year' in update_fields or 'month' in update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'period_start'}
+        super().save(*args, **kwargs)
 
 
 class CalculatedSalary(TenantAwareModel):
@@ -87,7 +110,12 @@ class CalculatedSalary(TenantAwareModel):
     class Meta:
         app_label = 'excel_data'
         unique_together = ['tenant', 'payroll_period', 'employee_id']
-        ordering = ['-payroll_period__year', '-payroll_period__month', 'employee_name']
+        ordering = [models.F('payroll_period__period_start').desc(nulls_last=True), 'employee_name']
+        indexes = [
+            # Sort keys of the paginated period detail (employee_id is covered by unique_together)
+            models.Index(fields=['payroll_period', 'employee_name', 'id'], name='calc_salary_period_name_idx'),
+            models.Index(fields=['payroll_period', 'net_payable', 'id'], name='calc_salary_period_net_idx'),
+        ]
     
     def save(self, *args, **kwargs):
         """Auto-calculate salary components"""
@@ -166,4 +194,48 @@ class SalaryAdjustment(TenantAwareModel):
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
         # Recalculate the salary after adjustment
-        self.calculated_salary.save()
\ No newline at end of file
+        self.calculated_salary.save()
+
+class PayrollDirtyEmployee(TenantAwareModel):
+    """
+    Marks an employee/period whose payroll inputs changed since the last calculation.
+    Incremental recalculation only touches CalculatedSalary rows that have a marker.
+    """
+    employee_id = models.CharField(max_length=50)
+    year = models.IntegerField()
+    # Store month as integer 1-12, same as MonthlyAttendanceSummary
+    month = models.IntegerField()
+    reason = models.CharField(max_length=50, blank=True, default='')
+    marked_at = models.DateTimeField()
+    
+    class Meta:
+        app_label = 'excel_data'
+        unique_together = ['tenant', 'employee_id', 'year', 'month']
+        indexes = [
+            models.Index(fields=['tenant', 'year', 'month'], name='payroll_dirty_period_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.employee_id} – {self.month}/{self.year} ({self.reason})"
+
+
+class PayrollPeriodRollup(TenantAwareModel):
+    """
+    Salary totals of one payroll period, kept in step with its CalculatedSalary
+    rows in the same transaction as every write (see
+    services/payroll_rollup_service.py) so the payroll overview reads one row
+    per period instead of aggregating salaries.
+    """
+    payroll_period = models.OneToOneField(PayrollPeriod, on_delete=models.CASCADE, related_name='rollup')
+    employee_count = models.IntegerField(default=0)
+    paid_count = models.IntegerField(default=0)
+    total_gross_salary = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_net_salary = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_advance_deductions = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_tds = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        app_label = 'excel_data'
+
+    def __str__(self):
+        return f"{self.payroll_period} - {self.employee_count} employees"
@@ -22,7 +22,7 @@ from .employee_serializers import (
 
 from .attendance_serializers import (
     AttendanceSerializer, DailyAttendanceSerializer,
-    LeaveSerializer
+    TenantHolidaySerializer, LeaveSerializer
 )
 
 from .payment_serializers import (
@@ -105,6 +105,7 @@ __all__ = [
     # Attendance serializers
     'AttendanceSerializer',
     'DailyAttendanceSerializer',
+    'TenantHolidaySerializer',
     'LeaveSerializer',
     
     # Payment serializers
@@ -4,7 +4,7 @@ attendance, leaves, and summary views.
 """
 
 from rest_framework import serializers
-from ..models import Attendance, DailyAttendance, Leave
+from ..models import Attendance, DailyAttendance, Leave, TenantHoliday
 
 class AttendanceSerializer(serializers.ModelSerializer):
     attendance_percentage = serializers.SerializerMethodField()
@@ -36,6 +36,23 @@ class DailyAttendanceSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['created_at', 'updated_at']
 
+class TenantHolidaySerializer(serializers.ModelSerializer):
+    
+    class Meta:
+        model = TenantHoliday
+        fields = ['id', 'date', 'name', 'description', 'created_at', 'updated_at']
+        read_only_fields = ['created_at', 'updated_at']
+    
+    def validate_date(self, value):
+        # unique_together includes the tenant, which isn't a serializer field
+        tenant = getattr(self.context.get('request'), 'tenant', None)
+        holidays = TenantHoliday.all_objects.filter(tenant=tenant, date=value)
+        if self.instance:
+            holidays = holidays.exclude(pk=self.instance.pk)
+        if tenant and holidays.exists():
+            raise serializers.ValidationError('A holiday already exists on this date.')
+        return value
+
 class LeaveSerializer(serializers.ModelSerializer):
     employee_name = serializers.CharField(source='employee.name', read_only=True)
     approved_by_name = serializers.CharField(source='approved_by.email', read_only=True)
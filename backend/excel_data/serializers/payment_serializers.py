@@ -17,11 +17,11 @@ class AdvanceLedgerSerializer(serializers.ModelSerializer):
         model = AdvanceLedger
         fields = [
             'id', 'employee_id', 'employee_name', 'advance_date', 'amount',
-            'remaining_balance', 'for_month', 'payment_method', 'status', 'remarks',
+            'remaining_balance', 'for_month', 'for_period', 'payment_method', 'status', 'remarks',
             'created_at', 'updated_at', 'is_active', 'is_fully_repaid', 
             'amount_formatted', 'status_display'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'for_period', 'created_at', 'updated_at']
     
     def get_is_active(self, obj):
         """Check if advance is still active (not fully repaid)"""
@@ -0,0 +1,180 @@
+"""
+Materialized advance balances
+
+EmployeeAdvanceBalance keeps one row per (tenant, employee_id) with the sum of
+remaining_balance over the employee's open advances; employees without open
+advances have no row. Every ledger write
+recomputes the rows of the employees it touched, inside the writer's
+transaction, so payroll reads balances with one indexed lookup instead of
+aggregating AdvanceLedger. rebuild_advance_balances() reconciles any drift
+(e.g. rows changed with QuerySet.update()).
+"""
+
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from ..models import AdvanceLedger, EmployeeAdvanceBalance
+import logging
+
+logger = logging.getLogger(__name__)
+
+OPEN_ADVANCE_STATUSES = ['PENDING', 'PARTIALLY_PAID']
+
+# Employees per balance refresh UPDATE
+REFRESH_CHUNK_SIZE = 500
+
+
+def _ledger_totals(tenant_id, employee_ids=None) -> dict:
+    """employee_id -> (balance, open_advances) aggregated from the ledger"""
+    advances = AdvanceLedger.all_objects.filter(tenant_id=tenant_id, status__in=OPEN_ADVANCE_STATUSES)
+    if employee_ids is not None:
+        advances = advances.filter(employee_id__in=employee_ids)
+    return {
+        row['employee_id']: (row['balance'] or Decimal('0'), row['open_advances'])
+        for row in advances.values('employee_id').order_by().annotate(
+            balance=Sum('remaining_balance'),
+            open_advances=Count('id'),
+        )
+    }
+
+
+def lock_advance_balances(tenant_id, employee_ids) -> list:
+    """
+    Create any missing balance rows for the employees and lock them (in a stable
+    order, to avoid deadlocks). Must be called inside a transaction; holding the
+    locks serialises ledger writers for the same employees.
+    """
+    employee_ids = sorted({employee_id for employee_id in employee_ids if employee_id})
+    if not employee_ids:
+        return []
+    existing = set(
+        EmployeeAdvanceBalance.all_objects.filter(
+            tenant_id=tenant_id, employee_id__in=employee_ids
+        ).values_list('employee_id', flat=True)
+    )
+    missing = [employee_id for employee_id in employee_ids if employee_id not in existing]
+    if missing:
+        EmployeeAdvanceBalance.all_objects.bulk_create(
+            [EmployeeAdvanceBalance(tenant_id=tenant_id, employee_id=employee_id) for employee_id in missing],
+            ignore_conflicts=True,
+        )
+    return list(
+        EmployeeAdvanceBalance.all_objects.select_for_update().filter(
+            tenant_id=tenant_id, employee_id__in=employee_ids
+        ).order_by('employee_id').values_list('id', flat=True)
+    )
+
+
+def refresh_advance_balances(tenant_id, employee_ids):
+    """
+    Recompute the balance rows of the given employees from the ledger.
+
+    Call this in the same transaction as the ledger write. The balance rows are
+    locked before the ledger is read, so concurrent writers for the same
+    employee are serialised and the last one sees the other's committed rows.
+    """
+    employee_ids = sorted({employee_id for employee_id in employee_ids if employee_id})
+    if not employee_ids:
+        return 0
+
+    with transaction.atomic():
+        lock_advance_balances(tenant_id, employee_ids)
+
+        # One UPDATE per chunk with correlated aggregates, so the ledger rows
+        # never leave the database
+        open_advances = AdvanceLedger.all_objects.filter(
+            tenant_id=tenant_id,
+            employee_id=OuterRef('employee_id'),
+            status__in=OPEN_ADVANCE_STATUSES,
+        ).values('employee_id').order_by()
+        now = timezone.now()
+        updated = 0
+        for start in range(0, len(employee_ids), REFRESH_CHUNK_SIZE):
+            updated += EmployeeAdvanceBalance.all_objects.filter(
+                tenant_id=tenant_id, employee_id__in=employee_ids[start:start + REFRESH_CHUNK_SIZE]
+            ).update(
+                balance=Coalesce(
+                    Subquery(open_advances.annotate(total=Sum('remaining_balance')).values('total')),
+                    Value(Decimal('0')),
+                    output_field=DecimalField(max_digits=12, decimal_places=2),
+                ),
+                open_advances=Coalesce(
+                    Subquery(open_advances.annotate(total=Count('id')).values('total')),
+                    Value(0),
+                ),
+                # update() does not apply auto_now
+                updated_at=now,
+            )
+        # Same invariant as rebuild_advance_balances(): only employees with open
+        # advances have a row
+        EmployeeAdvanceBalance.all_objects.filter(
+            tenant_id=tenant_id, employee_id__in=employee_ids, open_advances=0
+        ).delete()
+    return updated
+
+
+def get_advance_balances(tenant, employee_ids=None) -> dict:
+    """employee_id -> outstanding advance balance (employees without advances are omitted)"""
+    balances = EmployeeAdvanceBalance.all_objects.filter(tenant=tenant, balance__gt=0)
+    if employee_ids is not None:
+        balances = balances.filter(employee_id__in=employee_ids)
+    return dict(balances.values_list('employee_id', 'balance'))
+
+
+def get_advance_balance(tenant, employee_id: str) -> Decimal:
+    """Outstanding advance balance of one employee"""
+    return get_advance_balances(tenant, [employee_id]).get(employee_id, Decimal('0'))
+
+
+def rebuild_advance_balances(tenant_id, dry_run: bool = False) -> dict:
+    """
+    Reconcile a tenant's balance rows with the ledger. Returns counts of rows
+    checked, created, corrected (drifted) and removed.
+    """
+    stats = {'checked': 0, 'created': 0, 'corrected': 0, 'removed': 0}
+    with transaction.atomic():
+        existing = {
+            row.employee_id: row for row in
+            EmployeeAdvanceBalance.all_objects.select_for_update().filter(tenant_id=tenant_id)
+        }
+        totals = _ledger_totals(tenant_id)
+
+        to_create, to_update = [], []
+        for employee_id, (balance, open_advances) in totals.items():
+            row = existing.get(employee_id)
+            if row is None:
+                to_create.append(EmployeeAdvanceBalance(
+                    tenant_id=tenant_id, employee_id=employee_id, balance=balance, open_advances=open_advances
+                ))
+            elif row.balance != balance or row.open_advances != open_advances:
+                logger.warning(
+                    f"Advance balance drift for tenant {tenant_id} employee {employee_id}: "
+                    f"{row.balance} stored, {balance} in ledger"
+                )
+                row.balance, row.open_advances = balance, open_advances
+                row.updated_at = timezone.now()
+                to_update.append(row)
+        # Employees with no open advances don't need a row
+        stale_ids = [employee_id for employee_id in existing if employee_id not in totals]
+        for employee_id in stale_ids:
+            if existing[employee_id].balance:
+                logger.warning(
+                    f"Advance balance drift for tenant {tenant_id} employee {employee_id}: "
+                    f"{existing[employee_id].balance} stored, no open advances in ledger"
+                )
+
+        stats['checked'] = len(existing)
+        stats['created'] = len(to_create)
+        stats['corrected'] = len(to_update)
+        stats['removed'] = len(stale_ids)
+        if dry_run:
+            return stats
+
+        EmployeeAdvanceBalance.all_objects.bulk_create(to_create, batch_size=500)
+        EmployeeAdvanceBalance.all_objects.bulk_update(
+            to_update, ['balance', 'open_advances', 'updated_at'], batch_size=500
+        )
+        EmployeeAdvanceBalance.all_objects.filter(tenant_id=tenant_id, employee_id__in=stale_ids).delete()
+    return stats
@@ -0,0 +1,111 @@
+"""
+Advance repayment allocation
+
+Salary advance deductions are repaid against an employee's open advances
+oldest first (FIFO by advance_date). Instead of loading every pending ledger
+row into Python, apply_advance_repayments() does the allocation in SQL: a
+window SUM over the open advances gives each one the balance of the advances
+before it, which is enough to work out how much of the deduction it absorbs,
+and a single UPDATE ... FROM applies the result for a whole chunk of employees.
+"""
+
+from decimal import Decimal
+from django.db import connection, transaction
+from django.utils import timezone
+from .advance_balance_service import OPEN_ADVANCE_STATUSES, lock_advance_balances, refresh_advance_balances
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Employees per UPDATE statement (two bind parameters each)
+ALLOCATION_CHUNK_SIZE = 500
+
+# ``prior`` is the open balance of the employee's older advances; an advance
+# takes part while ``prior`` is below the deduction and absorbs at most its own
+# balance. Written with CASE rather than LEAST/GREATEST so it runs on SQLite too.
+ALLOCATION_SQL = """
+    WITH deductions (employee_id, amount) AS (
+        VALUES {values}
+    ),
+    ranked AS (
+        SELECT a.id,
+               a.remaining_balance,
+               d.amount,
+               SUM(a.remaining_balance) OVER (
+                   PARTITION BY a.employee_id
+                   ORDER BY a.advance_date, a.id
+                   ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+               ) - a.remaining_balance AS prior
+        FROM excel_data_advanceledger a
+        JOIN deductions d ON d.employee_id = a.employee_id
+        WHERE a.tenant_id = %s
+            AND a.status IN ({statuses})
+    ),
+    allocation AS (
+        SELECT id,
+               CASE WHEN amount - prior >= remaining_balance THEN 0
+                    ELSE remaining_balance - (amount - prior)
+               END AS new_balance
+        FROM ranked
+        WHERE prior < amount
+    )
+    UPDATE excel_data_advanceledger
+    SET remaining_balance = allocation.new_balance,
+        status = CASE WHEN allocation.new_balance <= 0 THEN 'REPAID' ELSE 'PARTIALLY_PAID' END,
+        updated_at = %s
+    FROM allocation
+    WHERE excel_data_advanceledger.id = allocation.id
+    RETURNING excel_data_advanceledger.status
+"""
+
+
+def apply_advance_repayments(tenant_id, deductions: dict) -> dict:
+    """
+    Repay open advances FIFO from per-employee deduction amounts
+    ({employee_id: amount}) and refresh the employees' materialized balances.
+
+    Runs in its own atomic block (joining the caller's transaction if there is
+    one). Returns counts of advances partially paid and fully repaid.
+    """
+    deductions = {
+        employee_id: Decimal(str(amount))
+        for employee_id, amount in deductions.items()
+        if employee_id and amount and Decimal(str(amount)) > 0
+    }
+    stats = {'employees': len(deductions), 'partially_paid': 0, 'repaid': 0}
+    if not deductions:
+        return stats
+
+    employee_ids = sorted(deductions)
+    statuses = ', '.join(['%s'] * len(OPEN_ADVANCE_STATUSES))
+    now = timezone.now()
+
+    with transaction.atomic():
+        # Serialise with other ledger writers for these employees before reading balances
+        lock_advance_balances(tenant_id, employee_ids)
+
+        with connection.cursor() as cursor:
+            for start in range(0, len(employee_ids), ALLOCATION_CHUNK_SIZE):
+                chunk = employee_ids[start:start + ALLOCATION_CHUNK_SIZE]
+                values = ', '.join(['(%s, CAST(%s AS DECIMAL(12, 2)))'] * len(chunk))
+                params = []
+                for employee_id in chunk:
+                    params.extend([employee_id, deductions[employee_id]])
+                params.append(tenant_id)
+                params.extend(OPEN_ADVANCE_STATUSES)
+                params.append(now)
+
+                cursor.execute(ALLOCATION_SQL.format(values=values, statuses=statuses), params)
+                for (status,) in cursor.fetchall():
+                    if status == 'REPAID':
+                        stats['repaid'] += 1
+                    else:
+                        stats['partially_paid'] += 1
+
+        refresh_advance_balances(tenant_id, employee_ids)
+
+    logger.info(
+        f"Advance repayments for {stats['employees']} employees: "
+        f"{stats['partially_paid']} partially paid, {stats['repaid']} repaid"
+    )
+    return stats
@@ -0,0 +1,234 @@
+"""
+Monthly attendance bitmaps
+
+MonthlyAttendanceBitmap keeps a compact copy of DailyAttendance: one row per
+(tenant, employee, year, month) with the day statuses packed one byte per day
+and the per-day OT (tenths of an hour) and late minutes packed as 31
+little-endian int32s. Range readers fetch one row per employee-month and
+decode the days they need with bytes.count() and slice sums instead of
+reading a wide row per day.
+
+The bitmaps follow the monthly summaries: every summary refresh re-encodes
+the same employee-months from DailyAttendance while it holds the summary
+locks, and the bulk attendance upsert patches the days it wrote with
+apply_attendance_days() in its own transaction. Both drop the cached
+attendance calendar months of the employees they wrote once the
+transaction commits.
+"""
+
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from ..models import DailyAttendance, MonthlyAttendanceBitmap
+from .calendar_service import month_range_filter, month_span_filter
+import struct
+
+DAYS = 31
+
+# Day codes stored in MonthlyAttendanceBitmap.statuses; 0 means no record
+NO_RECORD = 0
+STATUS_CODES = {
+    'PRESENT': 1,
+    'ABSENT': 2,
+    'HALF_DAY': 3,
+    'PAID_LEAVE': 4,
+    'OFF': 5,
+}
+# A stored status outside the model choices still counts as a recorded day
+OTHER_STATUS = 255
+
+_DAY_VALUES = struct.Struct(f'<{DAYS}i')
+
+# Employees per read/upsert statement
+BITMAP_CHUNK_SIZE = 500
+
+
+def calendar_cache_key(tenant_id, employee_id, year: int, month: int) -> str:
+    """Cache key of one employee-month of the attendance calendar (see attendance_calendar_service)"""
+    return f"attendance_calendar_{tenant_id}_{employee_id}_{year}_{month}"
+
+
+def _invalidate_calendar_months(tenant_id, year, month, employee_ids):
+    keys = [calendar_cache_key(tenant_id, employee_id, year, month) for employee_id in employee_ids]
+    # After commit, so a concurrent read can't cache the old month again
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def _tenths(ot_hours) -> int:
+    return int((Decimal(str(ot_hours or 0)) * 10).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def encode_days(days: dict) -> tuple:
+    """
+    {day_of_month: (attendance_status, ot_hours, late_minutes)} ->
+    (statuses, ot_tenths, late_minutes) as stored on MonthlyAttendanceBitmap
+    """
+    statuses = bytearray(DAYS)
+    ot_tenths = [0] * DAYS
+    late_minutes = [0] * DAYS
+    for day, (attendance_status, ot_hours, late) in days.items():
+        statuses[day - 1] = STATUS_CODES.get(attendance_status, OTHER_STATUS)
+        ot_tenths[day - 1] = _tenths(ot_hours)
+        late_minutes[day - 1] = int(late or 0)
+    return bytes(statuses), _DAY_VALUES.pack(*ot_tenths), _DAY_VALUES.pack(*late_minutes)
+
+
+def day_values(packed) -> tuple:
+    """The 31 per-day integers of an ot_tenths or late_minutes column"""
+    return _DAY_VALUES.unpack(bytes(packed))
+
+
+def range_totals(bitmap, first_day: int = 1, last_day: int = DAYS) -> dict:
+    """
+    Totals of days first_day..last_day (inclusive) of one bitmap, counted the
+    way MonthlyAttendanceSummary counts them (PRESENT and PAID_LEAVE as 1,
+    HALF_DAY as 0.5)
+    """
+    statuses = bytes(bitmap.statuses)[first_day - 1:last_day]
+    present_full = statuses.count(STATUS_CODES['PRESENT']) + statuses.count(STATUS_CODES['PAID_LEAVE'])
+    half_count = statuses.count(STATUS_CODES['HALF_DAY'])
+    return {
+        'days_recorded': len(statuses) - statuses.count(NO_RECORD),
+        'present_full': present_full,
+        'half_count': half_count,
+        'absent_count': statuses.count(STATUS_CODES['ABSENT']),
+        'present_days': present_full + Decimal(half_count) / 2,
+        'ot_hours': Decimal(sum(day_values(bitmap.ot_tenths)[first_day - 1:last_day])) / 10,
+        'late_minutes': sum(day_values(bitmap.late_minutes)[first_day - 1:last_day]),
+    }
+
+
+def attendance_range_totals(tenant_id, start_date, end_date, employee_ids=None) -> dict:
+    """
+    employee_id -> range_totals() over start_date..end_date (inclusive), for
+    employees with at least one attendance record in the range
+    """
+    bitmaps = MonthlyAttendanceBitmap.all_objects.filter(
+        month_span_filter(start_date, end_date), tenant_id=tenant_id
+    )
+    if employee_ids is not None:
+        bitmaps = bitmaps.filter(employee_id__in=employee_ids)
+
+    first_month = (start_date.year, start_date.month)
+    last_month = (end_date.year, end_date.month)
+    totals = {}
+    for bitmap in bitmaps.order_by().iterator(chunk_size=2000):
+        month = (bitmap.year, bitmap.month)
+        days = range_totals(
+            bitmap,
+            start_date.day if month == first_month else 1,
+            end_date.day if month == last_month else DAYS,
+        )
+        if not days['days_recorded']:
+            continue
+        employee_totals = totals.get(bitmap.employee_id)
+        if employee_totals is None:
+            totals[bitmap.employee_id] = days
+        else:
+            for field, value in days.items():
+                employee_totals[field] += value
+    return totals
+
+
+def _lock_bitmaps(tenant_id, year, month, employee_ids) -> dict:
+    """employee_id -> locked bitmap of the month, for the employees that have one"""
+    return {
+        bitmap.employee_id: bitmap
+        for bitmap in MonthlyAttendanceBitmap.all_objects.select_for_update().filter(
+            tenant_id=tenant_id, year=year, month=month, employee_id__in=employee_ids
+        ).order_by('employee_id')
+    }
+
+
+def encode_month_from_attendance(tenant_id, year, month, employee_ids) -> dict:
+    """
+    employee_id -> unsaved bitmap of the month encoded from DailyAttendance,
+    for the given employees that have attendance that month
+    """
+    days = defaultdict(dict)
+    for employee_id, day, attendance_status, ot_hours, late_minutes in DailyAttendance.all_objects.filter(
+        tenant_id=tenant_id,
+        employee_id__in=employee_ids,
+        **month_range_filter(year, month),
+    ).order_by().values_list('employee_id', 'date', 'attendance_status', 'ot_hours', 'late_minutes'):
+        days[employee_id][day.day] = (attendance_status, ot_hours, late_minutes)
+
+    bitmaps = {}
+    for employee_id, employee_days in days.items():
+        statuses, ot_tenths, late_minutes = encode_days(employee_days)
+        bitmaps[employee_id] = MonthlyAttendanceBitmap(
+            tenant_id=tenant_id, employee_id=employee_id, year=year, month=month,
+            statuses=statuses, ot_tenths=ot_tenths, late_minutes=late_minutes,
+        )
+    return bitmaps
+
+
+def refresh_bitmap_chunk(tenant_id, year, month, employee_ids) -> int:
+    """
+    Re-encode one month's bitmaps for a chunk of employees from DailyAttendance,
+    deleting the bitmaps of employees with no attendance left that month.
+    Returns how many bitmaps were written.
+    """
+    with transaction.atomic():
+        _lock_bitmaps(tenant_id, year, month, employee_ids)
+        bitmaps = encode_month_from_attendance(tenant_id, year, month, employee_ids)
+        MonthlyAttendanceBitmap.all_objects.bulk_create(
+            list(bitmaps.values()),
+            update_conflicts=True,
+            unique_fields=['tenant', 'employee_id', 'year', 'month'],
+            update_fields=['statuses', 'ot_tenths', 'late_minutes', 'updated_at'],
+        )
+        without_attendance = set(employee_ids) - set(bitmaps)
+        if without_attendance:
+            MonthlyAttendanceBitmap.all_objects.filter(
+                tenant_id=tenant_id, year=year, month=month, employee_id__in=without_attendance
+            ).delete()
+        _invalidate_calendar_months(tenant_id, year, month, employee_ids)
+    return len(bitmaps)
+
+
+def apply_attendance_days(tenant_id, rows) -> dict:
+    """
+    Write freshly upserted DailyAttendance ``rows`` (dicts with employee_id,
+    date, attendance_status, ot_hours and late_minutes) into their bitmaps.
+    Existing bitmaps get just those days patched; employee-months without a
+    bitmap are encoded from DailyAttendance, so call this after the rows are
+    stored. Returns {'patched': n, 'created': n}.
+    """
+    by_month = defaultdict(lambda: defaultdict(dict))
+    for row in rows:
+        day = row['date']
+        by_month[(day.year, day.month)][row['employee_id']][day.day] = row
+
+    result = {'patched': 0, 'created': 0}
+    now = timezone.now()
+    with transaction.atomic():
+        for (year, month), employees in sorted(by_month.items()):
+            employee_ids = sorted(employees)
+            for start in range(0, len(employee_ids), BITMAP_CHUNK_SIZE):
+                chunk = employee_ids[start:start + BITMAP_CHUNK_SIZE]
+                bitmaps = _lock_bitmaps(tenant_id, year, month, chunk)
+                for employee_id, bitmap in bitmaps.items():
+                    statuses = bytearray(bytes(bitmap.statuses))
+                    ot_tenths = list(day_values(bitmap.ot_tenths))
+                    late_minutes = list(day_values(bitmap.late_minutes))
+                    for day, row in employees[employee_id].items():
+                        statuses[day - 1] = STATUS_CODES.get(row['attendance_status'], OTHER_STATUS)
+                        ot_tenths[day - 1] = _tenths(row.get('ot_hours'))
+                        late_minutes[day - 1] = int(row.get('late_minutes') or 0)
+                    bitmap.statuses = bytes(statuses)
+                    bitmap.ot_tenths = _DAY_VALUES.pack(*ot_tenths)
+                    bitmap.late_minutes = _DAY_VALUES.pack(*late_minutes)
+                    bitmap.updated_at = now
+                MonthlyAttendanceBitmap.all_objects.bulk_update(
+                    list(bitmaps.values()), ['statuses', 'ot_tenths', 'late_minutes', 'updated_at']
+                )
+                _invalidate_calendar_months(tenant_id, year, month, list(bitmaps))
+                result['patched'] += len(bitmaps)
+
+                missing = [employee_id for employee_id in chunk if employee_id not in bitmaps]
+                if missing:
+                    result['created'] += refresh_bitmap_chunk(tenant_id, year, month, missing)
+    return result
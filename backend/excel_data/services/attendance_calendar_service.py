@@ -0,0 +1,181 @@
+"""
+Per-employee attendance calendar
+
+build_attendance_calendar() returns one employee's attendance over a date
+range in a compact form:
+
+* statuses: the day statuses as a run-length encoded string of one-letter
+  codes ("5P2O4P1A..." = 5 present, 2 off, 4 present, 1 absent), one
+  character per day from ``from`` to ``to``;
+* ot_hours / late_minutes: sparse [day_offset, value] pairs for the days
+  that have any;
+* holidays: [day_offset, name] pairs for the tenant's holidays in the range.
+
+The data comes from MonthlyAttendanceBitmap (one row per employee-month, read
+with a single range scan of its (tenant, employee_id, year, month) unique
+index). Each month is cached on its own under calendar_cache_key(); the
+bitmap writers drop those keys for the employee-months they change.
+"""
+
+from itertools import groupby
+from django.core.cache import cache
+from ..models import MonthlyAttendanceBitmap
+from .attendance_bitmap_service import NO_RECORD, OTHER_STATUS, STATUS_CODES, calendar_cache_key, day_values
+from .calendar_service import add_months, month_bounds, month_span_filter
+from .holiday_service import tenant_holidays
+
+CALENDAR_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Longest range one request may ask for
+MAX_CALENDAR_MONTHS = 36
+
+STATUS_LETTERS = {
+    'PRESENT': 'P',
+    'ABSENT': 'A',
+    'HALF_DAY': 'H',
+    'PAID_LEAVE': 'L',
+    'OFF': 'O',
+}
+NO_RECORD_LETTER = '-'
+OTHER_LETTER = '?'
+
+_LETTER_BY_CODE = {code: STATUS_LETTERS[status] for status, code in STATUS_CODES.items()}
+_LETTER_BY_CODE[NO_RECORD] = NO_RECORD_LETTER
+_LETTER_BY_CODE[OTHER_STATUS] = OTHER_LETTER
+
+STATUS_LEGEND = {
+    **{letter: status for status, letter in STATUS_LETTERS.items()},
+    NO_RECORD_LETTER: 'NO_RECORD',
+    OTHER_LETTER: 'OTHER',
+}
+
+
+def months_between(start_date, end_date) -> list:
+    """First day of every month from start_date's to end_date's"""
+    months = []
+    month = start_date.replace(day=1)
+    while month <= end_date:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def run_length_encode(letters: str) -> str:
+    """'PPPPPOO' -> '5P2O'"""
+    return ''.join(f'{len(list(run))}{letter}' for letter, run in groupby(letters))
+
+
+def run_length_decode(encoded: str) -> str:
+    """'5P2O' -> 'PPPPPOO'"""
+    letters, count = [], ''
+    for char in encoded:
+        if char.isdigit():
+            count += char
+        else:
+            letters.append(char * int(count))
+            count = ''
+    return ''.join(letters)
+
+
+def _encode_month(bitmap, days_in_month: int) -> dict:
+    """Cached form of one employee-month: status letters plus sparse (day, value) lists"""
+    if bitmap is None:
+        return {'statuses': NO_RECORD_LETTER * days_in_month, 'ot_tenths': [], 'late_minutes': []}
+    statuses = bytes(bitmap.statuses)[:days_in_month]
+    ot_tenths = day_values(bitmap.ot_tenths)[:days_in_month]
+    late_minutes = day_values(bitmap.late_minutes)[:days_in_month]
+    return {
+        'statuses': ''.join(_LETTER_BY_CODE.get(code, OTHER_LETTER) for code in statuses),
+        'ot_tenths': [(day, value) for day, value in enumerate(ot_tenths, start=1) if value],
+        'late_minutes': [(day, value) for day, value in enumerate(late_minutes, start=1) if value],
+    }
+
+
+def _calendar_months(tenant_id, employee_id, months) -> dict:
+    """month start -> cached month, reading the months missing from the cache in one query"""
+    keys = {month: calendar_cache_key(tenant_id, employee_id, month.year, month.month) for month in months}
+    cached = cache.get_many(list(keys.values()))
+    entries = {month: cached[key] for month, key in keys.items() if key in cached}
+
+    missing = [month for month in months if month not in entries]
+    if missing:
+        bitmaps = {
+            (bitmap.year, bitmap.month): bitmap
+            for bitmap in MonthlyAttendanceBitmap.all_objects.filter(
+                month_span_filter(missing[0], missing[-1]),
+                tenant_id=tenant_id,
+                employee_id=employee_id,
+            )
+        }
+        new_entries = {}
+        for month in missing:
+            month_start, next_month = month_bounds(month.year, month.month)
+            entries[month] = _encode_month(bitmaps.get((month.year, month.month)), (next_month - month_start).days)
+            new_entries[keys[month]] = entries[month]
+        cache.set_many(new_entries, CALENDAR_CACHE_TIMEOUT)
+    return entries
+
+
+def build_attendance_calendar(tenant_id, employee_id, start_date, end_date) -> dict:
+    """
+    Attendance of one employee from start_date to end_date (inclusive), see the
+    module docstring for the encoding. Day offsets count from start_date (0).
+    """
+    months = months_between(start_date, end_date)
+    entries = _calendar_months(tenant_id, employee_id, months)
+
+    letters = []
+    ot_hours = []
+    late_minutes = []
+    for month in months:
+        entry = entries[month]
+        first_day = start_date.day if month == months[0] else 1
+        last_day = end_date.day if month == months[-1] else len(entry['statuses'])
+        letters.append(entry['statuses'][first_day - 1:last_day])
+        offset = (month - start_date).days
+        ot_hours.extend(
+            [offset + day - 1, value / 10] for day, value in entry['ot_tenths'] if first_day <= day <= last_day
+        )
+        late_minutes.extend(
+            [offset + day - 1, value] for day, value in entry['late_minutes'] if first_day <= day <= last_day
+        )
+    statuses = ''.join(letters)
+
+    holidays = [
+        [(day - start_date).days, name]
+        for day, name in sorted(tenant_holidays(tenant_id).items())
+        if start_date <= day <= end_date
+    ]
+
+    present_full = statuses.count('P') + statuses.count('L')
+    half_days = statuses.count('H')
+    return {
+        'employee_id': employee_id,
+        'from': start_date.isoformat(),
+        'to': end_date.isoformat(),
+        'days': len(statuses),
+        'statuses': run_length_encode(statuses),
+        'status_legend': STATUS_LEGEND,
+        'ot_hours': ot_hours,
+        'late_minutes': late_minutes,
+        'holidays': holidays,
+        'totals': {
+            'days_recorded': len(statuses) - statuses.count(NO_RECORD_LETTER),
+            'present_days': present_full + half_days / 2,
+            'absent_days': statuses.count('A'),
+            'half_days': half_days,
+            'paid_leave_days': statuses.count('L'),
+            'off_days': statuses.count('O'),
+            'ot_hours': round(sum(value for _, value in ot_hours), 1),
+            'late_minutes': sum(value for _, value in late_minutes),
+        },
+    }
+
+
+def default_calendar_range(today):
+    """The year up to today: from the first day of the month 11 months back"""
+    return add_months(today.replace(day=1), -11), today
+
+
+def calendar_span_months(start_date, end_date) -> int:
+    return (end_date.year - start_date.year) * 12 + end_date.month - start_date.month + 1
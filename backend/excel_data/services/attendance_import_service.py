@@ -0,0 +1,295 @@
+"""
+Streaming attendance workbook imports
+
+import_attendance_workbook() reads an uploaded .xlsx with openpyxl in
+read-only mode, so rows are parsed from the file as they are iterated rather
+than loaded up front. Rows are validated and converted in chunks of
+IMPORT_CHUNK_SIZE and every chunk is written before the next one is read:
+
+* daily sheets (Employee ID, Employee Name, Date, Status, ...) go through
+  upsert_daily_attendance(), which also keeps the monthly summaries and
+  attendance bitmaps up to date in the same transaction;
+* monthly sheets (Employee ID, Name, Present Days, ...) create or update one
+  Attendance row per employee for the uploaded month.
+
+Memory use depends on the chunk size and the number of employees, not on
+the length of the file. Problems with single rows are collected as
+per-row errors/warnings and the rest of the file is still imported.
+"""
+
+from contextlib import contextmanager
+from datetime import date, datetime
+from itertools import islice
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from ..models import Attendance, EmployeeProfile
+from ..utils.utils import lightweight_to_datetime, safe_float_conversion, safe_int_conversion
+from .attendance_upsert_service import upsert_daily_attendance
+from .payroll_change_tracker import mark_employees_dirty
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Rows validated and written per transaction
+IMPORT_CHUNK_SIZE = getattr(settings, 'ATTENDANCE_IMPORT_CHUNK_SIZE', 2000)
+
+# Per-row errors and warnings returned to the client (the totals are always exact)
+MAX_REPORTED_ISSUES = 500
+
+DAILY_COLUMNS = ['Employee ID', 'Employee Name', 'Date', 'Status']
+MONTHLY_COLUMNS = ['Employee ID', 'Name', 'Department', 'Present Days', 'Absent Days', 'OT Hours', 'Late Minutes']
+
+VALID_STATUSES = ['PRESENT', 'ABSENT', 'HALF_DAY', 'PAID_LEAVE', 'OFF']
+
+# Attendance fields written from a monthly sheet
+MONTHLY_FIELDS = [
+    'name', 'department', 'total_working_days', 'present_days', 'absent_days', 'ot_hours', 'late_minutes',
+]
+
+
+class ImportReport:
+    """Counters and capped per-row issue lists for one import"""
+
+    def __init__(self):
+        self.rows_processed = 0
+        self.records_created = 0
+        self.records_updated = 0
+        self.total_errors = 0
+        self.total_warnings = 0
+        self.errors = []
+        self.warnings = []
+
+    def error(self, row_number, message, employee_id=None):
+        self.total_errors += 1
+        if len(self.errors) < MAX_REPORTED_ISSUES:
+            self.errors.append({'row': row_number, 'employee_id': employee_id, 'error': message})
+
+    def warning(self, row_number, message, employee_id=None):
+        self.total_warnings += 1
+        if len(self.warnings) < MAX_REPORTED_ISSUES:
+            self.warnings.append({'row': row_number, 'employee_id': employee_id, 'warning': message})
+
+
+@contextmanager
+def _open_sheet(file_obj):
+    """Yield (headers, lazy iterator of (row_number, {header: value})) for the active sheet"""
+    import openpyxl
+
+    try:
+        workbook = openpyxl.load_workbook(file_obj, read_only=True, data_only=True)
+    except Exception as e:
+        raise ValueError(f'Could not read the workbook: {str(e)}')
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header_row = next(rows, None) or ()
+        headers = [
+            str(value).strip() if value is not None else f'Column_{index}'
+            for index, value in enumerate(header_row)
+        ]
+        records = (
+            (row_number, dict(zip(headers, values)))
+            for row_number, values in enumerate(rows, start=2)
+            if values and any(value is not None for value in values)
+        )
+        yield headers, records
+    finally:
+        workbook.close()
+
+
+def _chunks(records, size):
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _text(value) -> str:
+    return '' if value is None else str(value).strip()
+
+
+def _parse_date(value):
+    """Date of a cell: date/datetime cells as they are, strings in the template's formats"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = _text(value)
+    try:
+        if '/' in text:
+            return datetime.strptime(text, '%m/%d/%Y').date()
+        if '-' in text:
+            return datetime.strptime(text, '%Y-%m-%d').date()
+    except ValueError:
+        pass
+    return lightweight_to_datetime(text) if text else None
+
+
+def _daily_rows(chunk, employees, report) -> list:
+    """Upsert rows for the valid lines of a daily-format chunk"""
+    rows = []
+    for row_number, record in chunk:
+        employee_id = _text(record.get('Employee ID'))
+        profile = employees.get(employee_id)
+        if profile is None:
+            report.error(row_number, f'Employee {employee_id} not found or inactive', employee_id)
+            continue
+
+        attendance_date = _parse_date(record.get('Date'))
+        if attendance_date is None:
+            report.error(row_number, f"Invalid date format for {_text(record.get('Date'))}", employee_id)
+            continue
+
+        attendance_status = _text(record.get('Status')).upper()
+        if attendance_status not in VALID_STATUSES:
+            report.warning(row_number, f'Invalid status "{attendance_status}". Using ABSENT.', employee_id)
+            attendance_status = 'ABSENT'
+
+        department, designation = profile
+        rows.append({
+            'employee_id': employee_id,
+            'date': attendance_date,
+            'employee_name': _text(record.get('Employee Name')),
+            'department': _text(record.get('Department')) or department or 'General',
+            'designation': _text(record.get('Designation')) or designation or 'Employee',
+            'employment_type': 'FULL_TIME',
+            'attendance_status': attendance_status,
+            'ot_hours': safe_float_conversion(record.get('OT Hours', 0)),
+            'late_minutes': safe_int_conversion(record.get('Late Minutes', 0)),
+        })
+    return rows
+
+
+def _write_daily_chunk(tenant, rows, report):
+    with transaction.atomic():
+        upserted = upsert_daily_attendance(tenant.id, rows)
+        # The upsert bypasses model signals, so record the payroll change explicitly
+        mark_employees_dirty(
+            tenant.id, {(row['employee_id'], row['date'].year, row['date'].month) for row in rows}, reason='attendance'
+        )
+    report.records_created += upserted['created']
+    report.records_updated += upserted['updated']
+
+
+def _write_monthly_chunk(tenant, chunk, employees, attendance_date, report):
+    """Create or update the month's Attendance row for each valid line of a monthly-format chunk"""
+    values = {}
+    for row_number, record in chunk:
+        employee_id = _text(record.get('Employee ID'))
+        if employee_id not in employees:
+            report.error(row_number, f'Employee {employee_id} not found or inactive', employee_id)
+            continue
+        present_days = safe_float_conversion(record.get('Present Days', 0))
+        absent_days = safe_float_conversion(record.get('Absent Days', 0))
+        # Later lines for the same employee win, as they did with row-by-row saves
+        values[employee_id] = {
+            'name': _text(record.get('Name')),
+            'department': _text(record.get('Department')),
+            'total_working_days': present_days + absent_days,
+            'present_days': present_days,
+            # Attendance.save() derives absent_days the same way; bulk writes skip save()
+            'absent_days': absent_days,
+            'ot_hours': safe_float_conversion(record.get('OT Hours', 0)),
+            'late_minutes': safe_int_conversion(record.get('Late Minutes', 0)),
+        }
+    if not values:
+        return
+
+    now = timezone.now()
+    with transaction.atomic():
+        existing = {
+            record.employee_id: record for record in Attendance.objects.select_for_update().filter(
+                tenant=tenant, date=attendance_date, employee_id__in=list(values)
+            )
+        }
+        to_update, to_create = [], []
+        for employee_id, fields in values.items():
+            record = existing.get(employee_id)
+            if record is None:
+                to_create.append(Attendance(
+                    tenant=tenant, employee_id=employee_id, date=attendance_date, calendar_days=30, **fields
+                ))
+                continue
+            for field, value in fields.items():
+                setattr(record, field, value)
+            # bulk_update() does not apply auto_now
+            record.updated_at = now
+            to_update.append(record)
+        Attendance.objects.bulk_update(to_update, MONTHLY_FIELDS + ['updated_at'])
+        Attendance.objects.bulk_create(to_create)
+        mark_employees_dirty(
+            tenant.id, [(employee_id, attendance_date.year, attendance_date.month) for employee_id in values],
+            reason='attendance',
+        )
+    report.records_created += len(to_create)
+    report.records_updated += len(to_update)
+
+
+def import_attendance_workbook(tenant, file_obj, year: int, month: int, chunk_size: int = None) -> dict:
+    """
+    Import a daily or monthly attendance workbook chunk by chunk. Raises
+    ValueError when the file can't be read or has neither column layout.
+    """
+    chunk_size = max(1, chunk_size or IMPORT_CHUNK_SIZE)
+    started = time.perf_counter()
+    report = ImportReport()
+    chunks = 0
+
+    with _open_sheet(file_obj) as (headers, records):
+        is_daily_format = all(column in headers for column in DAILY_COLUMNS)
+        is_monthly_format = all(column in headers for column in MONTHLY_COLUMNS)
+        if not is_daily_format and not is_monthly_format:
+            raise ValueError(
+                f'Invalid file format. Expected either daily attendance columns: {", ".join(DAILY_COLUMNS)} '
+                f'or monthly summary columns: {", ".join(MONTHLY_COLUMNS)}'
+            )
+
+        # Active employees with the defaults for missing department/designation cells
+        employees = {
+            employee_id: (department, designation)
+            for employee_id, department, designation in EmployeeProfile.objects.filter(
+                tenant=tenant, is_active=True
+            ).values_list('employee_id', 'department', 'designation')
+        }
+        attendance_date = date(int(year), int(month), 1)
+
+        for chunk in _chunks(records, chunk_size):
+            chunks += 1
+            report.rows_processed += len(chunk)
+            try:
+                if is_monthly_format:
+                    _write_monthly_chunk(tenant, chunk, employees, attendance_date, report)
+                else:
+                    rows = _daily_rows(chunk, employees, report)
+                    if rows:
+                        _write_daily_chunk(tenant, rows, report)
+            except Exception as e:
+                # The chunk was rolled back; earlier chunks stay imported
+                logger.error(f'Attendance import chunk {chunks} failed for tenant {tenant.id}: {str(e)}')
+                for row_number, record in chunk:
+                    report.error(row_number, f'Not saved: {str(e)}', _text(record.get('Employee ID')))
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        f'Imported {report.rows_processed} attendance rows for tenant {tenant.id} '
+        f'in {chunks} chunks ({elapsed:.2f}s)'
+    )
+    return {
+        'format': 'monthly' if is_monthly_format else 'daily',
+        'rows_processed': report.rows_processed,
+        'records_created': report.records_created,
+        'records_updated': report.records_updated,
+        'total_errors': report.total_errors,
+        'total_warnings': report.total_warnings,
+        'errors': report.errors,
+        'warnings': report.warnings,
+        'errors_truncated': report.total_errors > len(report.errors),
+        'performance': {
+            'duration_seconds': round(elapsed, 3),
+            'rows_per_second': round(report.rows_processed / elapsed, 1) if elapsed else None,
+            'chunks': chunks,
+            'chunk_size': chunk_size,
+        },
+    }
@@ -0,0 +1,373 @@
+"""
+Monthly range partitioning of DailyAttendance (PostgreSQL only, opt-in)
+
+excel_data_dailyattendance can be turned into a table partitioned by RANGE
+(date) with one partition per month (<table>_y2025m06) and a DEFAULT
+partition catching dates outside the created months. Queries that filter on
+date (month_range_filter, date=..., date__in) then only read the partitions
+of the months involved, so month-scoped scans don't grow with the history.
+
+convert_to_partitioned() migrates an existing table: it renames it to
+<table>_unpartitioned, recreates the table as a partitioned one with the same
+columns and the same constraint and index names (so later Django migrations
+still find them), copies the rows and leaves the old table in place until
+it is dropped by hand. The primary key becomes (id, date) because
+PostgreSQL requires the partition key in every unique constraint; the
+(tenant, employee_id, date) unique constraint the upserts rely on already
+contains it.
+
+ensure_month_partitions() pre-creates future months (rows that already
+landed in the DEFAULT partition for such a month are moved into it) and
+detach_partitions() detaches old months so they can be archived or dropped.
+Monthly summaries and attendance bitmaps are separate tables and keep those
+months: detach_partitions() records the cutoff as a CHECK (date >= cutoff)
+constraint, so new rows for detached months are rejected instead of landing
+in the DEFAULT partition, and summary and bitmap refreshes skip the months
+before detached_before(). check_partition_pruning() runs EXPLAIN on the query shapes the
+application uses and reports which partitions each one reads.
+
+Everything is driven by the partition_daily_attendance management command.
+"""
+
+from datetime import date
+from django.db import NotSupportedError, connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+from ..models import DailyAttendance
+from .calendar_service import add_months, month_range_filter
+import json
+import logging
+import re
+import zlib
+
+logger = logging.getLogger(__name__)
+
+TABLE = DailyAttendance._meta.db_table
+UNPARTITIONED_TABLE = f'{TABLE}_unpartitioned'
+DEFAULT_PARTITION = f'{TABLE}_default'
+# CHECK constraint holding the first date kept after detach_partitions()
+CUTOFF_CONSTRAINT = f'{TABLE}_detached_before'
+
+# PostgreSQL truncates identifiers longer than this
+MAX_IDENTIFIER_LENGTH = 63
+
+_BOUND_RE = re.compile(r"FROM \('(\d{4}-\d{2}-\d{2})'\) TO \('(\d{4}-\d{2}-\d{2})'\)")
+
+
+def _require_postgres():
+    if connection.vendor != 'postgresql':
+        raise NotSupportedError('DailyAttendance partitioning requires PostgreSQL')
+
+
+def _quote(name) -> str:
+    return connection.ops.quote_name(name)
+
+
+def partition_name(month_start: date) -> str:
+    return f'{TABLE}_y{month_start.year}m{month_start.month:02d}'
+
+
+def _renamed(name: str, suffix: str) -> str:
+    """``name`` + ``suffix``, shortened with a hash when it would exceed the identifier limit"""
+    if len(name) + len(suffix) <= MAX_IDENTIFIER_LENGTH:
+        return name + suffix
+    digest = f"_{zlib.crc32(name.encode('utf-8')):08x}"
+    return name[:MAX_IDENTIFIER_LENGTH - len(suffix) - len(digest)] + digest + suffix
+
+
+def is_partitioned(cursor) -> bool:
+    cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)', [TABLE])
+    row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def list_partitions(cursor) -> list:
+    """
+    Partitions of the table ordered by month, as dicts with name, start, end
+    (None for the DEFAULT partition) and the planner's row estimate
+    """
+    cursor.execute(
+        """
+        SELECT child.relname, pg_get_expr(child.relpartbound, child.oid), child.reltuples
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = to_regclass(%s)
+        """,
+        [TABLE],
+    )
+    partitions = []
+    for name, bound, estimated_rows in cursor.fetchall():
+        match = _BOUND_RE.search(bound or '')
+        partitions.append({
+            'name': name,
+            'start': date.fromisoformat(match.group(1)) if match else None,
+            'end': date.fromisoformat(match.group(2)) if match else None,
+            'estimated_rows': max(int(estimated_rows), 0),
+        })
+    return sorted(partitions, key=lambda partition: (partition['start'] is None, partition['start'] or date.min))
+
+
+def _create_month_partition(cursor, month_start: date) -> None:
+    """Create one month's partition, moving any rows the DEFAULT partition holds for it"""
+    month_end = add_months(month_start, 1)
+    name = partition_name(month_start)
+    # DDL takes no bind parameters; the bounds are dates we computed
+    bounds = f"FOR VALUES FROM ('{month_start.isoformat()}') TO ('{month_end.isoformat()}')"
+    cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [DEFAULT_PARTITION])
+    has_default = cursor.fetchone()[0]
+    stranded = 0
+    if has_default:
+        cursor.execute(
+            f'SELECT COUNT(*) FROM {_quote(DEFAULT_PARTITION)} WHERE date >= %s AND date < %s',
+            [month_start, month_end],
+        )
+        stranded = cursor.fetchone()[0]
+
+    if not stranded:
+        cursor.execute(f'CREATE TABLE {_quote(name)} PARTITION OF {_quote(TABLE)} {bounds}')
+        return
+
+    # Attaching a range the DEFAULT partition has rows for fails, so move them out first
+    cursor.execute(f'CREATE TABLE {_quote(name)} (LIKE {_quote(TABLE)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    cursor.execute(
+        f"""
+        WITH moved AS (
+            DELETE FROM {_quote(DEFAULT_PARTITION)} WHERE date >= %s AND date < %s RETURNING *
+        )
+        INSERT INTO {_quote(name)} SELECT * FROM moved
+        """,
+        [month_start, month_end],
+    )
+    cursor.execute(f'ALTER TABLE {_quote(TABLE)} ATTACH PARTITION {_quote(name)} {bounds}')
+    logger.info(f'Moved {stranded} rows from {DEFAULT_PARTITION} into new partition {name}')
+
+
+def ensure_month_partitions(first_month: date, last_month: date, dry_run: bool = False) -> list:
+    """Create the missing monthly partitions from first_month to last_month; returns their names"""
+    _require_postgres()
+    month = first_month.replace(day=1)
+    wanted = []
+    while month <= last_month:
+        wanted.append(month)
+        month = add_months(month, 1)
+
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            raise NotSupportedError(f'{TABLE} is not partitioned yet; convert it first')
+        existing = {partition['name'] for partition in list_partitions(cursor)}
+        for month_start in wanted:
+            name = partition_name(month_start)
+            if name in existing:
+                continue
+            if not dry_run:
+                _create_month_partition(cursor, month_start)
+            created.append(name)
+    return created
+
+
+def _table_definition(cursor, table: str) -> tuple:
+    """(constraints, indexes) of a table: [(name, type, definition)] and [(name, CREATE INDEX statement)]"""
+    cursor.execute(
+        """
+        SELECT conname, contype, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'u', 'f')
+        ORDER BY contype DESC, conname
+        """,
+        [table],
+    )
+    constraints = cursor.fetchall()
+    cursor.execute(
+        """
+        SELECT index_class.relname, pg_get_indexdef(pg_index.indexrelid)
+        FROM pg_index
+        JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid
+        WHERE pg_index.indrelid = to_regclass(%s)
+            AND NOT EXISTS (SELECT 1 FROM pg_constraint WHERE pg_constraint.conindid = pg_index.indexrelid)
+        ORDER BY index_class.relname
+        """,
+        [table],
+    )
+    indexes = cursor.fetchall()
+    return constraints, indexes
+
+
+def convert_to_partitioned(months_ahead: int = 3) -> dict:
+    """
+    Rebuild the table as a monthly partitioned table holding the same rows.
+
+    Runs in one transaction holding an ACCESS EXCLUSIVE lock on the table, so
+    attendance reads and writes wait until it finishes; run it in a
+    maintenance window. Returns {'rows': n, 'partitions': [names]}.
+    """
+    _require_postgres()
+    suffix = '_unpartitioned'
+    with transaction.atomic(), connection.cursor() as cursor:
+        if is_partitioned(cursor):
+            raise NotSupportedError(f'{TABLE} is already partitioned')
+        cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [UNPARTITIONED_TABLE])
+        if cursor.fetchone()[0]:
+            raise NotSupportedError(f'{UNPARTITIONED_TABLE} exists from an earlier conversion; drop it first')
+
+        cursor.execute(f'LOCK TABLE {_quote(TABLE)} IN ACCESS EXCLUSIVE MODE')
+        constraints, indexes = _table_definition(cursor, TABLE)
+        for name, contype, definition in constraints:
+            if contype == 'u' and not re.search(r'\bdate\b', definition):
+                raise NotSupportedError(f'Unique constraint {name} does not include date and cannot be partitioned')
+
+        # Free the table, constraint and index names for the partitioned table
+        cursor.execute(f'ALTER TABLE {_quote(TABLE)} RENAME TO {_quote(UNPARTITIONED_TABLE)}')
+        for name, contype, _ in constraints:
+            cursor.execute(
+                f'ALTER TABLE {_quote(UNPARTITIONED_TABLE)} RENAME CONSTRAINT {_quote(name)} '
+                f'TO {_quote(_renamed(name, suffix))}'
+            )
+        for name, _ in indexes:
+            cursor.execute(f'ALTER INDEX {_quote(name)} RENAME TO {_quote(_renamed(name, suffix))}')
+
+        cursor.execute(
+            f'CREATE TABLE {_quote(TABLE)} (LIKE {_quote(UNPARTITIONED_TABLE)} '
+            f'INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING IDENTITY) PARTITION BY RANGE (date)'
+        )
+        # A serial id keeps using the old sequence; move its ownership so dropping the old table keeps it
+        cursor.execute(
+            'SELECT pg_get_serial_sequence(%s, %s), pg_get_serial_sequence(%s, %s)',
+            [TABLE, 'id', UNPARTITIONED_TABLE, 'id'],
+        )
+        sequence, old_sequence = cursor.fetchone()
+        if not sequence and old_sequence:
+            cursor.execute(f'ALTER SEQUENCE {old_sequence} OWNED BY {_quote(TABLE)}.id')
+
+        cursor.execute(f'SELECT MIN(date), MAX(id) FROM {_quote(UNPARTITIONED_TABLE)}')
+        first_day, max_id = cursor.fetchone()
+        this_month = timezone.localdate().replace(day=1)
+        month = min(first_day.replace(day=1), this_month) if first_day else this_month
+        last_month = add_months(this_month, months_ahead)
+        partitions = []
+        while month <= last_month:
+            _create_month_partition(cursor, month)
+            partitions.append(partition_name(month))
+            month = add_months(month, 1)
+        cursor.execute(f'CREATE TABLE {_quote(DEFAULT_PARTITION)} PARTITION OF {_quote(TABLE)} DEFAULT')
+        partitions.append(DEFAULT_PARTITION)
+
+        cursor.execute(f'INSERT INTO {_quote(TABLE)} SELECT * FROM {_quote(UNPARTITIONED_TABLE)}')
+        rows = cursor.rowcount
+        if sequence and max_id:
+            cursor.execute('SELECT setval(%s, %s)', [sequence, max_id])
+
+        # Constraints and indexes are built after the copy, once per partition
+        for name, contype, definition in constraints:
+            if contype == 'p' and not re.search(r'\bdate\b', definition):
+                definition = re.sub(r'\)$', ', date)', definition)
+            cursor.execute(f'ALTER TABLE {_quote(TABLE)} ADD CONSTRAINT {_quote(name)} {definition}')
+        for _, statement in indexes:
+            cursor.execute(statement)
+        cursor.execute(f'ANALYZE {_quote(TABLE)}')
+
+    logger.info(f'Partitioned {TABLE}: {rows} rows in {len(partitions)} partitions')
+    return {'rows': rows, 'partitions': partitions}
+
+
+def detach_partitions(before: date, archive_schema: str = None, drop: bool = False, dry_run: bool = False) -> list:
+    """
+    Detach the monthly partitions that end on or before ``before``. Detached
+    partitions stay as standalone tables (moved to ``archive_schema`` when
+    given) unless ``drop`` is set. Returns their names.
+    """
+    _require_postgres()
+    with transaction.atomic(), connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            raise NotSupportedError(f'{TABLE} is not partitioned')
+        old = [
+            partition for partition in list_partitions(cursor)
+            if partition['end'] is not None and partition['end'] <= before
+        ]
+        if dry_run:
+            return [partition['name'] for partition in old]
+        if archive_schema and not drop:
+            cursor.execute(f'CREATE SCHEMA IF NOT EXISTS {_quote(archive_schema)}')
+        for partition in old:
+            name = partition['name']
+            cursor.execute(f'ALTER TABLE {_quote(TABLE)} DETACH PARTITION {_quote(name)}')
+            if drop:
+                cursor.execute(f'DROP TABLE {_quote(name)}')
+            elif archive_schema:
+                cursor.execute(f'ALTER TABLE {_quote(name)} SET SCHEMA {_quote(archive_schema)}')
+
+        if old:
+            cutoff = max(partition['end'] for partition in old)
+            previous = detached_before()
+            if previous is None or cutoff > previous:
+                # NOT VALID: the remaining partitions are within their bounds
+                # already, so the rows don't need to be scanned under this lock
+                cursor.execute(f'ALTER TABLE {_quote(TABLE)} DROP CONSTRAINT IF EXISTS {_quote(CUTOFF_CONSTRAINT)}')
+                cursor.execute(
+                    f"ALTER TABLE {_quote(TABLE)} ADD CONSTRAINT {_quote(CUTOFF_CONSTRAINT)} "
+                    f"CHECK (date >= '{cutoff.isoformat()}') NOT VALID"
+                )
+    return [partition['name'] for partition in old]
+
+
+def detached_before():
+    """
+    First day still stored in DailyAttendance after old partitions were
+    detached, or None when nothing was detached (or not on PostgreSQL)
+    """
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = to_regclass(%s) AND conname = %s',
+            [TABLE, CUTOFF_CONSTRAINT],
+        )
+        row = cursor.fetchone()
+    match = re.search(r"'(\d{4}-\d{2}-\d{2})'", row[0]) if row else None
+    return date.fromisoformat(match.group(1)) if match else None
+
+
+def _scanned_relations(plan) -> set:
+    relations = set()
+    if 'Relation Name' in plan:
+        relations.add(plan['Relation Name'])
+    for child in plan.get('Plans', []):
+        relations |= _scanned_relations(child)
+    return relations
+
+
+def check_partition_pruning(tenant_id, year: int, month: int) -> list:
+    """
+    EXPLAIN the month- and day-scoped DailyAttendance queries the application
+    runs and return [(label, partitions read, pruned)] for them, where pruned
+    means only the partitions of that month were planned
+    """
+    _require_postgres()
+    month_start = date(year, month, 1)
+    day = month_start.replace(day=min(15, (add_months(month_start, 1) - month_start).days))
+    with connection.cursor() as cursor:
+        partitions = list_partitions(cursor)
+    expected = {
+        partition['name'] for partition in partitions
+        if partition['start'] is not None and partition['start'] <= month_start < partition['end']
+    } or {DEFAULT_PARTITION}
+    partition_names = {partition['name'] for partition in partitions}
+
+    rows = DailyAttendance.all_objects.filter(tenant_id=tenant_id)
+    queries = [
+        # Monthly summaries, attendance bitmaps and payroll daily totals
+        ('month aggregate', rows.filter(**month_range_filter(year, month)).values('employee_id').order_by().annotate(
+            days=Count('id'))),
+        # Eligible employees for a date
+        ('single date', rows.filter(date=day).values('employee_id', 'attendance_status')),
+        # Bulk upsert reading the rows it is about to overwrite
+        ('date list', rows.filter(date__in=[month_start, day]).values('employee_id', 'date')),
+    ]
+    results = []
+    for label, queryset in queries:
+        plan = json.loads(queryset.explain(format='json'))
+        if isinstance(plan, list):
+            plan = plan[0]
+        scanned = _scanned_relations(plan['Plan']) & partition_names
+        results.append((label, sorted(scanned), scanned <= expected))
+    return results
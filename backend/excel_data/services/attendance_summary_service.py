@@ -0,0 +1,331 @@
+"""
+Monthly attendance summary maintenance
+
+MonthlyAttendanceSummary holds one row per (tenant, employee, year, month)
+aggregated from DailyAttendance. Writers don't update it row by row: they
+schedule the touched (employee_id, year, month) keys with
+schedule_summary_refresh() and the keys collected during a transaction are
+refreshed together when it commits, with one grouped aggregate and one bulk
+upsert per month.
+
+Whole-month rebuilds run as background jobs through rebuild_month_summaries().
+A deferred refresh that fails is retried once straight away and, if it fails
+again, queues such a job for its keys.
+
+The bulk attendance upsert keeps summaries exact without re-aggregating: it
+locks the affected summaries with lock_monthly_summaries(), then adds the
+difference between the old and new day values with apply_summary_deltas().
+Every writer locks the summary rows before computing anything, so a delta
+and a re-aggregation of the same employee-month can't overwrite each other.
+
+Each refresh also re-encodes the employee-months' attendance bitmaps
+(attendance_bitmap_service) under the same locks.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from ..models import DailyAttendance, MonthlyAttendanceSummary
+from .attendance_bitmap_service import refresh_bitmap_chunk
+from .attendance_partition_service import detached_before
+from .calendar_service import month_range_filter
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Employees per aggregate/upsert statement
+SUMMARY_CHUNK_SIZE = 500
+
+# Day statuses counted in present_days, with their weight
+PRESENT_DAY_WEIGHTS = {
+    'PRESENT': Decimal('1'),
+    'PAID_LEAVE': Decimal('1'),
+    'HALF_DAY': Decimal('0.5'),
+}
+
+DELTA_UPDATE_SQL = """
+    WITH deltas (employee_id, year, month, present_days, ot_hours, late_minutes) AS (
+        VALUES {values}
+    )
+    UPDATE excel_data_monthlyattendancesummary
+    SET present_days = excel_data_monthlyattendancesummary.present_days + deltas.present_days,
+        ot_hours = excel_data_monthlyattendancesummary.ot_hours + deltas.ot_hours,
+        late_minutes = excel_data_monthlyattendancesummary.late_minutes + deltas.late_minutes,
+        last_updated = %s,
+        updated_at = %s
+    FROM deltas
+    WHERE excel_data_monthlyattendancesummary.tenant_id = %s
+        AND excel_data_monthlyattendancesummary.employee_id = deltas.employee_id
+        AND excel_data_monthlyattendancesummary.year = deltas.year
+        AND excel_data_monthlyattendancesummary.month = deltas.month
+"""
+
+_state = threading.local()
+
+
+def _pending() -> dict:
+    """tenant_id -> set of (employee_id, year, month) waiting for a refresh in this thread"""
+    if not hasattr(_state, 'pending'):
+        _state.pending = defaultdict(set)
+    return _state.pending
+
+
+def _refresh_month_chunk(tenant_id, year, month, employee_ids, now) -> int:
+    """
+    Aggregate and upsert one month's summaries (and re-encode the bitmaps) for
+    a chunk of employees; returns how many of them have attendance that month
+    """
+    with transaction.atomic():
+        # Wait for delta writers of these summaries before aggregating
+        list(
+            MonthlyAttendanceSummary.all_objects.select_for_update().filter(
+                tenant_id=tenant_id, year=year, month=month, employee_id__in=employee_ids
+            ).order_by('employee_id').values_list('id', flat=True)
+        )
+        totals = DailyAttendance.all_objects.filter(
+            tenant_id=tenant_id,
+            employee_id__in=employee_ids,
+            **month_range_filter(year, month),
+        ).values('employee_id').order_by().annotate(
+            # PRESENT and PAID_LEAVE count as 1, HALF_DAY as 0.5
+            present_full=Count('id', filter=Q(attendance_status__in=['PRESENT', 'PAID_LEAVE'])),
+            half_days=Count('id', filter=Q(attendance_status='HALF_DAY')),
+            ot_sum=Sum('ot_hours'),
+            late_sum=Sum('late_minutes'),
+        )
+        summaries = [
+            MonthlyAttendanceSummary(
+                tenant_id=tenant_id,
+                employee_id=row['employee_id'],
+                year=year,
+                month=month,
+                present_days=Decimal(row['present_full']) + Decimal(row['half_days']) * Decimal('0.5'),
+                ot_hours=row['ot_sum'] or Decimal('0'),
+                late_minutes=row['late_sum'] or 0,
+            )
+            for row in totals
+        ]
+        MonthlyAttendanceSummary.all_objects.bulk_create(
+            summaries,
+            update_conflicts=True,
+            unique_fields=['tenant', 'employee_id', 'year', 'month'],
+            update_fields=['present_days', 'ot_hours', 'late_minutes', 'last_updated', 'updated_at'],
+        )
+        without_attendance = set(employee_ids) - {summary.employee_id for summary in summaries}
+        if without_attendance:
+            MonthlyAttendanceSummary.all_objects.filter(
+                tenant_id=tenant_id, year=year, month=month, employee_id__in=without_attendance
+            ).update(present_days=0, ot_hours=0, late_minutes=0, last_updated=now, updated_at=now)
+        refresh_bitmap_chunk(tenant_id, year, month, employee_ids)
+    return len(summaries)
+
+
+def _keys_by_month(keys) -> dict:
+    """(year, month) -> sorted employee ids of the given (employee_id, year, month) keys"""
+    by_month = defaultdict(set)
+    for employee_id, year, month in keys:
+        if employee_id:
+            by_month[(year, month)].add(employee_id)
+    return {year_month: sorted(employee_ids) for year_month, employee_ids in sorted(by_month.items())}
+
+
+def summary_contribution(attendance_status, ot_hours, late_minutes) -> tuple:
+    """(present_days, ot_hours, late_minutes) one DailyAttendance row adds to its monthly summary"""
+    return (
+        PRESENT_DAY_WEIGHTS.get(attendance_status, Decimal('0')),
+        Decimal(str(ot_hours or 0)),
+        int(late_minutes or 0),
+    )
+
+
+def lock_monthly_summaries(tenant_id, keys) -> set:
+    """
+    Lock the summaries of the given (employee_id, year, month) keys, creating
+    empty rows for keys without one so there is something to lock, and return
+    the keys whose summary already existed. Must be called inside a transaction.
+    """
+    existing = set()
+    missing = []
+    for (year, month), employee_ids in _keys_by_month(keys).items():
+        for start in range(0, len(employee_ids), SUMMARY_CHUNK_SIZE):
+            chunk = employee_ids[start:start + SUMMARY_CHUNK_SIZE]
+            stored = set(
+                MonthlyAttendanceSummary.all_objects.filter(
+                    tenant_id=tenant_id, year=year, month=month, employee_id__in=chunk
+                ).values_list('employee_id', flat=True)
+            )
+            existing.update((employee_id, year, month) for employee_id in stored)
+            missing.extend(
+                MonthlyAttendanceSummary(tenant_id=tenant_id, employee_id=employee_id, year=year, month=month)
+                for employee_id in chunk if employee_id not in stored
+            )
+    if missing:
+        MonthlyAttendanceSummary.all_objects.bulk_create(missing, ignore_conflicts=True, batch_size=SUMMARY_CHUNK_SIZE)
+
+    for (year, month), employee_ids in _keys_by_month(keys).items():
+        for start in range(0, len(employee_ids), SUMMARY_CHUNK_SIZE):
+            list(
+                MonthlyAttendanceSummary.all_objects.select_for_update().filter(
+                    tenant_id=tenant_id, year=year, month=month,
+                    employee_id__in=employee_ids[start:start + SUMMARY_CHUNK_SIZE],
+                ).order_by('employee_id').values_list('id', flat=True)
+            )
+    return existing
+
+
+def apply_summary_deltas(tenant_id, deltas: dict) -> int:
+    """
+    Add {(employee_id, year, month): (present_days, ot_hours, late_minutes)}
+    to the existing summaries with one UPDATE ... FROM (VALUES ...) per chunk.
+    Call with the summaries locked (lock_monthly_summaries) in the transaction
+    that changed the attendance. Returns the number of summaries changed.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return 0
+
+    now = timezone.now()
+    keys = sorted(deltas)
+    with connection.cursor() as cursor:
+        for start in range(0, len(keys), SUMMARY_CHUNK_SIZE):
+            chunk = keys[start:start + SUMMARY_CHUNK_SIZE]
+            values = ', '.join(
+                ['(%s, %s, %s, CAST(%s AS DECIMAL(5, 1)), CAST(%s AS DECIMAL(10, 2)), %s)'] * len(chunk)
+            )
+            params = []
+            for employee_id, year, month in chunk:
+                present_days, ot_hours, late_minutes = deltas[(employee_id, year, month)]
+                params.extend([employee_id, year, month, present_days, ot_hours, late_minutes])
+            params.extend([now, now, tenant_id])
+            cursor.execute(DELTA_UPDATE_SQL.format(values=values), params)
+    return len(keys)
+
+
+def _is_detached(year, month, cutoff) -> bool:
+    """
+    True for months before the detach cutoff (see attendance_partition_service):
+    their DailyAttendance rows are gone, so a refresh would wipe the summary
+    and bitmap that still hold them
+    """
+    if cutoff is not None and (year, month) < (cutoff.year, cutoff.month):
+        logger.info(f"Skipping attendance refresh of {year}-{month:02d}: its partition was detached")
+        return True
+    return False
+
+
+def refresh_monthly_summaries(tenant_id, keys) -> int:
+    """
+    Recompute the summaries of the given (employee_id, year, month) keys from
+    DailyAttendance. Keys without any attendance left only zero an existing
+    summary; no new rows are created for them. Months whose attendance
+    partition was detached are left alone.
+    """
+    now = timezone.now()
+    written = 0
+    cutoff = detached_before()
+    for (year, month), employee_ids in _keys_by_month(keys).items():
+        if _is_detached(year, month, cutoff):
+            continue
+        for start in range(0, len(employee_ids), SUMMARY_CHUNK_SIZE):
+            chunk = employee_ids[start:start + SUMMARY_CHUNK_SIZE]
+            _refresh_month_chunk(tenant_id, year, month, chunk, now)
+            written += len(chunk)
+    return written
+
+
+def rebuild_month_summaries(tenant_id, year: int, month: int, employee_ids=None, progress_callback=None) -> dict:
+    """
+    Recompute one month's summaries for ``employee_ids``, or for every employee
+    with attendance or an existing summary in that month when None. A month
+    whose attendance partition was detached is skipped.
+
+    progress_callback(done, total) is called after each chunk of employees.
+    """
+    if _is_detached(year, month, detached_before()):
+        return {
+            'year': year,
+            'month': month,
+            'employees_processed': 0,
+            'employees_with_attendance': 0,
+            'skipped': 'attendance partition detached',
+        }
+    if employee_ids is None:
+        employee_ids = set(
+            DailyAttendance.all_objects.filter(
+                tenant_id=tenant_id, **month_range_filter(year, month)
+            ).values_list('employee_id', flat=True).distinct()
+        )
+        employee_ids.update(
+            MonthlyAttendanceSummary.all_objects.filter(
+                tenant_id=tenant_id, year=year, month=month
+            ).values_list('employee_id', flat=True)
+        )
+    employee_ids = sorted({employee_id for employee_id in employee_ids if employee_id})
+
+    now = timezone.now()
+    total = len(employee_ids)
+    with_attendance = 0
+    for start in range(0, total, SUMMARY_CHUNK_SIZE):
+        chunk = employee_ids[start:start + SUMMARY_CHUNK_SIZE]
+        with_attendance += _refresh_month_chunk(tenant_id, year, month, chunk, now)
+        if progress_callback:
+            progress_callback(start + len(chunk), total)
+
+    return {
+        'year': year,
+        'month': month,
+        'employees_processed': total,
+        'employees_with_attendance': with_attendance,
+    }
+
+
+def flush_pending_summaries():
+    """Refresh every key scheduled in this thread so far"""
+    pending = _pending()
+    if not pending:
+        return
+    _state.pending = defaultdict(set)
+    for tenant_id, keys in pending.items():
+        try:
+            refresh_monthly_summaries(tenant_id, keys)
+        except Exception as exc:
+            # Soft-fail – attendance writes have already committed. A second
+            # try gets past transient errors (lock timeouts, dropped
+            # connections); after that the keys go to a background rebuild
+            # instead of being dropped
+            logger.warning(f"Retrying MonthlyAttendanceSummary update for tenant {tenant_id}: {exc}")
+            try:
+                refresh_monthly_summaries(tenant_id, keys)
+            except Exception as exc:
+                logger.error(f"Failed to update MonthlyAttendanceSummary for tenant {tenant_id}: {exc}")
+                _enqueue_failed_refresh(tenant_id, keys)
+
+
+def _enqueue_failed_refresh(tenant_id, keys):
+    """Queue one summary_rebuild job per month for keys whose refresh failed"""
+    from ..models import Tenant
+    from .job_service import enqueue_summary_rebuild
+    try:
+        tenant = Tenant.objects.get(pk=tenant_id)
+        for (year, month), employee_ids in _keys_by_month(keys).items():
+            job, _ = enqueue_summary_rebuild(tenant, year, month, employee_ids)
+            logger.warning(
+                f"Queued MonthlyAttendanceSummary rebuild job {job.id} for tenant {tenant_id} "
+                f"{year}-{month:02d} ({len(employee_ids)} employees)"
+            )
+    except Exception as exc:
+        logger.error(f"Failed to queue MonthlyAttendanceSummary rebuild for tenant {tenant_id}: {exc}")
+
+
+def schedule_summary_refresh(tenant_id, keys):
+    """
+    Queue (employee_id, year, month) keys for a summary refresh when the
+    current transaction commits (immediately in autocommit mode)
+    """
+    _pending()[tenant_id].update(keys)
+    # One hook per call keeps keys from a rolled-back transaction from
+    # waiting forever; hooks after the first find nothing left to flush
+    transaction.on_commit(flush_pending_summaries)
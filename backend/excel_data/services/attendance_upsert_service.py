@@ -0,0 +1,212 @@
+"""
+Daily attendance upserts
+
+Bulk attendance marking writes one DailyAttendance row per (employee, date),
+creating it or overwriting the existing one. upsert_daily_attendance() sends
+the rows in chunks as INSERT ... ON CONFLICT (tenant_id, employee_id, date)
+DO UPDATE statements with bound parameters, so statement size is bounded, the
+plan doesn't grow with the batch and no value is ever spliced into the SQL.
+On other databases (SQLite in development) the same upsert goes through
+bulk_create(update_conflicts=True).
+
+The upsert skips model signals, so callers record payroll changes themselves.
+Monthly summaries are kept exact in the same transaction: the affected
+summaries are locked, the stored values of the days being overwritten are
+read, and the difference between old and new values is added to each
+summary (summaries that didn't exist yet are aggregated once instead). The
+days written are patched into the employees' attendance bitmaps as well.
+"""
+
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from ..models import DailyAttendance
+from .attendance_bitmap_service import apply_attendance_days
+from .attendance_summary_service import (
+    apply_summary_deltas, lock_monthly_summaries, refresh_monthly_summaries, summary_contribution,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT statement
+UPSERT_CHUNK_SIZE = getattr(settings, 'ATTENDANCE_UPSERT_CHUNK_SIZE', 1000)
+
+# PostgreSQL accepts at most 65535 bind parameters per statement
+MAX_BIND_PARAMS = 65535
+
+INSERT_COLUMNS = [
+    'tenant_id', 'employee_id', 'date', 'employee_name', 'department', 'designation',
+    'employment_type', 'attendance_status', 'ot_hours', 'late_minutes', 'created_at', 'updated_at',
+]
+
+# Columns overwritten when the employee already has a row for the date
+UPDATE_COLUMNS = ['employee_name', 'department', 'attendance_status', 'ot_hours', 'late_minutes', 'updated_at']
+
+# created_at is not overwritten on conflict, so only inserted rows carry this
+# statement's timestamp (xmax = 0 can't be read from a partitioned table)
+UPSERT_SQL = """
+    INSERT INTO excel_data_dailyattendance ({columns})
+    VALUES {values}
+    ON CONFLICT (tenant_id, employee_id, date) DO UPDATE SET {updates}
+    RETURNING (created_at = %s) AS inserted
+"""
+
+
+def _deduplicate(rows) -> list:
+    """One row per (employee_id, date), the last one winning as it would with sequential writes"""
+    unique = {}
+    for row in rows:
+        unique[(row['employee_id'], row['date'])] = row
+    return list(unique.values())
+
+
+def _ot_hours(row) -> Decimal:
+    """OT hours at the column's precision, as the database will store them"""
+    return Decimal(str(row.get('ot_hours') or 0)).quantize(Decimal('0.1'), rounding=ROUND_HALF_UP)
+
+
+def _row_params(tenant_id, row, now) -> list:
+    return [
+        tenant_id,
+        row['employee_id'],
+        row['date'],
+        row['employee_name'],
+        row['department'],
+        row['designation'],
+        row['employment_type'],
+        row['attendance_status'],
+        _ot_hours(row),
+        int(row.get('late_minutes') or 0),
+        now,
+        now,
+    ]
+
+
+def _upsert_postgres(tenant_id, rows, chunk_size, now) -> int:
+    """Parameterised INSERT ... ON CONFLICT per chunk; returns the number of rows inserted"""
+    placeholders = '(' + ', '.join(['%s'] * len(INSERT_COLUMNS)) + ')'
+    updates = ', '.join(f'{column} = EXCLUDED.{column}' for column in UPDATE_COLUMNS)
+    inserted = 0
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            params = []
+            for row in chunk:
+                params.extend(_row_params(tenant_id, row, now))
+            params.append(now)
+            cursor.execute(
+                UPSERT_SQL.format(
+                    columns=', '.join(INSERT_COLUMNS),
+                    values=', '.join([placeholders] * len(chunk)),
+                    updates=updates,
+                ),
+                params,
+            )
+            inserted += sum(1 for (was_inserted,) in cursor.fetchall() if was_inserted)
+    return inserted
+
+
+def _upsert_orm(tenant_id, rows, chunk_size, now) -> int:
+    """Fallback through bulk_create(update_conflicts=True); returns the number of rows inserted"""
+    inserted = 0
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        existing = set(
+            DailyAttendance.all_objects.filter(
+                tenant_id=tenant_id,
+                employee_id__in={row['employee_id'] for row in chunk},
+                date__in={row['date'] for row in chunk},
+            ).values_list('employee_id', 'date')
+        )
+        inserted += sum(1 for row in chunk if (row['employee_id'], row['date']) not in existing)
+        objects = []
+        for row in chunk:
+            values = dict(zip(INSERT_COLUMNS, _row_params(tenant_id, row, now)))
+            objects.append(DailyAttendance(**values))
+        DailyAttendance.all_objects.bulk_create(
+            objects,
+            update_conflicts=True,
+            unique_fields=['tenant', 'employee_id', 'date'],
+            update_fields=UPDATE_COLUMNS,
+        )
+    return inserted
+
+
+def _stored_contributions(tenant_id, rows, chunk_size) -> dict:
+    """(employee_id, date) -> summary contribution of the rows about to be overwritten"""
+    stored = {}
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        wanted = {(row['employee_id'], row['date']) for row in chunk}
+        existing = DailyAttendance.all_objects.filter(
+            tenant_id=tenant_id,
+            employee_id__in={employee_id for employee_id, _ in wanted},
+            date__in={day for _, day in wanted},
+        ).values_list('employee_id', 'date', 'attendance_status', 'ot_hours', 'late_minutes')
+        for employee_id, day, attendance_status, ot_hours, late_minutes in existing:
+            if (employee_id, day) in wanted:
+                stored[(employee_id, day)] = summary_contribution(attendance_status, ot_hours, late_minutes)
+    return stored
+
+
+def _summary_deltas(rows, stored) -> dict:
+    """(employee_id, year, month) -> change in (present_days, ot_hours, late_minutes)"""
+    deltas = defaultdict(lambda: [Decimal('0'), Decimal('0'), 0])
+    no_row = (Decimal('0'), Decimal('0'), 0)
+    for row in rows:
+        new = summary_contribution(row['attendance_status'], _ot_hours(row), row.get('late_minutes'))
+        old = stored.get((row['employee_id'], row['date']), no_row)
+        delta = deltas[(row['employee_id'], row['date'].year, row['date'].month)]
+        for position in range(3):
+            delta[position] += new[position] - old[position]
+    return {key: tuple(delta) for key, delta in deltas.items()}
+
+
+def upsert_daily_attendance(tenant_id, rows, chunk_size: int = None) -> dict:
+    """
+    Create or overwrite DailyAttendance rows and bring the affected monthly
+    summaries and attendance bitmaps up to date in the same transaction.
+
+    ``rows`` are dicts with employee_id, date, employee_name, department,
+    designation, employment_type, attendance_status, ot_hours and
+    late_minutes. Existing rows keep their designation, employment type and
+    check-in/out times. Returns {'created': n, 'updated': n,
+    'summaries_updated': n, 'summaries_created': n}.
+    """
+    rows = _deduplicate(rows)
+    result = {'created': 0, 'updated': 0, 'summaries_updated': 0, 'summaries_created': 0}
+    if not rows:
+        return result
+
+    chunk_size = max(1, min(chunk_size or UPSERT_CHUNK_SIZE, MAX_BIND_PARAMS // len(INSERT_COLUMNS)))
+    now = timezone.now()
+    with transaction.atomic():
+        keys = {(row['employee_id'], row['date'].year, row['date'].month) for row in rows}
+        # Lock before reading the old values so concurrent writers can't interleave
+        existing_summaries = lock_monthly_summaries(tenant_id, keys)
+        stored = _stored_contributions(tenant_id, rows, chunk_size)
+
+        if connection.vendor == 'postgresql':
+            created = _upsert_postgres(tenant_id, rows, chunk_size, now)
+        else:
+            created = _upsert_orm(tenant_id, rows, chunk_size, now)
+        result['created'] = created
+        result['updated'] = len(rows) - created
+
+        deltas = _summary_deltas(rows, stored)
+        result['summaries_updated'] = apply_summary_deltas(
+            tenant_id, {key: delta for key, delta in deltas.items() if key in existing_summaries}
+        )
+        # New summaries start from every day already stored for the month, not just this batch
+        result['summaries_created'] = refresh_monthly_summaries(tenant_id, keys - existing_summaries)
+        # The refresh re-encoded those months' bitmaps; patch the rest
+        apply_attendance_days(tenant_id, [
+            row for row in rows
+            if (row['employee_id'], row['date'].year, row['date'].month) in existing_summaries
+        ])
+
+    logger.info(f"Upserted {len(rows)} attendance rows for tenant {tenant_id} ({created} new) in chunks of {chunk_size}")
+    return result
@@ -0,0 +1,212 @@
+"""
+Working-day calendar service
+
+Working days only depend on the calendar and on which weekdays are off for an
+employee. Off days are encoded as a 7-bit mask (bit 0 = Monday ... bit 6 = Sunday),
+so there are only 128 distinct combinations. Counts are computed with week
+arithmetic instead of day-by-day loops and cached process-wide. Tenant
+holidays (a collection of dates, see holiday_service) are subtracted on top,
+counting only the holidays that fall on one of the employee's working weekdays.
+
+Also provides month name/date helpers and month ranges for index-friendly
+month filters.
+"""
+
+import calendar
+import re
+from datetime import date
+from functools import lru_cache
+from django.db.models import Q
+
+# Weekday bits (date.weekday(): Monday = 0, Sunday = 6)
+MONDAY = 1 << 0
+TUESDAY = 1 << 1
+WEDNESDAY = 1 << 2
+THURSDAY = 1 << 3
+FRIDAY = 1 << 4
+SATURDAY = 1 << 5
+SUNDAY = 1 << 6
+
+MONTH_NUMBERS = {
+    'JANUARY': 1, 'FEBRUARY': 2, 'MARCH': 3, 'APRIL': 4,
+    'MAY': 5, 'JUNE': 6, 'JULY': 7, 'AUGUST': 8,
+    'SEPTEMBER': 9, 'OCTOBER': 10, 'NOVEMBER': 11, 'DECEMBER': 12,
+    'JAN': 1, 'FEB': 2, 'MAR': 3, 'APR': 4, 'JUN': 6, 'JUL': 7,
+    'AUG': 8, 'SEP': 9, 'SEPT': 9, 'OCT': 10, 'NOV': 11, 'DEC': 12,
+}
+
+OFF_DAY_FIELDS = (
+    'off_monday', 'off_tuesday', 'off_wednesday', 'off_thursday',
+    'off_friday', 'off_saturday', 'off_sunday',
+)
+
+
+def off_day_mask(employee) -> int:
+    """Build the off-day bitmask from an EmployeeProfile's off_<weekday> flags"""
+    mask = 0
+    for weekday, field in enumerate(OFF_DAY_FIELDS):
+        if getattr(employee, field, False):
+            mask |= 1 << weekday
+    return mask
+
+
+@lru_cache(maxsize=128 * 7 * 7)
+def _working_days_in_partial_week(off_mask: int, start_weekday: int, length: int) -> int:
+    """Working days in a run of fewer than 7 consecutive days starting on start_weekday"""
+    return sum(
+        1 for offset in range(length)
+        if not off_mask & (1 << ((start_weekday + offset) % 7))
+    )
+
+
+@lru_cache(maxsize=128)
+def _working_days_per_week(off_mask: int) -> int:
+    return 7 - bin(off_mask & 0x7F).count('1')
+
+
+def working_days_between(start_date: date, end_date: date, off_mask: int) -> int:
+    """Working days in the inclusive range [start_date, end_date]; 0 if the range is empty"""
+    if end_date < start_date:
+        return 0
+    total_days = (end_date - start_date).days + 1
+    full_weeks, remainder = divmod(total_days, 7)
+    return (
+        full_weeks * _working_days_per_week(off_mask)
+        + _working_days_in_partial_week(off_mask, start_date.weekday(), remainder)
+    )
+
+
+@lru_cache(maxsize=4096)
+def working_days_in_month(year: int, month: int, off_mask: int, from_day: int = 1) -> int:
+    """Working days in a month, optionally counting only from ``from_day`` (e.g. a joining date)"""
+    days_in_month = calendar.monthrange(year, month)[1]
+    if from_day > days_in_month:
+        return 0
+    return working_days_between(
+        date(year, month, max(from_day, 1)), date(year, month, days_in_month), off_mask
+    )
+
+
+def holidays_between(holidays, start_date: date, end_date: date, off_mask: int = 0) -> int:
+    """
+    Holidays in the inclusive range [start_date, end_date] that fall on a
+    working weekday; a holiday on an off day is not a working day to begin with
+    """
+    return sum(
+        1 for day in holidays
+        if start_date <= day <= end_date and not off_mask & (1 << day.weekday())
+    )
+
+
+def employee_working_days_in_month(employee, year: int, month: int, holidays=()) -> int:
+    """
+    Working days for an employee in a month, honouring their off days and
+    ``holidays`` and starting from the joining date when they joined during the
+    month.
+    """
+    from_day = 1
+    joining_date = getattr(employee, 'date_of_joining', None)
+    if joining_date:
+        if (joining_date.year, joining_date.month) > (year, month):
+            # Employee hasn't joined yet in this month
+            return 0
+        if (joining_date.year, joining_date.month) == (year, month):
+            from_day = joining_date.day
+    off_mask = off_day_mask(employee)
+    working_days = working_days_in_month(year, month, off_mask, from_day)
+    if holidays:
+        start = date(year, month, from_day)
+        end = date(year, month, calendar.monthrange(year, month)[1])
+        working_days -= holidays_between(holidays, start, end, off_mask)
+    return working_days
+
+
+def employee_working_days_between(employee, start_date: date, end_date: date, holidays=()) -> int:
+    """Working days for an employee in an inclusive date range, honouring their off days and ``holidays``"""
+    off_mask = off_day_mask(employee)
+    working_days = working_days_between(start_date, end_date, off_mask)
+    if holidays:
+        working_days -= holidays_between(holidays, start_date, end_date, off_mask)
+    return working_days
+
+
+def month_number(month):
+    """Month number for a month name ('JUNE', 'Jun') or number; None if unknown"""
+    if month is None:
+        return None
+    if isinstance(month, int):
+        return month if 1 <= month <= 12 else None
+    month = str(month).strip()
+    if month.isdigit():
+        return month_number(int(month))
+    return MONTH_NUMBERS.get(month.upper())
+
+
+def parse_month_label(label):
+    """
+    First day of the month named by a free-text label such as 'Mar 2025',
+    'March 2025', '2025-03' or '03/2025'; None if it can't be parsed
+    """
+    if not label:
+        return None
+    label = str(label).strip()
+    year_match = re.search(r'\b(\d{4})\b', label)
+    if not year_match:
+        return None
+    rest = (label[:year_match.start()] + ' ' + label[year_match.end():]).strip(' -/.,')
+    month_token = re.search(r'[A-Za-z]+|\d{1,2}', rest)
+    month_num = month_number(month_token.group(0)) if month_token else None
+    if not month_num:
+        return None
+    return date(int(year_match.group(1)), month_num, 1)
+
+
+def add_months(month_start: date, months: int) -> date:
+    """First day of the month ``months`` months after (or before, if negative) month_start's month"""
+    index = month_start.year * 12 + month_start.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(year: int, month: int):
+    """
+    First day of the month and first day of the next month, i.e. the half-open
+    range [start, end) covering the month
+    """
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+def month_range_filter(year: int, month: int, field: str = 'date') -> dict:
+    """
+    QuerySet filter kwargs selecting ``field`` values inside a month.
+
+    Unlike ``date__year``/``date__month`` (EXTRACT on every row) this is a
+    plain range predicate, so (tenant, date) indexes can be used.
+    """
+    start, end = month_bounds(year, month)
+    return {f'{field}__gte': start, f'{field}__lt': end}
+
+
+def month_span_filter(first_month: date, last_month: date, year_field: str = 'year', month_field: str = 'month') -> Q:
+    """
+    Q selecting rows keyed by separate year/month columns from first_month's
+    month to last_month's (inclusive): a range predicate on (year, month)
+    instead of one OR term per month.
+    """
+    after_start = (
+        Q(**{f'{year_field}__gt': first_month.year})
+        | Q(**{year_field: first_month.year, f'{month_field}__gte': first_month.month})
+    )
+    before_end = (
+        Q(**{f'{year_field}__lt': last_month.year})
+        | Q(**{year_field: last_month.year, f'{month_field}__lte': last_month.month})
+    )
+    return after_start & before_end
+
+
+def clear_cache():
+    """Drop all cached calendar computations"""
+    _working_days_in_partial_week.cache_clear()
+    _working_days_per_week.cache_clear()
+    working_days_in_month.cache_clear()
@@ -0,0 +1,105 @@
+"""
+Employees eligible for attendance on a date
+
+An employee is eligible when they are active, have joined by the date and
+the date's weekday is not one of their off days. Pages are read with keyset
+pagination on employee_id (unique per tenant), backed by the
+(tenant, is_active, employee_id) index, so every page costs the same however
+far into a large tenant it is. Each page's attendance for the date is looked
+up with one query for just that page's employees.
+"""
+
+from ..models import DailyAttendance, EmployeeProfile
+from .calendar_service import OFF_DAY_FIELDS
+from .keyset_pagination import keyset_page
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 2000
+
+ORDERING = ['employee_id']
+
+EMPLOYEE_FIELDS = (
+    'employee_id', 'first_name', 'last_name', 'department', 'shift_start_time', 'shift_end_time',
+)
+
+
+def eligible_employees(tenant, target_date):
+    """values() queryset of the employees eligible on target_date"""
+    return EmployeeProfile.objects.filter(
+        tenant=tenant,
+        is_active=True,
+    ).exclude(
+        **{OFF_DAY_FIELDS[target_date.weekday()]: True}
+    ).exclude(
+        date_of_joining__gt=target_date
+    ).values(*EMPLOYEE_FIELDS)
+
+
+def _attendance_on(tenant, target_date, employee_ids) -> dict:
+    return {
+        record.employee_id: {
+            'status': record.attendance_status,
+            'ot_hours': float(record.ot_hours),
+            'late_minutes': record.late_minutes,
+            'check_in': record.check_in.strftime('%H:%M') if record.check_in else None,
+            'check_out': record.check_out.strftime('%H:%M') if record.check_out else None,
+        }
+        for record in DailyAttendance.objects.filter(
+            tenant=tenant,
+            date=target_date,
+            employee_id__in=employee_ids,
+        ).only(
+            'employee_id', 'attendance_status', 'ot_hours', 'late_minutes', 'check_in', 'check_out'
+        )
+    }
+
+
+def eligible_employees_page(tenant, target_date, cursor=None, page_size=DEFAULT_PAGE_SIZE, queryset=None):
+    """
+    One page of eligible employees with their attendance on target_date.
+    Returns (employees, next_cursor); next_cursor is None on the last page.
+    Raises ValueError for a malformed cursor.
+    """
+    if queryset is None:
+        queryset = eligible_employees(tenant, target_date)
+    rows, next_cursor = keyset_page(queryset, ORDERING, cursor, page_size)
+    attendance_lookup = _attendance_on(tenant, target_date, [row['employee_id'] for row in rows])
+
+    employees = []
+    for row in rows:
+        current_attendance = attendance_lookup.get(row['employee_id'], {})
+        if current_attendance:
+            default_status = 'present' if current_attendance['status'] in ['PRESENT', 'PAID_LEAVE'] else 'absent'
+        else:
+            default_status = 'absent'
+        employees.append({
+            'employee_id': row['employee_id'],
+            'name': f"{row['first_name']} {row['last_name']}",
+            'first_name': row['first_name'],
+            'last_name': row['last_name'],
+            'department': row['department'] or 'General',
+            'shift_start_time': row['shift_start_time'].strftime('%H:%M') if row['shift_start_time'] else '09:00',
+            'shift_end_time': row['shift_end_time'].strftime('%H:%M') if row['shift_end_time'] else '18:00',
+            'default_status': default_status,
+            'current_attendance': current_attendance,
+            'ot_hours': current_attendance.get('ot_hours', 0),
+            'late_minutes': current_attendance.get('late_minutes', 0),
+        })
+    return employees, next_cursor
+
+
+def eligible_employees_after_first_page(tenant, target_date, first_page_size=DEFAULT_PAGE_SIZE, queryset=None) -> list:
+    """
+    Every eligible employee after the first page of first_page_size, read in
+    MAX_PAGE_SIZE pages (the progressive loading "remaining" batch)
+    """
+    if queryset is None:
+        queryset = eligible_employees(tenant, target_date)
+    # Skip the first page by its last employee_id rather than an OFFSET
+    _, cursor = keyset_page(queryset.values('employee_id'), ORDERING, None, first_page_size)
+    employees = []
+    while cursor:
+        page, cursor = eligible_employees_page(tenant, target_date, cursor, MAX_PAGE_SIZE, queryset)
+        employees.extend(page)
+    return employees
+
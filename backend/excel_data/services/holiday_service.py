@@ -0,0 +1,80 @@
+"""
+Tenant holiday calendar
+
+tenant_holidays() returns a tenant's holidays as {date: name}. The mapping is
+small (a few dozen dates a year), so it is loaded whole and kept in the cache,
+and calendar_service subtracts it from working-day counts. TenantHoliday
+signals call holidays_changed(), which marks the month's open payroll
+calculations for recalculation and, once the transaction commits, drops the
+cached mapping, the eligible-employee lists for the date and every cached
+directory page and all_records response.
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+from ..models import CalculatedSalary, TenantHoliday
+from .payroll_change_tracker import mark_employees_dirty
+import logging
+
+logger = logging.getLogger(__name__)
+
+HOLIDAY_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _cache_key(tenant_id) -> str:
+    return f"tenant_holidays_{tenant_id}"
+
+
+def tenant_holidays(tenant_id) -> dict:
+    """{date: holiday name} for every holiday of the tenant"""
+    key = _cache_key(tenant_id)
+    holidays = cache.get(key)
+    if holidays is None:
+        holidays = dict(
+            TenantHoliday.all_objects.filter(tenant_id=tenant_id).order_by('date').values_list('date', 'name')
+        )
+        cache.set(key, holidays, HOLIDAY_CACHE_TIMEOUT)
+    return holidays
+
+
+def _invalidate_caches(tenant_id, dates):
+    # The same keys attendance writes clear; directory_data_{tenant} and
+    # attendance_all_records_{tenant} are the version stamps of every cached
+    # directory page and all_records response
+    keys = [
+        _cache_key(tenant_id),
+        f"directory_data_{tenant_id}",
+        f"attendance_all_records_{tenant_id}",
+        f"payroll_overview_{tenant_id}",
+    ]
+    for day in dates:
+        date_str = day.isoformat()
+        keys.extend([
+            f"eligible_employees_{tenant_id}_{date_str}",
+            f"eligible_employees_opt_{tenant_id}_{date_str}_p1_s500",
+            f"eligible_employees_progressive_{tenant_id}_{date_str}_initial",
+            f"eligible_employees_progressive_{tenant_id}_{date_str}_remaining",
+            f"total_eligible_count_{tenant_id}_{date_str}",
+        ])
+    cache.delete_many(keys)
+
+
+def holidays_changed(tenant_id, dates):
+    """
+    Invalidate everything derived from the holidays on ``dates`` after a
+    holiday was added, moved or removed.
+    """
+    dates = list(dates)
+    # After commit, so a concurrent read can't cache the old holidays again
+    transaction.on_commit(lambda: _invalidate_caches(tenant_id, dates))
+
+    # Working days (and so the per-hour rates) of the month changed for everyone
+    for month_start in sorted({day.replace(day=1) for day in dates}):
+        open_calculations = CalculatedSalary.all_objects.filter(
+            tenant_id=tenant_id,
+            payroll_period__period_start=month_start,
+            is_paid=False,
+            payroll_period__is_locked=False,
+        ).values_list('employee_id', 'payroll_period__year', 'payroll_period__month').distinct()
+        marked = mark_employees_dirty(tenant_id, open_calculations, reason='holiday')
+        logger.info(f"Holiday change for tenant {tenant_id} in {month_start:%m/%Y}: {marked} salaries marked for recalculation")
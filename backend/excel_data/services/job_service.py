@@ -0,0 +1,430 @@
+"""
+Background job service
+
+API views enqueue long-running work as BackgroundJob rows and return the job id
+straight away; worker processes (manage.py run_workers) claim queued jobs,
+run them and record progress, timings, results and errors on the row so
+clients can poll for completion instead of holding the request open.
+Requests never run a job themselves. Deployments without a worker process
+(the serverless one) drain the queue from a scheduled request instead, see
+drain_jobs() and the cron in vercel.json.
+
+A job that raises is queued again with an exponential backoff until it has
+used its max_attempts. A running job writes a heartbeat to its row every
+PROGRESS_FLUSH_SECONDS from a separate thread (ProgressReporter), whether or
+not its handler reports progress. Jobs left RUNNING by a worker that died
+(process recycled, container frozen, request killed) stop beating and are
+handed back to the queue by requeue_stale_jobs().
+"""
+
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from ..models import BackgroundJob, JobStatus, JobType, PayrollPeriod
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Retry n waits RETRY_BASE_DELAY_SECONDS * 2**(n - 1), capped at RETRY_MAX_DELAY_SECONDS
+RETRY_BASE_DELAY_SECONDS = 30
+RETRY_MAX_DELAY_SECONDS = 3600
+
+# A RUNNING job without a heartbeat for this long is considered abandoned
+STALE_JOB_SECONDS = 1800
+
+# How often a running job's heartbeat and progress are written to its row
+PROGRESS_FLUSH_SECONDS = 5
+
+# drain_jobs() stops claiming new jobs after this long, well inside the
+# serverless function's 30 s limit
+DRAIN_SECONDS = 20
+
+# Cached views built from MonthlyAttendanceSummary, cleared after a rebuild
+SUMMARY_CACHE_KEYS = [
+    "monthly_attendance_summary_{tenant_id}_{year}_{month}",
+    "monthly_attendance_summary_{tenant_id}",
+    "attendance_tracker_{tenant_id}",
+    "dashboard_stats_{tenant_id}",
+    "attendance_all_records_{tenant_id}",
+    "attendance_all_records_{tenant_id}_this_month_None_None_None_None",
+    "attendance_all_records_{tenant_id}_last_6_months_None_None_None_None",
+    "attendance_all_records_{tenant_id}_last_12_months_None_None_None_None",
+    "attendance_all_records_{tenant_id}_last_5_years_None_None_None_None",
+    "attendance_all_records_{tenant_id}_custom_{month}_{year}_None_None",
+    "frontend_charts_{tenant_id}",
+    "directory_data_{tenant_id}",
+    "payroll_overview_{tenant_id}",
+]
+
+
+def enqueue_job(tenant, job_type: str, params: dict, user=None) -> BackgroundJob:
+    """Queue a job for the worker"""
+    return BackgroundJob.all_objects.create(
+        tenant=tenant,
+        job_type=job_type,
+        params=params,
+        created_by=user if getattr(user, 'is_authenticated', False) else None,
+    )
+
+
+def enqueue_payroll_calculation(tenant, year: int, month: str, force_recalculate: bool = False,
+                                incremental: bool = False, lock_after: bool = False, user=None):
+    """
+    Queue a payroll calculation for a period.
+
+    An identical calculation that is still queued is reused instead of queueing
+    the same work twice. Returns (job, created).
+    """
+    params = {
+        'year': int(year),
+        'month': str(month).upper(),
+        'force_recalculate': bool(force_recalculate),
+        'incremental': bool(incremental),
+        'lock_after': bool(lock_after),
+    }
+    existing = BackgroundJob.all_objects.filter(
+        tenant=tenant,
+        job_type=JobType.PAYROLL_CALCULATION,
+        status=JobStatus.QUEUED,
+        params=params,
+    ).order_by('created_at').first()
+    if existing:
+        return existing, False
+    return enqueue_job(tenant, JobType.PAYROLL_CALCULATION, params, user), True
+
+
+def enqueue_summary_rebuild(tenant, year: int, month: int, employee_ids=None, user=None):
+    """
+    Queue a rebuild of one month's attendance summaries for ``employee_ids``
+    (every employee of the month when None).
+
+    A rebuild of the same month that is still queued takes over the new
+    employees instead of a second job being queued. Returns (job, created).
+    """
+    if employee_ids is not None:
+        employee_ids = sorted({str(employee_id) for employee_id in employee_ids if employee_id})
+
+    with transaction.atomic():
+        existing = BackgroundJob.all_objects.select_for_update().filter(
+            tenant=tenant,
+            job_type=JobType.MONTHLY_SUMMARY_REBUILD,
+            status=JobStatus.QUEUED,
+            params__year=int(year),
+            params__month=int(month),
+        ).order_by('created_at').first()
+        if existing is None:
+            params = {'year': int(year), 'month': int(month), 'employee_ids': employee_ids}
+            return enqueue_job(tenant, JobType.MONTHLY_SUMMARY_REBUILD, params, user), True
+
+        queued_ids = existing.params.get('employee_ids')
+        if queued_ids is not None:
+            merged = None if employee_ids is None else sorted(set(queued_ids) | set(employee_ids))
+            if merged != queued_ids:
+                existing.params = {**existing.params, 'employee_ids': merged}
+                existing.save(update_fields=['params', 'updated_at'])
+        return existing, False
+
+
+def pending_summary_rebuilds(tenant_id, year: int, month: int):
+    """
+    Employee ids whose summaries and attendance bitmaps for the month wait for
+    a queued or running summary rebuild (an empty set when none do), or None
+    when a pending rebuild covers every employee of the month
+    """
+    employee_ids = set()
+    for params in BackgroundJob.all_objects.filter(
+        tenant_id=tenant_id,
+        job_type=JobType.MONTHLY_SUMMARY_REBUILD,
+        status__in=[JobStatus.QUEUED, JobStatus.RUNNING],
+        params__year=int(year),
+        params__month=int(month),
+    ).values_list('params', flat=True):
+        if params.get('employee_ids') is None:
+            return None
+        employee_ids.update(params['employee_ids'])
+    return employee_ids
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff before the next try of a job that has failed ``attempts`` times"""
+    seconds = RETRY_BASE_DELAY_SECONDS * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(seconds, RETRY_MAX_DELAY_SECONDS))
+
+
+def claim_next_job(job_types=None):
+    """
+    Atomically move the oldest queued job that is due to RUNNING and return it
+    (None when there is nothing to run). On PostgreSQL, SKIP LOCKED lets
+    several workers poll the same table without handing out a job twice.
+    """
+    with transaction.atomic():
+        now = timezone.now()
+        queued = BackgroundJob.all_objects.filter(
+            Q(run_after__isnull=True) | Q(run_after__lte=now),
+            status=JobStatus.QUEUED,
+        )
+        if job_types:
+            queued = queued.filter(job_type__in=job_types)
+        if connection.features.has_select_for_update_skip_locked:
+            queued = queued.select_for_update(skip_locked=True)
+        job = queued.order_by('created_at').first()
+        if job is None:
+            return None
+        _mark_running(job)
+        return job
+
+
+def _mark_running(job: BackgroundJob):
+    job.status = JobStatus.RUNNING
+    job.started_at = job.heartbeat_at = timezone.now()
+    job.attempts += 1
+    job.save(update_fields=['status', 'started_at', 'heartbeat_at', 'attempts', 'updated_at'])
+
+
+def requeue_stale_jobs(stale_after: int = STALE_JOB_SECONDS) -> int:
+    """
+    Hand RUNNING jobs whose heartbeat is older than ``stale_after`` seconds
+    back to the queue (or fail them once out of attempts). A job that is still
+    running keeps beating however slow its work is, so it is never run twice.
+    Returns the number of jobs recovered.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=stale_after)
+    recovered = 0
+    with transaction.atomic():
+        stale = BackgroundJob.all_objects.select_for_update().filter(
+            Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+            status=JobStatus.RUNNING,
+        )
+        for job in stale:
+            job.error = f"Worker stopped responding during attempt {job.attempts}"
+            if job.attempts < job.max_attempts:
+                job.status = JobStatus.QUEUED
+                job.run_after = now
+            else:
+                job.status = JobStatus.FAILED
+                job.finished_at = now
+            job.save(update_fields=['status', 'error', 'run_after', 'finished_at', 'updated_at'])
+            logger.warning(f"Background job {job.id} ({job.job_type}): {job.error}")
+            recovered += 1
+    return recovered
+
+
+class ProgressReporter(threading.Thread):
+    """
+    Writes a running job's heartbeat, and its progress when that changed, to
+    its row every PROGRESS_FLUSH_SECONDS from this thread's own database
+    connection, so pollers see it while the job's work is still inside a
+    transaction. Not used on SQLite, which can't take a second writer while
+    the job's transaction is open; there update_progress() is the heartbeat.
+    """
+
+    def __init__(self, job: BackgroundJob):
+        super().__init__(name=f'job-progress-{job.id}', daemon=True)
+        self.job = job
+        self.stopping = threading.Event()
+        self.written = None
+
+    def run(self):
+        try:
+            while not self.stopping.wait(PROGRESS_FLUSH_SECONDS):
+                self.flush()
+        finally:
+            connection.close()
+
+    def flush(self):
+        progress = (self.job.progress_done, self.job.progress_total)
+        now = timezone.now()
+        fields = {'heartbeat_at': now}
+        if progress != self.written:
+            fields.update(progress_done=progress[0], progress_total=progress[1], updated_at=now)
+        try:
+            BackgroundJob.all_objects.filter(pk=self.job.pk).update(**fields)
+            self.written = progress
+        except Exception as e:
+            logger.warning(f"Could not record progress of background job {self.job.id}: {str(e)}")
+
+    def stop(self):
+        self.stopping.set()
+        self.join()
+
+
+def update_progress(job: BackgroundJob, done: int, total: int):
+    """
+    Record progress on the job. Its ProgressReporter writes it to the row;
+    without one (SQLite) it is written here together with the heartbeat,
+    visible once the job's transaction commits.
+    """
+    job.progress_done = done
+    job.progress_total = total
+    if getattr(job, 'progress_reporter', None) is None:
+        now = timezone.now()
+        BackgroundJob.all_objects.filter(pk=job.pk).update(
+            progress_done=done,
+            progress_total=total,
+            heartbeat_at=now,
+            updated_at=now,
+        )
+
+
+def run_job(job: BackgroundJob) -> BackgroundJob:
+    """
+    Execute a claimed job and store its outcome, queueing a retry if it failed
+    with attempts left
+    """
+    handler = JOB_HANDLERS.get(job.job_type)
+    job.progress_reporter = None
+    if connection.vendor != 'sqlite':
+        job.progress_reporter = ProgressReporter(job)
+        job.progress_reporter.start()
+    try:
+        if handler is None:
+            raise ValueError(f"No handler for job type {job.job_type}")
+        job.result = handler(job)
+        job.status = JobStatus.SUCCEEDED
+        job.error = ''
+        job.finished_at = timezone.now()
+    except Exception as e:
+        job.error = str(e)
+        if handler is not None and job.attempts < job.max_attempts:
+            job.status = JobStatus.QUEUED
+            job.run_after = timezone.now() + retry_delay(job.attempts)
+            logger.warning(
+                f"Background job {job.id} ({job.job_type}) failed on attempt {job.attempts}/{job.max_attempts}, "
+                f"retrying at {job.run_after.isoformat()}: {str(e)}"
+            )
+        else:
+            logger.error(f"Background job {job.id} ({job.job_type}) failed: {str(e)}")
+            job.status = JobStatus.FAILED
+            job.finished_at = timezone.now()
+    finally:
+        if job.progress_reporter is not None:
+            job.progress_reporter.stop()
+    job.save(update_fields=[
+        'status', 'result', 'error', 'progress_done', 'progress_total', 'run_after', 'finished_at', 'updated_at'
+    ])
+    return job
+
+
+def run_next_job(job_types=None):
+    """Claim and run one job; returns the finished job or None if nothing was queued"""
+    job = claim_next_job(job_types)
+    if job is None:
+        return None
+    return run_job(job)
+
+
+def drain_jobs(time_budget: float = DRAIN_SECONDS, job_types=None) -> list:
+    """
+    Run queued jobs one after another until none is due or ``time_budget``
+    seconds have passed (a job already started is finished first), after
+    handing abandoned jobs back to the queue. This is the worker of
+    deployments that can't keep a run_workers process alive: a scheduler calls
+    it every minute. Returns the jobs it ran.
+    """
+    requeue_stale_jobs()
+    deadline = time.monotonic() + time_budget
+    finished = []
+    while time.monotonic() < deadline:
+        job = run_next_job(job_types)
+        if job is None:
+            break
+        finished.append(job)
+    return finished
+
+
+def _run_payroll_calculation(job: BackgroundJob) -> dict:
+    from .salary_service import SalaryCalculationService
+
+    params = job.params
+    tenant = job.tenant
+    results = SalaryCalculationService.calculate_salary_for_period(
+        tenant,
+        params['year'],
+        params['month'],
+        force_recalculate=params.get('force_recalculate', False),
+        incremental=params.get('incremental', False),
+        progress_callback=lambda done, total: update_progress(job, done, total),
+    )
+
+    if params.get('lock_after') and results.get('period_id') and results.get('status') != 'locked':
+        PayrollPeriod.all_objects.filter(id=results['period_id'], tenant=tenant).update(
+            is_locked=True,
+            calculation_date=timezone.now(),
+        )
+        results['locked'] = True
+
+    # CLEAR CACHE: Invalidate payroll overview cache when payroll data changes
+    cache.delete(f"payroll_overview_{tenant.id}")
+
+    if results.get('errors'):
+        logger.warning(f"Payroll job {job.id}: {len(results['errors'])} employees failed")
+    return results
+
+
+def _run_summary_rebuild(job: BackgroundJob) -> dict:
+    from .attendance_summary_service import rebuild_month_summaries
+
+    params = job.params
+    results = rebuild_month_summaries(
+        job.tenant_id,
+        params['year'],
+        params['month'],
+        employee_ids=params.get('employee_ids'),
+        progress_callback=lambda done, total: update_progress(job, done, total),
+    )
+
+    for key in SUMMARY_CACHE_KEYS:
+        cache.delete(key.format(tenant_id=job.tenant_id, year=params['year'], month=params['month']))
+    return results
+
+
+JOB_HANDLERS = {
+    JobType.PAYROLL_CALCULATION: _run_payroll_calculation,
+    JobType.MONTHLY_SUMMARY_REBUILD: _run_summary_rebuild,
+}
+
+
+def serialize_job(job: BackgroundJob) -> dict:
+    """Status payload returned by the job polling endpoint"""
+    now = timezone.now()
+    queued_seconds = ((job.started_at or now) - job.created_at).total_seconds()
+    running_seconds = None
+    if job.started_at:
+        running_seconds = ((job.finished_at or now) - job.started_at).total_seconds()
+
+    percent = None
+    if job.progress_total:
+        percent = round(job.progress_done * 100 / job.progress_total, 1)
+    elif job.status == JobStatus.SUCCEEDED:
+        percent = 100.0
+
+    return {
+        'id': job.id,
+        'job_type': job.job_type,
+        'status': job.status,
+        'params': job.params,
+        'progress': {
+            'done': job.progress_done,
+            'total': job.progress_total,
+            'percent': percent,
+        },
+        'timings': {
+            'created_at': job.created_at.isoformat(),
+            'started_at': job.started_at.isoformat() if job.started_at else None,
+            'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+            'queued_seconds': round(queued_seconds, 3),
+            'running_seconds': round(running_seconds, 3) if running_seconds is not None else None,
+        },
+        'attempts': {
+            'made': job.attempts,
+            'max': job.max_attempts,
+            'next_attempt_at': job.run_after.isoformat() if job.status == JobStatus.QUEUED and job.run_after else None,
+        },
+        'result': job.result,
+        'error': job.error or None,
+    }
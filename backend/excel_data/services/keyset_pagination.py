@@ -0,0 +1,63 @@
+"""
+Keyset (cursor) pagination
+
+Pages are addressed by the sort key of the last row returned instead of an
+OFFSET, so fetching page N costs the same as page 1: the database seeks to the
+cursor in the index and reads page_size + 1 rows. The cursor is an opaque
+URL-safe token holding the last row's sort values; the final ordering column
+must be unique (normally 'id') so rows with equal sort values are not skipped.
+"""
+
+import base64
+import json
+from django.db.models import Q
+
+
+def encode_cursor(values) -> str:
+    """Opaque cursor token for a row's sort values"""
+    raw = json.dumps([str(value) if value is not None else None for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> list:
+    """Sort values from a cursor token; raises ValueError for a malformed token"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(values, list):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return values
+
+
+def keyset_page(queryset, ordering, cursor=None, page_size=100):
+    """
+    One page of ``queryset`` (a values() queryset) ordered by ``ordering``, a
+    list of order_by() strings such as ['-net_payable', 'id'] whose fields must
+    not be NULL and must include every ordering field in the selected values.
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    fields = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+    queryset = queryset.order_by(*ordering)
+
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(fields):
+            raise ValueError(f"Invalid cursor: {cursor}")
+        # (a, b, id) > (x, y, z)  =>  a > x OR (a = x AND b > y) OR (a = x AND b = y AND id > z)
+        after = Q()
+        for position, (field, descending) in enumerate(fields):
+            condition = Q(**{f"{field}__{'lt' if descending else 'gt'}": values[position]})
+            for previous, (previous_field, _) in enumerate(fields[:position]):
+                condition &= Q(**{previous_field: values[previous]})
+            after |= condition
+        queryset = queryset.filter(after)
+
+    rows = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor([rows[-1][field] for field, _ in fields])
+    return rows, next_cursor
@@ -0,0 +1,56 @@
+"""
+Cross-process locks for per-tenant background work
+
+On PostgreSQL a transaction-level advisory lock is used, so the lock is
+shared by every node talking to the same database and is released when the
+transaction that took it commits or rolls back (or the process dies). The
+database is reached through a pgbouncer pooler in transaction mode, where a
+session-level lock could be released on a different server connection than
+the one that took it, or stay behind for another client. Other databases
+fall back to an atomic cache.add() entry.
+"""
+
+import zlib
+from contextlib import contextmanager
+from django.core.cache import cache
+from django.db import connection
+from django.db.transaction import TransactionManagementError
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _lock_keys(name: str, tenant_id: int):
+    # pg_try_advisory_xact_lock(int4, int4): one namespace per job name, one key per tenant
+    namespace = zlib.crc32(name.encode('utf-8')) & 0x7FFFFFFF
+    return namespace, int(tenant_id) & 0x7FFFFFFF
+
+
+@contextmanager
+def tenant_lock(name: str, tenant_id: int, timeout: int = 3600):
+    """
+    Try to take the ``name`` lock for a tenant without blocking.
+
+    Yields True when the lock was acquired and False when another process
+    already holds it. Must be used inside transaction.atomic(): on
+    PostgreSQL the lock is held until that transaction ends, so the work it
+    protects belongs in the same transaction. ``timeout`` only applies to the
+    cache fallback.
+    """
+    if connection.vendor == 'postgresql':
+        if not connection.in_atomic_block:
+            raise TransactionManagementError('tenant_lock() must be used inside transaction.atomic()')
+        namespace, key = _lock_keys(name, tenant_id)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_try_advisory_xact_lock(%s, %s)', [namespace, key])
+            acquired = cursor.fetchone()[0]
+        yield acquired
+        return
+
+    cache_key = f"lock_{name}_{tenant_id}"
+    acquired = cache.add(cache_key, 1, timeout)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            cache.delete(cache_key)
@@ -0,0 +1,188 @@
+"""
+Payroll change tracking
+
+Records which (tenant, employee, period) payroll inputs changed since the last
+calculation so that SalaryCalculationService can recalculate only the affected
+CalculatedSalary rows instead of the whole tenant.
+
+Row-by-row writers (the DailyAttendance/Attendance signals) don't upsert a
+marker per save: they schedule their keys with schedule_dirty_marks() and the
+keys collected during a transaction are written together when it commits.
+"""
+
+from collections import defaultdict
+from datetime import date, timedelta
+from django.db import transaction
+from django.utils import timezone
+from ..models import PayrollDirtyEmployee, CalculatedSalary
+from .calendar_service import month_number
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Markers younger than this are kept by purge_stale_dirty_markers(), so a marker
+# set while a calculation is still writing its rows is not lost
+STALE_MARKER_AGE = timedelta(days=1)
+
+_state = threading.local()
+
+
+def mark_employees_dirty(tenant_id, keys, reason: str = ''):
+    """
+    Mark (employee_id, year, month) keys as needing recalculation.
+    Re-marking an existing key refreshes its marked_at timestamp.
+    """
+    now = timezone.now()
+    markers = {}
+    for employee_id, year, month in keys:
+        month = month_number(month)
+        if not employee_id or not year or not month:
+            continue
+        markers[(employee_id, int(year), month)] = PayrollDirtyEmployee(
+            tenant_id=tenant_id,
+            employee_id=employee_id,
+            year=int(year),
+            month=month,
+            reason=reason,
+            marked_at=now,
+        )
+    if not markers:
+        return 0
+
+    PayrollDirtyEmployee.all_objects.bulk_create(
+        list(markers.values()),
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=['tenant', 'employee_id', 'year', 'month'],
+        update_fields=['reason', 'marked_at', 'updated_at'],
+    )
+    return len(markers)
+
+
+def _pending() -> dict:
+    """(tenant_id, reason) -> set of (employee_id, year, month) waiting to be marked in this thread"""
+    if not hasattr(_state, 'pending'):
+        _state.pending = defaultdict(set)
+    return _state.pending
+
+
+def flush_dirty_marks():
+    """Write every marker scheduled in this thread so far"""
+    pending = _pending()
+    if not pending:
+        return
+    _state.pending = defaultdict(set)
+    for (tenant_id, reason), keys in pending.items():
+        try:
+            with transaction.atomic():
+                mark_employees_dirty(tenant_id, keys, reason)
+        except Exception as exc:
+            # Soft-fail – the change itself has already committed
+            logger.error(f"Failed to record payroll change for tenant {tenant_id}: {exc}")
+
+
+def schedule_dirty_marks(tenant_id, keys, reason: str = ''):
+    """
+    Mark (employee_id, year, month) keys dirty when the current transaction
+    commits (immediately in autocommit mode), with one upsert per tenant and
+    reason for everything scheduled in the transaction.
+    """
+    _pending()[(tenant_id, reason)].update(keys)
+    # One hook per call keeps keys from a rolled-back transaction from waiting
+    # forever; hooks after the first find nothing left to flush
+    transaction.on_commit(flush_dirty_marks)
+
+
+def mark_employees_dirty_for_open_periods(tenant_id, employee_ids, reason: str = ''):
+    """
+    Mark employees dirty in every unlocked period where they have an unpaid
+    calculation. Used for inputs that are not tied to a single month
+    (salary/TDS/off days on the profile, advance balances).
+    """
+    employee_ids = [employee_id for employee_id in employee_ids if employee_id]
+    if not employee_ids:
+        return 0
+
+    open_calculations = CalculatedSalary.all_objects.filter(
+        tenant_id=tenant_id,
+        employee_id__in=employee_ids,
+        is_paid=False,
+        payroll_period__is_locked=False,
+    ).values_list('employee_id', 'payroll_period__year', 'payroll_period__month').distinct()
+
+    return mark_employees_dirty(tenant_id, open_calculations, reason)
+
+
+def mark_period_dirty(payroll_period, reason: str = ''):
+    """Mark every employee with an unpaid calculation in an unlocked period (period-wide inputs such as tds_rate)"""
+    if payroll_period.is_locked:
+        return 0
+    employee_ids = CalculatedSalary.all_objects.filter(
+        tenant_id=payroll_period.tenant_id,
+        payroll_period=payroll_period,
+        is_paid=False,
+    ).values_list('employee_id', flat=True)
+    return mark_employees_dirty(
+        payroll_period.tenant_id,
+        [(employee_id, payroll_period.year, payroll_period.month) for employee_id in employee_ids],
+        reason,
+    )
+
+
+def get_dirty_employee_ids(tenant, year: int, month: int) -> set:
+    """Employee IDs with pending changes for a period"""
+    return set(
+        PayrollDirtyEmployee.all_objects.filter(
+            tenant=tenant,
+            year=year,
+            month=month,
+        ).values_list('employee_id', flat=True)
+    )
+
+
+def clear_dirty_employees(tenant, year: int, month: int, employee_ids, calculated_since):
+    """
+    Remove markers for employees that were recalculated. Markers refreshed after
+    ``calculated_since`` (changes made during the calculation) are kept.
+    """
+    employee_ids = list(employee_ids)
+    if not employee_ids:
+        return 0
+    deleted, _ = PayrollDirtyEmployee.all_objects.filter(
+        tenant=tenant,
+        year=year,
+        month=month,
+        employee_id__in=employee_ids,
+        marked_at__lte=calculated_since,
+    ).delete()
+    return deleted
+
+
+def purge_stale_dirty_markers(tenant_ids=None) -> int:
+    """
+    Delete markers no incremental run will ever consume: those of employees
+    without a calculation in an unlocked period for the month (a calculation
+    always includes employees that have no row yet, and locked periods are not
+    recalculated). Markers younger than STALE_MARKER_AGE are kept. Returns the
+    number of markers deleted.
+    """
+    markers = PayrollDirtyEmployee.all_objects.filter(marked_at__lt=timezone.now() - STALE_MARKER_AGE)
+    if tenant_ids is not None:
+        markers = markers.filter(tenant_id__in=tenant_ids)
+
+    deleted = 0
+    periods = markers.values_list('tenant_id', 'year', 'month').distinct().order_by()
+    for tenant_id, year, month in list(periods):
+        calculated_employee_ids = CalculatedSalary.all_objects.filter(
+            tenant_id=tenant_id,
+            payroll_period__period_start=date(year, month, 1),
+            payroll_period__is_locked=False,
+        ).values('employee_id')
+        count, _ = markers.filter(
+            tenant_id=tenant_id, year=year, month=month
+        ).exclude(employee_id__in=calculated_employee_ids).delete()
+        deleted += count
+    if deleted:
+        logger.info(f"Purged {deleted} stale payroll dirty markers")
+    return deleted
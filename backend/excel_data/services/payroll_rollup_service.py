@@ -0,0 +1,135 @@
+"""
+Payroll period rollups
+
+PayrollPeriodRollup keeps one row per payroll period with its employee and
+paid counts and salary totals. Every CalculatedSalary write recomputes the
+rollups of the periods it touched inside the writer's transaction: single-row
+saves and deletes through signals, bulk writes by calling
+refresh_period_rollups() explicitly. Writers that touch many rows through
+per-row signals (QuerySet.delete() sends post_delete for every row) wrap them
+in batch_rollup_refreshes() so each period is refreshed once.
+"""
+
+from contextlib import contextmanager
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from ..models import CalculatedSalary, PayrollPeriod, PayrollPeriodRollup
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_TOTAL_FIELDS = {
+    'total_gross_salary': 'gross_salary',
+    'total_net_salary': 'net_payable',
+    'total_advance_deductions': 'advance_deduction_amount',
+    'total_tds': 'tds_amount',
+}
+
+# Per-thread batch state: nesting depth and the period ids collected so far
+_state = threading.local()
+
+
+def _batch_depth() -> int:
+    if not hasattr(_state, 'depth'):
+        _state.depth = 0
+        _state.period_ids = set()
+    return _state.depth
+
+
+def _period_totals(period_ids) -> dict:
+    """payroll_period_id -> rollup values aggregated from CalculatedSalary"""
+    rows = CalculatedSalary.all_objects.filter(payroll_period_id__in=period_ids).values(
+        'payroll_period_id'
+    ).order_by().annotate(
+        employee_count=Count('id'),
+        paid_count=Count('id', filter=Q(is_paid=True)),
+        **{field: Sum(source) for field, source in ROLLUP_TOTAL_FIELDS.items()},
+    )
+    return {row.pop('payroll_period_id'): row for row in rows}
+
+
+def refresh_period_rollups(period_ids):
+    """
+    Recompute the rollups of the given payroll periods from their salaries.
+
+    Call this in the same transaction as the CalculatedSalary write. The rollup
+    rows are locked first, so concurrent writers to a period are serialised.
+    """
+    period_ids = sorted({period_id for period_id in period_ids if period_id})
+    if not period_ids:
+        return 0
+
+    with transaction.atomic():
+        periods = dict(PayrollPeriod.all_objects.filter(id__in=period_ids).values_list('id', 'tenant_id'))
+        existing = set(
+            PayrollPeriodRollup.all_objects.filter(payroll_period_id__in=periods).values_list(
+                'payroll_period_id', flat=True
+            )
+        )
+        missing = [period_id for period_id in periods if period_id not in existing]
+        if missing:
+            PayrollPeriodRollup.all_objects.bulk_create(
+                [PayrollPeriodRollup(tenant_id=periods[period_id], payroll_period_id=period_id) for period_id in missing],
+                ignore_conflicts=True,
+            )
+        rollups = list(
+            PayrollPeriodRollup.all_objects.select_for_update().filter(
+                payroll_period_id__in=periods
+            ).order_by('payroll_period_id')
+        )
+
+        totals = _period_totals(list(periods))
+        now = timezone.now()
+        for rollup in rollups:
+            values = totals.get(rollup.payroll_period_id, {})
+            rollup.employee_count = values.get('employee_count', 0)
+            rollup.paid_count = values.get('paid_count', 0)
+            for field in ROLLUP_TOTAL_FIELDS:
+                setattr(rollup, field, values.get(field) or 0)
+            # bulk_update() does not apply auto_now
+            rollup.updated_at = now
+        PayrollPeriodRollup.all_objects.bulk_update(
+            rollups,
+            ['employee_count', 'paid_count', *ROLLUP_TOTAL_FIELDS, 'updated_at'],
+        )
+    return len(rollups)
+
+
+def rebuild_period_rollups(tenant_id) -> int:
+    """Recompute the rollups of every payroll period of a tenant"""
+    period_ids = list(PayrollPeriod.all_objects.filter(tenant_id=tenant_id).values_list('id', flat=True))
+    return refresh_period_rollups(period_ids)
+
+
+def schedule_rollup_refresh(period_ids) -> int:
+    """
+    Refresh the rollups of the given periods now, or once at the end of the
+    enclosing batch_rollup_refreshes() block
+    """
+    if _batch_depth():
+        _state.period_ids.update(period_id for period_id in period_ids if period_id)
+        return 0
+    return refresh_period_rollups(period_ids)
+
+
+@contextmanager
+def batch_rollup_refreshes():
+    """
+    Collect the rollup refreshes scheduled inside the block and run them once
+    when the outermost block exits, still inside the caller's transaction. If
+    the block raises, the collected periods are dropped with it.
+    """
+    _batch_depth()
+    _state.depth += 1
+    completed = False
+    try:
+        yield
+        completed = True
+    finally:
+        _state.depth -= 1
+        if not _state.depth:
+            period_ids, _state.period_ids = _state.period_ids, set()
+            if completed:
+                refresh_period_rollups(period_ids)
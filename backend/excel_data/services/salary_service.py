@@ -6,17 +6,72 @@ providing a unified calculation engine with admin controls for advance deduction
 """
 
 from datetime import date, timedelta
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
 from django.db import transaction
-from django.db.models import Sum
+from django.db.models import Max
+from django.utils import timezone
 from ..models import (
-    EmployeeProfile, Attendance, SalaryData, AdvanceLedger, PayrollPeriod, CalculatedSalary, SalaryAdjustment, DataSource,
-    MonthlyAttendanceSummary, DailyAttendance,
+    EmployeeProfile, Attendance, SalaryData, PayrollPeriod, CalculatedSalary, SalaryAdjustment, DataSource,
+    MonthlyAttendanceSummary, MonthlyAttendanceBitmap, DailyAttendance,
+)
+from .payroll_change_tracker import get_dirty_employee_ids, clear_dirty_employees
+from .advance_balance_service import get_advance_balance, get_advance_balances
+from .advance_repayment_service import apply_advance_repayments
+from .payroll_rollup_service import batch_rollup_refreshes, refresh_period_rollups, schedule_rollup_refresh
+from .attendance_bitmap_service import DAYS, encode_month_from_attendance, range_totals
+from .holiday_service import tenant_holidays
+from .job_service import pending_summary_rebuilds
+from .calendar_service import (
+    SUNDAY, working_days_in_month, employee_working_days_in_month, employee_working_days_between,
+    month_range_filter, month_bounds, month_number,
 )
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Rows per INSERT/UPDATE statement when writing CalculatedSalary in batch mode
+BULK_WRITE_BATCH_SIZE = 500
+
+# Employees processed between progress_callback calls
+PROGRESS_REPORT_INTERVAL = 100
+
+# CalculatedSalary columns rewritten when an existing row is recalculated
+CALCULATED_SALARY_UPDATE_FIELDS = [
+    'employee_name', 'department', 'basic_salary', 'basic_salary_per_hour',
+    'basic_salary_per_minute', 'employee_ot_rate', 'employee_tds_rate',
+    'total_working_days', 'present_days', 'absent_days', 'ot_hours', 'late_minutes',
+    'salary_for_present_days', 'ot_charges', 'late_deduction', 'gross_salary',
+    'tds_amount', 'salary_after_tds', 'total_advance_balance', 'advance_deduction_amount',
+    'remaining_advance_balance', 'net_payable', 'data_source',
+    'calculation_timestamp', 'updated_at',
+]
+
+# CalculatedSalary columns taken from the payroll_entries payload of a direct save
+DIRECT_SAVE_VALUE_FIELDS = [
+    'employee_name', 'department', 'basic_salary', 'employee_tds_rate',
+    'total_working_days', 'present_days', 'absent_days', 'ot_hours', 'late_minutes',
+    'salary_for_present_days', 'ot_charges', 'late_deduction', 'gross_salary',
+    'tds_amount', 'salary_after_tds', 'total_advance_balance', 'advance_deduction_amount',
+    'remaining_advance_balance', 'net_payable',
+]
+
+# CalculatedSalary columns compared to tell a recalculated row that changed from one that didn't
+CALCULATED_SALARY_VALUE_FIELDS = [
+    field for field in CALCULATED_SALARY_UPDATE_FIELDS if field not in ('calculation_timestamp', 'updated_at')
+]
+
+
+def _column_value(name: str, value):
+    """value rounded to the precision of CalculatedSalary.<name>, i.e. what the column would store"""
+    decimal_places = getattr(CalculatedSalary._meta.get_field(name), 'decimal_places', None)
+    if decimal_places is None or value is None:
+        return value
+    return Decimal(str(value)).quantize(Decimal(1).scaleb(-decimal_places))
+
+
+def _salary_values(salary: CalculatedSalary) -> list:
+    return [_column_value(name, getattr(salary, name)) for name in CALCULATED_SALARY_VALUE_FIELDS]
+
 class SalaryCalculationService:
     """
     Service class for autonomous salary calculations
@@ -46,72 +101,27 @@ class SalaryCalculationService:
         Calculate working days for a given month considering standard off days
         Default: 0 off days means all days are working days except weekends
         """
-        import calendar
-        from datetime import date, timedelta
-        
         month_num = SalaryCalculationService._get_month_number(month)
         
-        # Get total days in month
-        total_days = calendar.monthrange(year, month_num)[1]
-        
-        # Count weekends (Saturdays and Sundays by default)
-        working_days = 0
-        for day in range(1, total_days + 1):
-            current_date = date(year, month_num, day)
-            # Monday = 0, Sunday = 6
-            if current_date.weekday() < 6:  # Monday to Saturday (0-5)
-                working_days += 1
-        
-        return working_days
+        # Monday to Saturday are working days (Sunday off)
+        return working_days_in_month(year, month_num, SUNDAY)
     
     @staticmethod
-    def _calculate_employee_working_days(employee: 'EmployeeProfile', year: int, month: str) -> int:
+    def _calculate_employee_working_days(employee: 'EmployeeProfile', year: int, month: str,
+                                         holidays: dict = None) -> int:
         """
-        Calculate working days for a specific employee considering their off days and joining date
+        Calculate working days for a specific employee considering their off days, joining date
+        and the tenant's holidays (looked up when not passed in)
         """
-        import calendar
-        from datetime import date, timedelta
-        
         month_num = SalaryCalculationService._get_month_number(month)
-        total_days = calendar.monthrange(year, month_num)[1]
-        
-        # Determine the start date for calculation
-        month_start = date(year, month_num, 1)
-        month_end = date(year, month_num, total_days)
-        
-        # If employee has a joining date, start from the joining date if it's within this month
-        start_date = month_start
-        if employee.date_of_joining:
-            if employee.date_of_joining > month_end:
-                # Employee hasn't joined yet in this month
-                return 0
-            elif employee.date_of_joining > month_start:
-                # Employee joined mid-month
-                start_date = employee.date_of_joining
-        
-        # Get employee's off days
-        off_days = []
-        if employee.off_monday: off_days.append(0)  # Monday
-        if employee.off_tuesday: off_days.append(1)  # Tuesday
-        if employee.off_wednesday: off_days.append(2)  # Wednesday
-        if employee.off_thursday: off_days.append(3)  # Thursday
-        if employee.off_friday: off_days.append(4)  # Friday
-        if employee.off_saturday: off_days.append(5)  # Saturday
-        if employee.off_sunday: off_days.append(6)  # Sunday
-        
-        # Count working days for this employee from start_date to month_end
-        working_days = 0
-        current_date = start_date
-        while current_date <= month_end:
-            # Check if this day is not in employee's off days
-            if current_date.weekday() not in off_days:
-                working_days += 1
-            current_date = current_date + timedelta(days=1)
-        
-        return working_days
+        if holidays is None:
+            holidays = tenant_holidays(employee.tenant_id)
+        return employee_working_days_in_month(employee, year, month_num, holidays)
     
     @staticmethod
-    def calculate_salary_for_period(tenant, year: int, month: str, force_recalculate: bool = False):
+    def calculate_salary_for_period(tenant, year: int, month: str, force_recalculate: bool = False,
+                                    batch: bool = True, incremental: bool = False,
+                                    progress_callback=None):
         """
         Calculate salaries for all active employees for a given period
         
@@ -120,10 +130,24 @@ class SalaryCalculationService:
             year: Year (e.g., 2025)
             month: Month name (e.g., "JUNE")
             force_recalculate: Whether to recalculate existing records
+            batch: Load all inputs with set-based queries and write with bulk
+                   upserts (default). Pass False for the per-employee path.
+            incremental: When recalculating, only touch employees whose inputs
+                         changed since their last calculation (batch mode only)
+            progress_callback: Optional callable(done, total) used to report
+                               progress (batch mode only)
         
         Returns:
             dict: Summary of calculation results
         """
+        if batch:
+            # The whole run is one transaction, so a failure part-way through
+            # leaves the period's salaries as they were
+            with transaction.atomic():
+                return SalaryCalculationService._calculate_salary_for_period_batch(
+                    tenant, year, month, force_recalculate, incremental, progress_callback
+                )
+
         with transaction.atomic():
             # Determine data source based on existing data
             data_source = SalaryCalculationService._determine_data_source(tenant, year, month)
@@ -149,6 +173,7 @@ class SalaryCalculationService:
             results = {
                 'calculated': 0,
                 'updated': 0,
+                'unchanged': 0,
                 'errors': [],
                 'period_id': payroll_period.id,
                 'data_source': data_source
@@ -156,21 +181,203 @@ class SalaryCalculationService:
             
             for employee in active_employees:
                 try:
-                    calculated_salary = SalaryCalculationService._calculate_employee_salary(
+                    calculated_salary, outcome = SalaryCalculationService._calculate_employee_salary(
                         payroll_period, employee, force_recalculate
                     )
                     
                     if calculated_salary:
-                        if calculated_salary._state.adding:
-                            results['calculated'] += 1
-                        else:
-                            results['updated'] += 1
+                        results[outcome] += 1
                 except Exception as e:
                     logger.error(f"Error calculating salary for {employee.employee_id}: {str(e)}")
                     results['errors'].append(f"{employee.employee_id}: {str(e)}")
             
             return results
     
+    @staticmethod
+    def _calculate_salary_for_period_batch(tenant, year: int, month: str, force_recalculate: bool = False,
+                                           incremental: bool = False, progress_callback=None):
+        """
+        Batch implementation of calculate_salary_for_period.
+        
+        Inputs for every employee are loaded with a fixed number of set-based
+        queries, salaries are calculated in memory and the rows are written back
+        with chunked bulk writes. Per-employee results match _calculate_employee_salary.
+        Runs inside the caller's transaction (see calculate_salary_for_period).
+        
+        In incremental mode an existing row is only recalculated when the employee
+        is marked dirty (see payroll_change_tracker) or the row was calculated
+        before the latest day of the month that has attendance recorded (its
+        partial-month window has grown since).
+        
+        ``progress_callback(done, total)`` is called as employees are processed.
+        """
+        started_at = timezone.now()
+        month_num = SalaryCalculationService._get_month_number(month)
+        
+        # Determine data source based on existing data
+        data_source = SalaryCalculationService._determine_data_source(tenant, year, month)
+        
+        # Get or create payroll period
+        payroll_period = SalaryCalculationService.get_or_create_payroll_period(
+            tenant, year, month, data_source
+        )
+        
+        if payroll_period.is_locked and not force_recalculate:
+            return {
+                'status': 'locked',
+                'message': f'Payroll for {month} {year} is locked',
+                'period_id': payroll_period.id
+            }
+        
+        results = {
+            'calculated': 0,
+            'updated': 0,
+            'unchanged': 0,
+            'errors': [],
+            'period_id': payroll_period.id,
+            'data_source': data_source,
+            'scope': 'incremental' if incremental else 'full',
+        }
+        
+        dirty_employee_ids = set()
+        latest_attendance_date = None
+        if incremental and force_recalculate:
+            dirty_employee_ids = get_dirty_employee_ids(tenant, year, month_num)
+            latest_attendance_date = SalaryCalculationService._latest_attendance_date(tenant, year, month_num)
+        
+        active_employees = EmployeeProfile.objects.filter(
+            tenant=tenant,
+            is_active=True
+        )
+        existing_salaries = {
+            calculated_salary.employee_id: calculated_salary
+            for calculated_salary in CalculatedSalary.objects.filter(
+                tenant=tenant,
+                payroll_period=payroll_period
+            )
+        }
+        
+        employees_to_calculate = []
+        for employee in active_employees:
+            if not employee.employee_id:
+                logger.error(f"Employee {employee.full_name} (ID: {employee.id}) has no employee_id")
+                continue
+            existing = existing_salaries.get(employee.employee_id)
+            if existing and not force_recalculate:
+                # Existing calculation is kept as-is
+                results['unchanged'] += 1
+                continue
+            if (
+                existing and incremental
+                and employee.employee_id not in dirty_employee_ids
+                and not SalaryCalculationService._is_partial_window_outdated(existing, latest_attendance_date)
+            ):
+                results['unchanged'] += 1
+                continue
+            employees_to_calculate.append(employee)
+        
+        total = len(employees_to_calculate)
+        if progress_callback:
+            progress_callback(0, total)
+        
+        inputs = SalaryCalculationService._load_period_inputs(
+            tenant, year, month, employees_to_calculate, force_recalculate
+        )
+        
+        now = timezone.now()
+        salaries_to_create = []
+        salaries_to_update = []
+        changed = 0
+        for done, employee in enumerate(employees_to_calculate):
+            if progress_callback and done and done % PROGRESS_REPORT_INTERVAL == 0:
+                progress_callback(done, total)
+            try:
+                attendance_data = SalaryCalculationService._get_attendance_data_from_inputs(
+                    employee, year, month, inputs, force_recalculate
+                )
+                advance_balance = inputs['advance_balances'].get(employee.employee_id) or Decimal('0')
+                salary_data = SalaryCalculationService._build_salary_data(
+                    payroll_period, employee, attendance_data, advance_balance, inputs['holidays']
+                )
+                
+                existing = existing_salaries.get(employee.employee_id)
+                if existing:
+                    stored_values = _salary_values(existing)
+                    for key, value in salary_data.items():
+                        setattr(existing, key, value)
+                    # bulk_update() does not apply auto_now
+                    existing.calculation_timestamp = now
+                    existing.updated_at = now
+                    existing.calculate_salary()
+                    # Still written, so the row records when it was last calculated
+                    salaries_to_update.append(existing)
+                    if _salary_values(existing) != stored_values:
+                        changed += 1
+                else:
+                    calculated_salary = CalculatedSalary(tenant=tenant, **salary_data)
+                    calculated_salary.calculate_salary()
+                    salaries_to_create.append(calculated_salary)
+            except Exception as e:
+                logger.error(f"Error calculating salary for {employee.employee_id}: {str(e)}")
+                results['errors'].append(f"{employee.employee_id}: {str(e)}")
+        
+        if salaries_to_create:
+            # Upsert so a row inserted concurrently for the same employee is updated, not duplicated
+            CalculatedSalary.objects.bulk_create(
+                salaries_to_create,
+                batch_size=BULK_WRITE_BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=['tenant', 'payroll_period', 'employee_id'],
+                update_fields=CALCULATED_SALARY_UPDATE_FIELDS,
+            )
+        if salaries_to_update:
+            CalculatedSalary.objects.bulk_update(
+                salaries_to_update,
+                CALCULATED_SALARY_UPDATE_FIELDS,
+                batch_size=BULK_WRITE_BATCH_SIZE,
+            )
+        
+        clear_dirty_employees(
+            tenant, year, month_num,
+            [salary.employee_id for salary in salaries_to_create + salaries_to_update],
+            started_at,
+        )
+        if salaries_to_create or salaries_to_update:
+            refresh_period_rollups([payroll_period.id])
+        
+        results['calculated'] += len(salaries_to_create)
+        results['updated'] += changed
+        results['unchanged'] += len(salaries_to_update) - changed
+        
+        if progress_callback:
+            progress_callback(total, total)
+        
+        return results
+    
+    @staticmethod
+    def _latest_attendance_date(tenant, year: int, month_num: int):
+        """Latest day (up to today) of the month with any DailyAttendance recorded, or None"""
+        month_start, next_month = month_bounds(year, month_num)
+        return DailyAttendance.objects.filter(
+            tenant=tenant,
+            date__gte=month_start,
+            date__lt=next_month,
+            date__lte=timezone.localdate(),
+        ).aggregate(latest=Max('date'))['latest']
+    
+    @staticmethod
+    def _is_partial_window_outdated(calculated_salary: CalculatedSalary, latest_attendance_date) -> bool:
+        """
+        Recalculations use a partial-month window that ends today while the month
+        is running. A row calculated before the latest day with attendance
+        recorded missed part of that window, even if none of the employee's own
+        inputs changed. Days without any attendance do not make a row outdated,
+        so an unchanged month is not recalculated every day.
+        """
+        if latest_attendance_date is None:
+            return False
+        return timezone.localdate(calculated_salary.calculation_timestamp) < latest_attendance_date
+    
     @staticmethod
     def _determine_data_source(tenant, year: int, month: str) -> str:
         """Determine if period should use uploaded data or frontend calculations"""
@@ -183,11 +390,9 @@ class SalaryCalculationService:
         ).exists()
         
         # Check if we have frontend attendance data
-        month_start = date(year, SalaryCalculationService._get_month_number(month), 1)
         has_frontend_attendance = Attendance.objects.filter(
             tenant=tenant,
-            date__year=year,
-            date__month=month_start.month,
+            **month_range_filter(year, SalaryCalculationService._get_month_number(month)),
             calendar_days=1,  # Indicates daily tracking
             total_working_days=1
         ).exists()
@@ -201,12 +406,15 @@ class SalaryCalculationService:
     
     @staticmethod
     def _calculate_employee_salary(payroll_period: PayrollPeriod, employee: EmployeeProfile, force_recalculate: bool = False):
-        """Calculate salary for a specific employee"""
+        """
+        Calculate salary for a specific employee. Returns (calculated_salary, outcome)
+        where outcome is 'calculated', 'updated' or 'unchanged'.
+        """
         
         # Ensure employee has an employee_id
         if not employee.employee_id:
             logger.error(f"Employee {employee.full_name} (ID: {employee.id}) has no employee_id")
-            return None
+            return None, None
         
         # Check if calculation already exists
         existing = CalculatedSalary.objects.filter(
@@ -216,7 +424,7 @@ class SalaryCalculationService:
         ).first()
         
         if existing and not force_recalculate:
-            return existing
+            return existing, 'unchanged'
         
         # Get attendance data (with force calculation support)
         attendance_data = SalaryCalculationService._get_attendance_data(
@@ -224,13 +432,32 @@ class SalaryCalculationService:
         )
         
         # Get advance balance
-        advance_balance = SalaryCalculationService._get_advance_balance(employee.employee_id)
+        advance_balance = SalaryCalculationService._get_advance_balance(employee.tenant, employee.employee_id)
+        
+        salary_data = SalaryCalculationService._build_salary_data(
+            payroll_period, employee, attendance_data, advance_balance
+        )
+        
+        # Create or update calculated salary
+        if existing:
+            stored_values = _salary_values(existing)
+            for key, value in salary_data.items():
+                setattr(existing, key, value)
+            existing.save()
+            return existing, 'updated' if _salary_values(existing) != stored_values else 'unchanged'
+        else:
+            return CalculatedSalary.objects.create(tenant=employee.tenant, **salary_data), 'calculated'
+    
+    @staticmethod
+    def _build_salary_data(payroll_period: PayrollPeriod, employee: EmployeeProfile, attendance_data: dict,
+                           advance_balance: Decimal, holidays: dict = None) -> dict:
+        """Build the CalculatedSalary field values for one employee from already-loaded inputs"""
         
         # Calculate per-hour and per-minute rates
         basic_salary = employee.basic_salary or Decimal('0')
         # Use employee-specific working days instead of period working days
         working_days = SalaryCalculationService._calculate_employee_working_days(
-            employee, payroll_period.year, payroll_period.month
+            employee, payroll_period.year, payroll_period.month, holidays
         )
         hours_per_day = 8  # Standard working hours
         minutes_per_day = hours_per_day * 60
@@ -267,15 +494,7 @@ class SalaryCalculationService:
             'total_advance_balance': advance_balance,
             'data_source': payroll_period.data_source,
         }
-        
-        # Create or update calculated salary
-        if existing:
-            for key, value in salary_data.items():
-                setattr(existing, key, value)
-            existing.save()
-            return existing
-        else:
-            return CalculatedSalary.objects.create(tenant=employee.tenant, **salary_data)
+        return salary_data
     
     @staticmethod
     def _get_attendance_data(employee: EmployeeProfile, year: int, month: str, force_calculate_partial: bool = False) -> dict:
@@ -283,17 +502,133 @@ class SalaryCalculationService:
         Get attendance data from either uploaded or frontend sources
         Enhanced to support force calculation for partial months
         """
-        from datetime import date, datetime
+        inputs = SalaryCalculationService._load_period_inputs(
+            employee.tenant, year, month, [employee], force_calculate_partial
+        )
+        return SalaryCalculationService._get_attendance_data_from_inputs(
+            employee, year, month, inputs, force_calculate_partial
+        )
+    
+    @staticmethod
+    def _load_period_inputs(tenant, year: int, month: str, employees, force_calculate_partial: bool = False) -> dict:
+        """
+        Load every salary input for the given employees with one query per source.
         
+        The number of queries does not depend on the number of employees. All
+        results are dicts keyed by employee_id so the salaries can then be
+        calculated in memory.
+        """
         month_num = SalaryCalculationService._get_month_number(month)
+        employee_ids = [employee.employee_id for employee in employees if employee.employee_id]
+        # A single employee (the per-employee path) is looked up by equality
+        if len(employee_ids) == 1:
+            employee_filter = {'employee_id': employee_ids[0]}
+        else:
+            employee_filter = {'employee_id__in': employee_ids}
+        
+        inputs = {
+            'salary_records': {},
+            'summaries': {},
+            'attendance_records': {},
+            'daily_totals': {},
+            'advance_balances': {},
+            'holidays': tenant_holidays(tenant.id),
+        }
+        if not employee_ids:
+            return inputs
+        
+        # Daily attendance comes from the monthly bitmaps: one row per employee
+        first_day = {}
+        last_day = DAYS
+        if force_calculate_partial:
+            # Partial months only count days between the joining date (if it falls in
+            # this month) and the period end date, which is the same for everyone
+            month_start = date(year, month_num, 1)
+            for employee in employees:
+                start_date, end_date = SalaryCalculationService._get_partial_period_bounds(employee, year, month_num)
+                if start_date > month_start:
+                    first_day[employee.employee_id] = start_date.day
+                last_day = end_date.day
+        else:
+            inputs['salary_records'] = {
+                record.employee_id: record for record in SalaryData.objects.filter(
+                    tenant=tenant,
+                    **employee_filter,
+                    year=year,
+                    month=month
+                )
+            }
+            inputs['summaries'] = {
+                summary.employee_id: summary for summary in MonthlyAttendanceSummary.objects.filter(
+                    tenant=tenant,
+                    **employee_filter,
+                    year=year,
+                    month=month_num,
+                )
+            }
+            # Keep the latest record per employee (Attendance default ordering)
+            for record in Attendance.objects.filter(
+                tenant=tenant,
+                **employee_filter,
+                **month_range_filter(year, month_num),
+            ).order_by('employee_id', '-date', 'name'):
+                inputs['attendance_records'].setdefault(record.employee_id, record)
+        
+        bitmaps = {
+            bitmap.employee_id: bitmap for bitmap in MonthlyAttendanceBitmap.objects.filter(
+                tenant=tenant,
+                **employee_filter,
+                year=year,
+                month=month_num,
+            )
+        }
+        # Bitmaps are rewritten after the attendance commit. When that fails the
+        # employee-months are queued for a summary rebuild; until it has run
+        # they are encoded from DailyAttendance instead
+        pending = pending_summary_rebuilds(tenant.id, year, month_num)
+        stale_ids = employee_ids if pending is None else [
+            employee_id for employee_id in employee_ids if employee_id in pending
+        ]
+        if stale_ids:
+            logger.warning(
+                f"Attendance bitmaps of {len(stale_ids)} employees for {month} {year} wait for a rebuild; "
+                f"reading their DailyAttendance rows"
+            )
+            # Employees whose attendance was all deleted get no bitmap
+            for employee_id in stale_ids:
+                bitmaps.pop(employee_id, None)
+            bitmaps.update(encode_month_from_attendance(tenant.id, year, month_num, stale_ids))
+        
+        # PRESENT and PAID_LEAVE count as 1, HALF_DAY as 0.5; ABSENT is only the explicit entries
+        for bitmap in bitmaps.values():
+            totals = range_totals(bitmap, first_day.get(bitmap.employee_id, 1), last_day)
+            if totals['days_recorded']:
+                inputs['daily_totals'][bitmap.employee_id] = {
+                    'present_full': totals['present_full'],
+                    'half_count': totals['half_count'],
+                    'absent_count': totals['absent_count'],
+                    'total_ot': totals['ot_hours'],
+                    'total_late': totals['late_minutes'],
+                }
+        
+        inputs['advance_balances'] = get_advance_balances(tenant, employee_ids)
+        
+        return inputs
+    
+    @staticmethod
+    def _get_attendance_data_from_inputs(employee: EmployeeProfile, year: int, month: str, inputs: dict,
+                                         force_calculate_partial: bool = False) -> dict:
+        """
+        Resolve an employee's attendance data from inputs loaded by _load_period_inputs.
+        Sources are tried in order: uploaded SalaryData, MonthlyAttendanceSummary,
+        Attendance and finally the daily attendance totals (from the monthly bitmaps).
+        """
+        employee_id = employee.employee_id
+        daily_totals = inputs['daily_totals'].get(employee_id)
+        holidays = inputs['holidays']
         
         # First, try to get from uploaded SalaryData
-        salary_record = SalaryData.objects.filter(
-            tenant=employee.tenant,
-            employee_id=employee.employee_id,
-            year=year,
-            month=month
-        ).first()
+        salary_record = inputs['salary_records'].get(employee_id)
         
         if salary_record and not force_calculate_partial:
             # Use uploaded data for full month calculation
@@ -306,30 +641,17 @@ class SalaryCalculationService:
             }
         
         # Next try the pre-aggregated MonthlyAttendanceSummary (fast path)
-        summary = MonthlyAttendanceSummary.objects.filter(
-            tenant=employee.tenant,
-            employee_id=employee.employee_id,
-            year=year,
-            month=month_num,
-        ).first()
+        summary = inputs['summaries'].get(employee_id)
 
         if summary and not force_calculate_partial:
             employee_working_days = SalaryCalculationService._calculate_employee_working_days(
-                employee, year, month
+                employee, year, month, holidays
             )
 
             # Only count explicitly logged absences, not assumed ones based on missing attendance
             # If an employee has some attendance records, absent_days should only count explicit ABSENT entries
             # For employees with no records at all, both present and absent should be 0
-            
-            # Get count of explicit ABSENT entries for this employee/month
-            explicit_absent_count = DailyAttendance.objects.filter(
-                tenant=employee.tenant,
-                employee_id=employee.employee_id,
-                date__year=year,
-                date__month=SalaryCalculationService._get_month_number(month),
-                attendance_status='ABSENT'
-            ).count()
+            explicit_absent_count = daily_totals['absent_count'] if daily_totals else 0
 
             return {
                 'total_working_days': employee_working_days,
@@ -340,16 +662,11 @@ class SalaryCalculationService:
             }
         
         # If MonthlyAttendanceSummary doesn't have data, try the Attendance model (monthly summary format)
-        attendance_record = Attendance.objects.filter(
-            tenant=employee.tenant,
-            employee_id=employee.employee_id,
-            date__year=year,
-            date__month=month_num,
-        ).first()
+        attendance_record = inputs['attendance_records'].get(employee_id)
 
         if attendance_record and not force_calculate_partial:
             employee_working_days = SalaryCalculationService._calculate_employee_working_days(
-                employee, year, month
+                employee, year, month, holidays
             )
 
             return {
@@ -360,56 +677,34 @@ class SalaryCalculationService:
                 'late_minutes': attendance_record.late_minutes,
             }
         
-        # Otherwise, fall back to on-the-fly aggregation of DailyAttendance
-        from django.db.models import Sum
-
-        # Determine start & end dates for the period (supports partial month when force_calculate_partial=True)
+        # Otherwise, fall back to the aggregated DailyAttendance totals
         if force_calculate_partial:
-            current_date = date.today()
-            start_date = employee.date_of_joining if (
-                employee.date_of_joining
-                and employee.date_of_joining.year == year
-                and employee.date_of_joining.month == month_num
-            ) else date(year, month_num, 1)
-
-            end_date = current_date if (year == current_date.year and month_num == current_date.month) else date(
-                year, month_num, (date(year, month_num, 1).replace(day=28) + timedelta(days=4)).day
-            )
+            month_num = SalaryCalculationService._get_month_number(month)
+            start_date, end_date = SalaryCalculationService._get_partial_period_bounds(employee, year, month_num)
 
             employee_working_days = SalaryCalculationService._calculate_employee_working_days_for_period(
-                employee, start_date, end_date
+                employee, start_date, end_date, holidays
             )
         else:
-            employee_working_days = SalaryCalculationService._calculate_employee_working_days(employee, year, month)
-
-        daily_qs = DailyAttendance.objects.filter(
-            tenant=employee.tenant,
-            employee_id=employee.employee_id,
-            date__year=year,
-            date__month=month_num,
-        )
-
-        if force_calculate_partial:
-            daily_qs = daily_qs.filter(date__range=[start_date, end_date])
+            employee_working_days = SalaryCalculationService._calculate_employee_working_days(
+                employee, year, month, holidays
+            )
 
-        if daily_qs.exists():
-            present_full = daily_qs.filter(attendance_status__in=["PRESENT", "PAID_LEAVE"]).count()
-            half_count = daily_qs.filter(attendance_status="HALF_DAY").count()
-            total_present = present_full + (half_count * 0.5)
+        if daily_totals:
+            half_count = daily_totals['half_count']
+            total_present = daily_totals['present_full'] + (half_count * 0.5)
             
             # Count only explicit ABSENT entries, not missing days
-            explicit_absent = daily_qs.filter(attendance_status="ABSENT").count()
+            explicit_absent = daily_totals['absent_count']
             # Add half day absences
             explicit_absent += half_count * 0.5
 
-            aggregates = daily_qs.aggregate(total_ot=Sum("ot_hours"), total_late=Sum("late_minutes"))
-
             return {
                 'total_working_days': employee_working_days,
                 'present_days': Decimal(str(total_present)),
                 'absent_days': Decimal(str(explicit_absent)),  # Only explicit absences
-                'ot_hours': aggregates["total_ot"] or Decimal('0'),
-                'late_minutes': aggregates["total_late"] or 0,
+                'ot_hours': daily_totals['total_ot'] or Decimal('0'),
+                'late_minutes': daily_totals['total_late'] or 0,
             }
         
         # Default values if no data found - assume no attendance logged
@@ -423,43 +718,35 @@ class SalaryCalculationService:
         }
     
     @staticmethod
-    def _calculate_employee_working_days_for_period(employee: 'EmployeeProfile', start_date, end_date) -> int:
+    def _get_partial_period_bounds(employee: EmployeeProfile, year: int, month_num: int):
+        """Start & end dates used when calculating a partial month for an employee"""
+        current_date = date.today()
+        start_date = employee.date_of_joining if (
+            employee.date_of_joining
+            and employee.date_of_joining.year == year
+            and employee.date_of_joining.month == month_num
+        ) else date(year, month_num, 1)
+
+        end_date = current_date if (year == current_date.year and month_num == current_date.month) else date(
+            year, month_num, (date(year, month_num, 1).replace(day=28) + timedelta(days=4)).day
+        )
+        return start_date, end_date
+    
+    @staticmethod
+    def _calculate_employee_working_days_for_period(employee: 'EmployeeProfile', start_date, end_date,
+                                                    holidays: dict = None) -> int:
         """
         Calculate working days for a specific employee for a date range considering their off days
+        and the tenant's holidays (looked up when not passed in)
         """
-        # Get employee's off days
-        off_days = []
-        if employee.off_monday: off_days.append(0)  # Monday
-        if employee.off_tuesday: off_days.append(1)  # Tuesday
-        if employee.off_wednesday: off_days.append(2)  # Wednesday
-        if employee.off_thursday: off_days.append(3)  # Thursday
-        if employee.off_friday: off_days.append(4)  # Friday
-        if employee.off_saturday: off_days.append(5)  # Saturday
-        if employee.off_sunday: off_days.append(6)  # Sunday
-        
-        # Count working days for this employee in the date range
-        working_days = 0
-        current_date = start_date
-        
-        while current_date <= end_date:
-            # Check if this day is not in employee's off days
-            if current_date.weekday() not in off_days:
-                working_days += 1
-            current_date = current_date + timedelta(days=1)
-        
-        return working_days
+        if holidays is None:
+            holidays = tenant_holidays(employee.tenant_id)
+        return employee_working_days_between(employee, start_date, end_date, holidays)
     
     @staticmethod
-    def _get_advance_balance(employee_id: str) -> Decimal:
-        """Calculate current advance balance for an employee"""
-        
-        # Sum all advances with PENDING or PARTIALLY_PAID status using remaining_balance
-        total_advances = AdvanceLedger.objects.filter(
-            employee_id=employee_id,
-            status__in=['PENDING', 'PARTIALLY_PAID']
-        ).aggregate(total=Sum('remaining_balance'))['total'] or Decimal('0')
-        
-        return total_advances
+    def _get_advance_balance(tenant, employee_id: str) -> Decimal:
+        """Current advance balance for an employee (from the materialized balance table)"""
+        return get_advance_balance(tenant, employee_id)
     
     @staticmethod
     def update_advance_deduction(tenant, payroll_period_id: int, employee_id: str, new_amount: Decimal, admin_user: str):
@@ -497,6 +784,153 @@ class SalaryCalculationService:
         
         return calculated_salary
     
+    @staticmethod
+    def _direct_entry_values(entry: dict) -> dict:
+        """
+        CalculatedSalary values for one payroll_entries item, rounded to the
+        column precision so they compare equal to what is stored
+        """
+        def amount(key):
+            value = entry.get(key)
+            try:
+                return Decimal(str(value)) if value not in (None, '') else Decimal('0')
+            except InvalidOperation:
+                raise ValueError(f"Invalid {key} for employee {entry.get('employee_id')}: {value!r}")
+        
+        gross = amount('gross_salary')
+        ot_charges = amount('ot_charges')
+        late_deduction = amount('late_deduction')
+        tds_amount = amount('tds_amount')
+        values = {
+            'employee_name': entry.get('employee_name') or '',
+            'department': entry.get('department'),
+            'basic_salary': amount('base_salary'),
+            'employee_tds_rate': amount('tds_percentage'),
+            'total_working_days': int(amount('working_days')),
+            'present_days': amount('present_days'),
+            'absent_days': amount('absent_days'),
+            'ot_hours': amount('ot_hours'),
+            'late_minutes': int(amount('late_minutes')),
+            'salary_for_present_days': gross,
+            'ot_charges': ot_charges,
+            'late_deduction': late_deduction,
+            'gross_salary': gross + ot_charges - late_deduction,
+            'tds_amount': tds_amount,
+            'salary_after_tds': gross + ot_charges - late_deduction - tds_amount,
+            'total_advance_balance': amount('total_advance_balance'),
+            'advance_deduction_amount': amount('advance_deduction'),
+            'remaining_advance_balance': amount('remaining_balance'),
+            'net_payable': amount('net_salary'),
+        }
+        return {name: _column_value(name, value) for name, value in values.items()}
+    
+    @staticmethod
+    def save_direct_entries(tenant, payroll_period: PayrollPeriod, payroll_entries: list) -> dict:
+        """
+        Store payroll_entries as the period's CalculatedSalary rows without recalculating.
+        
+        Rows are diffed against what is stored: only new and changed employees
+        are written (in chunks) and only employees missing from the payload are
+        deleted, so unchanged rows, and the payment state of every row, survive
+        a save. is_paid is only changed when an entry carries it.
+        
+        Returns counts of inserted, updated, unchanged and deleted rows.
+        """
+        entries = {}
+        for entry in payroll_entries:
+            employee_id = entry.get('employee_id')
+            if employee_id:
+                # A repeated employee keeps its last entry
+                entries[str(employee_id)] = entry
+        
+        existing_salaries = {
+            salary.employee_id: salary
+            for salary in CalculatedSalary.objects.filter(tenant=tenant, payroll_period=payroll_period)
+        }
+        
+        now = timezone.now()
+        today = timezone.localdate()
+        salaries_to_create = []
+        salaries_to_update = []
+        unchanged = 0
+        for employee_id, entry in entries.items():
+            values = SalaryCalculationService._direct_entry_values(entry)
+            is_paid = bool(entry['is_paid']) if 'is_paid' in entry else None
+            
+            salary = existing_salaries.get(employee_id)
+            if salary is None:
+                salary = CalculatedSalary(
+                    tenant=tenant,
+                    payroll_period=payroll_period,
+                    employee_id=employee_id,
+                    basic_salary_per_hour=0,
+                    basic_salary_per_minute=0,
+                    employee_ot_rate=0,
+                    advance_deduction_editable=True,
+                    data_source='FRONTEND',
+                    is_paid=bool(is_paid),
+                    payment_date=today if is_paid else None,
+                    calculation_timestamp=now,
+                    **values,
+                )
+                salaries_to_create.append(salary)
+                continue
+            
+            changed = [name for name, value in values.items() if getattr(salary, name) != value]
+            if is_paid is not None and is_paid != salary.is_paid:
+                changed.append('is_paid')
+            if not changed:
+                unchanged += 1
+                continue
+            
+            for name, value in values.items():
+                setattr(salary, name, value)
+            if is_paid is not None and is_paid != salary.is_paid:
+                salary.is_paid = is_paid
+                salary.payment_date = (salary.payment_date or today) if is_paid else None
+            salary.advance_deduction_editable = True
+            salary.data_source = 'FRONTEND'
+            # bulk_update() does not apply auto_now
+            salary.calculation_timestamp = now
+            salary.updated_at = now
+            salaries_to_update.append(salary)
+        
+        removed_ids = [employee_id for employee_id in existing_salaries if employee_id not in entries]
+        write_fields = DIRECT_SAVE_VALUE_FIELDS + [
+            'advance_deduction_editable', 'data_source', 'is_paid', 'payment_date',
+            'calculation_timestamp', 'updated_at',
+        ]
+        
+        # QuerySet.delete() sends post_delete for every row; inside the batch
+        # those and the bulk writes refresh the period's rollup only once
+        with transaction.atomic(), batch_rollup_refreshes():
+            if removed_ids:
+                CalculatedSalary.objects.filter(
+                    tenant=tenant, payroll_period=payroll_period, employee_id__in=removed_ids
+                ).delete()
+            if salaries_to_create:
+                # Upsert so a row inserted concurrently for the same employee is updated, not duplicated
+                CalculatedSalary.objects.bulk_create(
+                    salaries_to_create,
+                    batch_size=BULK_WRITE_BATCH_SIZE,
+                    update_conflicts=True,
+                    unique_fields=['tenant', 'payroll_period', 'employee_id'],
+                    update_fields=write_fields,
+                )
+            if salaries_to_update:
+                CalculatedSalary.objects.bulk_update(
+                    salaries_to_update, write_fields, batch_size=BULK_WRITE_BATCH_SIZE
+                )
+            if salaries_to_create or salaries_to_update:
+                schedule_rollup_refresh([payroll_period.id])
+        
+        return {
+            'inserted': len(salaries_to_create),
+            'updated': len(salaries_to_update),
+            'unchanged': unchanged,
+            'deleted': len(removed_ids),
+        }
+    
     @staticmethod
     def lock_payroll_period(tenant, payroll_period_id: int):
         """Lock a payroll period to prevent further modifications"""
@@ -508,53 +942,24 @@ class SalaryCalculationService:
     @staticmethod
     def mark_salary_as_paid(tenant, calculated_salary_id: int, payment_date: date = None):
         """Mark a calculated salary as paid and update advance ledger status"""
-        from .models import AdvanceLedger
-        
-        calculated_salary = CalculatedSalary.objects.get(tenant=tenant, id=calculated_salary_id)
-        calculated_salary.is_paid = True
-        calculated_salary.payment_date = payment_date or date.today()
-        calculated_salary.save()
-        
-        # Update advance ledger status based on advance deduction
-        if calculated_salary.advance_deduction_amount > 0:
-            # Get all pending advances for this employee
-            pending_advances = AdvanceLedger.objects.filter(
-                tenant=tenant,
-                employee_id=calculated_salary.employee_id,
-                status__in=['PENDING','PARTIALLY_PAID']
-            ).order_by('advance_date')  # Process oldest advances first
-            
-            remaining_deduction = calculated_salary.advance_deduction_amount
+        with transaction.atomic():
+            calculated_salary = CalculatedSalary.objects.get(tenant=tenant, id=calculated_salary_id)
+            calculated_salary.is_paid = True
+            calculated_salary.payment_date = payment_date or date.today()
+            calculated_salary.save()
             
-            for advance in pending_advances:
-                if remaining_deduction <= 0:
-                    break
-                    
-                current_balance = advance.remaining_balance
-                if current_balance <= remaining_deduction:
-                    # This advance is fully paid
-                    advance.status = 'REPAID'
-                    advance.remaining_balance = Decimal('0')
-                    advance.save()
-                    remaining_deduction -= current_balance
-                else:
-                    # This advance is partially paid - reduce the remaining_balance
-                    advance.remaining_balance -= remaining_deduction
-                    advance.status = 'PARTIALLY_PAID'
-                    advance.save()
-                    remaining_deduction = 0
+            # Repay the employee's oldest advances first with the deducted amount
+            if calculated_salary.advance_deduction_amount > 0:
+                apply_advance_repayments(
+                    tenant.id, {calculated_salary.employee_id: calculated_salary.advance_deduction_amount}
+                )
         
         return calculated_salary
     
     @staticmethod
     def _get_month_number(month_name: str) -> int:
         """Convert month name to number"""
-        month_mapping = {
-            'JANUARY': 1, 'FEBRUARY': 2, 'MARCH': 3, 'APRIL': 4,
-            'MAY': 5, 'JUNE': 6, 'JULY': 7, 'AUGUST': 8,
-            'SEPTEMBER': 9, 'OCTOBER': 10, 'NOVEMBER': 11, 'DECEMBER': 12
-        }
-        return month_mapping.get(month_name.upper(), 1)
+        return month_number(month_name) or 1
     
     @staticmethod
     def get_salary_summary(tenant, payroll_period_id: int):
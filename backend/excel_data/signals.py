@@ -1,6 +1,10 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.db import transaction
 from django.dispatch import receiver
-from .models import DailyAttendance, Attendance, AdvanceLedger, Payment, SalaryData, MonthlyAttendanceSummary, EmployeeProfile
+from .models import (
+    DailyAttendance, Attendance, AdvanceLedger, Payment, SalaryData, MonthlyAttendanceSummary, EmployeeProfile,
+    CalculatedSalary, TenantHoliday, PayrollPeriod,
+)
 from django.db.models import Sum
 from datetime import date
 from decimal import Decimal
@@ -49,49 +53,210 @@ def update_total_advance_on_payment(sender, instance, **kwargs):
     SalaryData.objects.filter(employee_id=employee_id).update(total_advance=total_advance - total_deduction)
 """
 
+def _is_cascade(sender, origin):
+    """True when a delete was started by another model (e.g. deleting the tenant)"""
+    return origin is not None and getattr(origin, 'model', type(origin)) is not sender
+
+
+@receiver([post_save, post_delete], sender=DailyAttendance)
+def update_monthly_attendance_summary(sender, instance, origin=None, **kwargs):
+    """
+    Maintain per-employee MonthlyAttendanceSummary aggregates. The month is
+    only queued here; all months touched in the transaction are refreshed
+    together when it commits (see services/attendance_summary_service.py).
+    """
+    from .services.attendance_summary_service import schedule_summary_refresh
+    if _is_cascade(sender, origin):
+        return
+    schedule_summary_refresh(
+        instance.tenant_id, [(instance.employee_id, instance.date.year, instance.date.month)]
+    )
+
+
+# ---------------------------------------------------------------------------
+# Payroll change tracking – mark employees whose payroll inputs changed so
+# incremental recalculation only touches their CalculatedSalary rows.
+# ---------------------------------------------------------------------------
+
+# EmployeeProfile fields that feed into salary calculation
+# (ot_charge_per_hour is derived from basic_salary on save)
+PAYROLL_PROFILE_FIELDS = [
+    'basic_salary', 'tds_percentage', 'date_of_joining',
+    'off_monday', 'off_tuesday', 'off_wednesday', 'off_thursday',
+    'off_friday', 'off_saturday', 'off_sunday',
+]
+
+
+def _log_tracking_error(exc):
+    import logging
+    logging.getLogger(__name__).error(f"Failed to record payroll change: {exc}")
+
+
 @receiver([post_save, post_delete], sender=DailyAttendance)
-def update_monthly_attendance_summary(sender, instance, **kwargs):
-    """Maintain per-employee MonthlyAttendanceSummary aggregates."""
+@receiver([post_save, post_delete], sender=Attendance)
+@receiver([post_save, post_delete], sender=MonthlyAttendanceSummary)
+def mark_payroll_dirty_on_attendance_change(sender, instance, origin=None, **kwargs):
+    """
+    Attendance changes only affect the month they belong to. The key is only
+    queued here; the markers of a transaction are written when it commits.
+    """
+    from .services.payroll_change_tracker import schedule_dirty_marks
+    if _is_cascade(sender, origin):
+        return
+    if sender in (DailyAttendance, Attendance):
+        key = (instance.employee_id, instance.date.year, instance.date.month)
+    else:
+        key = (instance.employee_id, instance.year, instance.month)
+    schedule_dirty_marks(instance.tenant_id, [key], reason='attendance')
+
+
+@receiver([post_save, post_delete], sender=SalaryData)
+def mark_payroll_dirty_on_salary_data_change(sender, instance, origin=None, **kwargs):
+    from .services.payroll_change_tracker import mark_employees_dirty
+    if _is_cascade(sender, origin):
+        return
+    try:
+        # Savepoint, so a failed marker doesn't abort the caller's transaction
+        with transaction.atomic():
+            mark_employees_dirty(
+                instance.tenant_id, [(instance.employee_id, instance.year, instance.month)], reason='salary_data'
+            )
+    except Exception as exc:
+        _log_tracking_error(exc)
+
+
+@receiver([post_save, post_delete], sender=AdvanceLedger)
+def mark_payroll_dirty_on_advance_change(sender, instance, origin=None, **kwargs):
+    """Advance balances are employee-wide, so every open period is affected."""
+    from .services.payroll_change_tracker import mark_employees_dirty_for_open_periods
+    if _is_cascade(sender, origin):
+        return
+    try:
+        with transaction.atomic():
+            mark_employees_dirty_for_open_periods(instance.tenant_id, [instance.employee_id], reason='advance')
+    except Exception as exc:
+        _log_tracking_error(exc)
+
+
+@receiver(pre_save, sender=AdvanceLedger)
+def capture_advance_employee(sender, instance, **kwargs):
+    """Remember the stored employee_id so a reassigned advance also refreshes the old balance."""
+    instance._employee_id_before = None
+    if instance.pk:
+        instance._employee_id_before = AdvanceLedger.all_objects.filter(
+            pk=instance.pk
+        ).values_list('employee_id', flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=AdvanceLedger)
+def refresh_advance_balance(sender, instance, origin=None, **kwargs):
+    """
+    Keep EmployeeAdvanceBalance in step with the ledger. Runs in the caller's
+    transaction and is not soft-failed: a ledger write without its balance
+    update should roll back. Advances removed by deleting their tenant are
+    skipped; the balances are deleted with it.
+    """
+    from .services.advance_balance_service import refresh_advance_balances
+    if _is_cascade(sender, origin):
+        return
+    refresh_advance_balances(
+        instance.tenant_id,
+        [instance.employee_id, getattr(instance, '_employee_id_before', None)],
+    )
+
+
+@receiver(pre_save, sender=EmployeeProfile)
+def capture_employee_payroll_fields(sender, instance, **kwargs):
+    """Remember the stored payroll fields so post_save can tell whether they changed."""
+    instance._payroll_fields_before = None
+    if not instance.pk:
+        return
+    try:
+        instance._payroll_fields_before = EmployeeProfile.all_objects.filter(
+            pk=instance.pk
+        ).values(*PAYROLL_PROFILE_FIELDS).first()
+    except Exception as exc:
+        _log_tracking_error(exc)
+
+
+@receiver(post_save, sender=EmployeeProfile)
+def mark_payroll_dirty_on_employee_change(sender, instance, created, **kwargs):
+    from .services.payroll_change_tracker import mark_employees_dirty_for_open_periods
+    before = getattr(instance, '_payroll_fields_before', None)
+    if created or not before:
+        # New employees have no calculations yet; incremental runs always include them
+        return
+    if all(before[field] == getattr(instance, field) for field in PAYROLL_PROFILE_FIELDS):
+        return
+    try:
+        with transaction.atomic():
+            mark_employees_dirty_for_open_periods(instance.tenant_id, [instance.employee_id], reason='employee')
+    except Exception as exc:
+        _log_tracking_error(exc)
+
+
+@receiver(pre_save, sender=PayrollPeriod)
+def capture_period_tds_rate(sender, instance, **kwargs):
+    """Remember the stored tds_rate so post_save can tell whether it changed."""
+    instance._tds_rate_before = None
+    if not instance.pk:
+        return
+    try:
+        instance._tds_rate_before = PayrollPeriod.all_objects.filter(pk=instance.pk).values_list(
+            'tds_rate', flat=True
+        ).first()
+    except Exception as exc:
+        _log_tracking_error(exc)
+
+
+@receiver(post_save, sender=PayrollPeriod)
+def mark_payroll_dirty_on_period_change(sender, instance, created, **kwargs):
+    """The period tds_rate applies to every employee without their own TDS percentage."""
+    from .services.payroll_change_tracker import mark_period_dirty
+    before = getattr(instance, '_tds_rate_before', None)
+    if created or before is None or before == instance.tds_rate:
+        return
+    try:
+        with transaction.atomic():
+            mark_period_dirty(instance, reason='tds_rate')
+    except Exception as exc:
+        _log_tracking_error(exc)
+
+
+@receiver([post_save, post_delete], sender=CalculatedSalary)
+def refresh_payroll_period_rollup(sender, instance, origin=None, **kwargs):
+    """
+    Keep PayrollPeriodRollup in step with single-row salary writes (bulk writers
+    refresh it themselves). Runs in the caller's transaction and is not
+    soft-failed; inside batch_rollup_refreshes() the period is refreshed once
+    when the block exits. Salaries removed by a cascade (deleting their period
+    or tenant) are skipped: the rollup goes with the period.
+    """
+    from .services.payroll_rollup_service import schedule_rollup_refresh
+    if _is_cascade(sender, origin):
+        return
+    schedule_rollup_refresh([instance.payroll_period_id])
+
+
+@receiver(pre_save, sender=TenantHoliday)
+def capture_holiday_date(sender, instance, **kwargs):
+    """Remember the stored date so moving a holiday also invalidates the old day."""
+    instance._date_before = None
+    if instance.pk:
+        instance._date_before = TenantHoliday.all_objects.filter(pk=instance.pk).values_list(
+            'date', flat=True
+        ).first()
+
+
+@receiver([post_save, post_delete], sender=TenantHoliday)
+def refresh_tenant_holidays(sender, instance, origin=None, **kwargs):
+    """Drop the cached holiday calendar and mark the affected months' payroll dirty."""
+    from .services.holiday_service import holidays_changed
+    if _is_cascade(sender, origin):
+        return
+    dates = {instance.date, getattr(instance, '_date_before', None)} - {None}
     try:
-        tenant = instance.tenant
-        year = instance.date.year
-        month = instance.date.month
-        employee_id = instance.employee_id
-
-        # Pull all daily attendance rows for the employee for the same month
-        qs = DailyAttendance.objects.filter(
-            tenant=tenant,
-            employee_id=employee_id,
-            date__year=year,
-            date__month=month,
-        )
-
-        # Present counts: PRESENT and PAID_LEAVE count as 1, HALF_DAY as 0.5
-        present_full = qs.filter(attendance_status__in=["PRESENT", "PAID_LEAVE"]).count()
-        half_days = qs.filter(attendance_status="HALF_DAY").count()
-        total_present = present_full + (half_days * 0.5)
-
-        # Aggregate OT & late minutes
-        aggregate_vals = qs.aggregate(
-            ot_sum=Sum("ot_hours"),
-            late_sum=Sum("late_minutes"),
-        )
-        ot_hours = aggregate_vals["ot_sum"] or Decimal("0")
-        late_minutes = aggregate_vals["late_sum"] or 0
-
-        # Upsert summary
-        MonthlyAttendanceSummary.objects.update_or_create(
-            tenant=tenant,
-            employee_id=employee_id,
-            year=year,
-            month=month,
-            defaults={
-                "present_days": Decimal(str(total_present)),
-                "ot_hours": ot_hours,
-                "late_minutes": late_minutes,
-            },
-        )
+        with transaction.atomic():
+            holidays_changed(instance.tenant_id, dates)
     except Exception as exc:
-        # Soft-fail – we don't want attendance updates to break
-        import logging
-        logging.getLogger(__name__).error(f"Failed to update MonthlyAttendanceSummary: {exc}") 
\ No newline at end of file
+        _log_tracking_error(exc)
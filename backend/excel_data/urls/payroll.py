@@ -6,7 +6,7 @@ from ..views import (
     get_months_with_attendance, calculate_simple_payroll, calculate_simple_payroll_ultra_fast,
     update_payroll_entry, mark_payroll_paid, payroll_overview, create_current_month_payroll,
     payroll_period_detail, add_employee_advance, auto_payroll_settings, manual_calculate_payroll,
-    save_payroll_period_direct, bulk_update_payroll_period
+    save_payroll_period_direct, bulk_update_payroll_period, payroll_job_status
 )
 
 urlpatterns = [
@@ -34,6 +34,7 @@ urlpatterns = [
     # Auto payroll calculation endpoints
     path('auto-payroll-settings/', auto_payroll_settings, name='auto-payroll-settings'),
     path('manual-calculate-payroll/', manual_calculate_payroll, name='manual-calculate-payroll'),
+    path('payroll-jobs/<int:job_id>/', payroll_job_status, name='payroll-job-status'),
 
     # Direct payroll save endpoint
     path('save-payroll-period-direct/', save_payroll_period_direct, name='save-payroll-period-direct'),
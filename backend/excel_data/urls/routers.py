@@ -6,6 +6,7 @@ from ..views import (
     AttendanceViewSet, DailyAttendanceViewSet, AdvanceLedgerViewSet,
     PaymentViewSet, UserManagementViewSet, UserInvitationViewSet,
     PayrollPeriodViewSet, CalculatedSalaryViewSet, AdvancePaymentViewSet,
+    TenantHolidayViewSet,
 )
 
 router = DefaultRouter()
@@ -14,6 +15,7 @@ router.register(r'salary-data', SalaryDataViewSet, basename='salarydata')
 router.register(r'employees', EmployeeProfileViewSet, basename='employee')
 router.register(r'attendance', AttendanceViewSet, basename='attendance')
 router.register(r'daily-attendance', DailyAttendanceViewSet, basename='dailyattendance')
+router.register(r'holidays', TenantHolidayViewSet, basename='tenantholiday')
 router.register(r'advance-ledger', AdvanceLedgerViewSet, basename='advanceledger')
 router.register(r'payments', PaymentViewSet, basename='payment')
 router.register(r'users', UserManagementViewSet, basename='user-management')
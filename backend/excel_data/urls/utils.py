@@ -2,9 +2,9 @@ from django.urls import path
 
 from ..views import (
     dashboard_stats, cleanup_salary_data, health_check, get_dropdown_options,
-    calculate_ot_rate, attendance_status, bulk_update_attendance,
-    update_monthly_summaries_parallel, get_eligible_employees_for_date,
-    CleanupTokensView
+    calculate_ot_rate, attendance_status, bulk_update_attendance, bulk_update_attendance_multi_date,
+    update_monthly_summaries_parallel, background_job_status, run_queued_jobs, get_eligible_employees_for_date,
+    employee_attendance_calendar, CleanupTokensView
 )
 
 urlpatterns = [
@@ -15,6 +15,14 @@ urlpatterns = [
     path('calculate-ot/', calculate_ot_rate, name='calculate-ot'),
     path('attendance-status/', attendance_status, name='attendance-status'),
     path('bulk-update-attendance/', bulk_update_attendance, name='bulk-update-attendance'),
+    path('bulk-update-attendance/multi-date/', bulk_update_attendance_multi_date, name='bulk-update-attendance-multi-date'),
     path('update-monthly-summaries/', update_monthly_summaries_parallel, name='update-monthly-summaries'),
+    path('jobs/<int:job_id>/', background_job_status, name='background-job-status'),
+    path('jobs/run/', run_queued_jobs, name='run-queued-jobs'),
     path('eligible-employees/', get_eligible_employees_for_date, name='eligible-employees'),
+    path(
+        'employees/<str:employee_id>/attendance-calendar/',
+        employee_attendance_calendar,
+        name='employee-attendance-calendar',
+    ),
 ]
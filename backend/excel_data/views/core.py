@@ -6,6 +6,7 @@
 # - DailyAttendanceViewSet
 # - AdvanceLedgerViewSet
 # - PaymentViewSet
+# - TenantHolidayViewSet
 
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
@@ -13,6 +14,7 @@ from rest_framework import status, viewsets, filters
 from rest_framework.decorators import action
 from ..models import EmployeeProfile
 import time
+import uuid
 from django.db.models import Sum, Avg, Count
 from rest_framework.permissions import IsAuthenticated
 import logging
@@ -29,6 +31,7 @@ from ..models import (
     Payment,
     CalculatedSalary,
     MonthlyAttendanceSummary,
+    TenantHoliday,
 )
 
 from ..serializers import (
@@ -39,6 +42,7 @@ from ..serializers import (
     EmployeeFormSerializer,
     AttendanceSerializer,
     DailyAttendanceSerializer,
+    TenantHolidaySerializer,
     AdvanceLedgerSerializer,
     PaymentSerializer,
 
@@ -259,38 +263,22 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
             })
         
         # Get all payroll periods for this tenant (ordered by actual calendar date)
-        from django.db.models import Case, When, IntegerField
+        from django.db.models import F
+        from ..services.calendar_service import add_months, month_number
         
         payroll_periods_start = time.time()
         
-        # Define month ordering (complete mapping)
-        month_order = {
-            'JANUARY': 1, 'FEBRUARY': 2, 'MARCH': 3, 'APRIL': 4,
-            'MAY': 5, 'JUNE': 6, 'JULY': 7, 'AUGUST': 8,
-            'SEPTEMBER': 9, 'OCTOBER': 10, 'NOVEMBER': 11, 'DECEMBER': 12,
-            # Also handle common abbreviations that might be stored
-            'JAN': 1, 'FEB': 2, 'MAR': 3, 'APR': 4,
-            'JUN': 6, 'JUL': 7, 'AUG': 8, 'SEP': 9,
-            'OCT': 10, 'NOV': 11, 'DEC': 12
-        }
-        
-        # Create Case/When conditions with proper string quoting
-        when_conditions = []
-        for month_name, month_num in month_order.items():
-            # Case-insensitive match so variations like "June" or "june" are handled
-            when_conditions.append(When(month__iexact=month_name, then=month_num))
-        
-        payroll_periods = PayrollPeriod.objects.filter(tenant=tenant).annotate(
-            month_num=Case(
-                *when_conditions,
-                default=13,  # Put unknown months at the end
-                output_field=IntegerField()
-            )
-        ).order_by('-year', '-month_num')
+        # (tenant, period_start) index serves both the ordering and the range filters below
+        payroll_periods = PayrollPeriod.objects.filter(tenant=tenant).order_by(
+            F('period_start').desc(nulls_last=True), '-year'
+        )
+        latest_period_start = payroll_periods.filter(
+            period_start__isnull=False
+        ).values_list('period_start', flat=True).first()
         
         query_timings['payroll_periods_ms'] = round((time.time() - payroll_periods_start) * 1000, 2)
         
-        if not payroll_periods.exists():
+        if latest_period_start is None:
             return Response({
                 "totalEmployees": 0,
                 "avgAttendancePercentage": 0,
@@ -318,12 +306,10 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
             from django.utils import timezone
             import calendar
             now = timezone.now()
-            current_month_name = calendar.month_name[now.month].upper()
             
             # Try to find current month's payroll period
             current_month_periods = payroll_periods.filter(
-                year=now.year,
-                month=current_month_name
+                period_start=date(now.year, now.month, 1)
             )[:1]
             
             if current_month_periods.exists():
@@ -336,18 +322,19 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
                     fallback_period = selected_periods[0]
                     
                 
-        elif time_period == 'last_6_months':
-            selected_periods = payroll_periods[:6]
-        elif time_period == 'last_12_months':
-            selected_periods = payroll_periods[:12]
-        elif time_period == 'last_5_years':
-            selected_periods = payroll_periods[:60]  # 5*12 months
+        elif time_period in ('last_6_months', 'last_12_months', 'last_5_years'):
+            # Calendar window ending at the newest period (5*12 months for last_5_years)
+            window_months = {'last_6_months': 6, 'last_12_months': 12, 'last_5_years': 60}[time_period]
+            selected_periods = payroll_periods.filter(
+                period_start__gt=add_months(latest_period_start, -window_months),
+                period_start__lte=latest_period_start,
+            )
         elif time_period == 'custom':
             # Expect year & month query params – include that single period if exists
             year = request.query_params.get('year')
-            month = request.query_params.get('month')
-            if year and month:
-                selected_periods = payroll_periods.filter(year=int(year), month=month)[:1]
+            month_num = month_number(request.query_params.get('month'))
+            if year and month_num:
+                selected_periods = payroll_periods.filter(period_start=date(int(year), month_num, 1))[:1]
             else:
                 selected_periods = payroll_periods[:1]
         else:
@@ -623,38 +610,16 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
             if selected_department and selected_department != 'All':
                 trends_data = trends_data.filter(department=selected_department)
             
-            # Single query with grouping and aggregation - use proper month ordering
-            from django.db.models import Case, When, IntegerField
-            
-            # Define month ordering (complete mapping) - same as used earlier
-            month_order = {
-                'JANUARY': 1, 'FEBRUARY': 2, 'MARCH': 3, 'APRIL': 4,
-                'MAY': 5, 'JUNE': 6, 'JULY': 7, 'AUGUST': 8,
-                'SEPTEMBER': 9, 'OCTOBER': 10, 'NOVEMBER': 11, 'DECEMBER': 12,
-                # Also handle common abbreviations that might be stored
-                'JAN': 1, 'FEB': 2, 'MAR': 3, 'APR': 4,
-                'JUN': 6, 'JUL': 7, 'AUG': 8, 'SEP': 9,
-                'OCT': 10, 'NOV': 11, 'DEC': 12
-            }
-            
-            # Create Case/When conditions for proper month ordering
-            when_conditions = []
-            for month_name, month_num in month_order.items():
-                when_conditions.append(When(payroll_period__month__exact=month_name, then=month_num))
-            
+            # Single query with grouping and aggregation, ordered chronologically by period_start
             trends_query_start = time.time()
             trends_stats = trends_data.values(
                 'payroll_period__month', 
-                'payroll_period__year'
+                'payroll_period__year',
+                'payroll_period__period_start'
             ).annotate(
                 avg_salary=Avg('net_payable'),
-                avg_ot=Avg('ot_hours'),
-                month_num=Case(
-                    *when_conditions,
-                    default=13,  # Put unknown months at the end
-                    output_field=IntegerField()
-                )
-            ).order_by('-payroll_period__year', '-month_num')  # Newest year first, then newest month within year
+                avg_ot=Avg('ot_hours')
+            ).order_by(F('payroll_period__period_start').desc(nulls_last=True), '-payroll_period__year')
             query_timings['trends_query_ms'] = round((time.time() - trends_query_start) * 1000, 2)
             
             # Convert to our format - already in correct order (newest first)
@@ -886,7 +851,10 @@ class EmployeeProfileViewSet(viewsets.ModelViewSet):
         
         cache_signature = f"load_all_{load_all}_page_{page}_size_{page_size}"
         tenant_id = tenant.id if tenant else 'default'
-        cache_key = f"directory_data_{tenant_id}_{cache_signature}"
+        # directory_data_{tenant} holds a version stamp for the cached pages, so
+        # the single delete every write already does invalidates all of them
+        cache_version = cache.get_or_set(f"directory_data_{tenant_id}", uuid.uuid4().hex, None)
+        cache_key = f"directory_data_{tenant_id}_{cache_version}_{cache_signature}"
         timing_breakdown['setup_ms'] = round((time.time() - step_start) * 1000, 2)
         
         # STEP 2: Cache check
@@ -999,34 +967,14 @@ class EmployeeProfileViewSet(viewsets.ModelViewSet):
         step_start = time.time()
         data = []
         
-        # OPTIMIZATION: Pre-calculate working days for the month once (cache this expensive calculation)
-        working_days_cache_key = f"working_days_{current_year}_{current_month}"
-        
-        def calculate_working_days_for_employee(employee):
-            """Fast working days calculation with pre-computed month data"""
-            from calendar import monthrange
-            import datetime
-            
-            _, days_in_month = monthrange(current_year, current_month)
-            working_days = 0
-            
-            # Optimized loop with early exit conditions
-            off_days_map = {
-                0: employee.off_monday,
-                1: employee.off_tuesday, 
-                2: employee.off_wednesday,
-                3: employee.off_thursday,
-                4: employee.off_friday,
-                5: employee.off_saturday,
-                6: employee.off_sunday
-            }
-            
-            for day in range(1, days_in_month + 1):
-                weekday = datetime.date(current_year, current_month, day).weekday()
-                if not off_days_map.get(weekday, False):
-                    working_days += 1
-                    
-            return working_days
+        # Working days come from the shared calendar cache (keyed by off-day mask) minus the tenant's holidays
+        from ..services.calendar_service import working_days_in_month, off_day_mask, holidays_between, month_bounds
+        from ..services.holiday_service import tenant_holidays
+        month_start, next_month_start = month_bounds(current_year, current_month)
+        month_holidays = [
+            day for day in (tenant_holidays(tenant.id) if tenant else {})
+            if month_start <= day < next_month_start
+        ]
         
         for employee in employees_page:
             # OPTIMIZATION: Fast off days formatting with list comprehension
@@ -1046,7 +994,10 @@ class EmployeeProfileViewSet(viewsets.ModelViewSet):
             total_late_minutes = monthly_summary.get('late_minutes', 0)
             
             # Fast working days calculation
-            working_days = calculate_working_days_for_employee(employee)
+            off_mask = off_day_mask(employee)
+            working_days = working_days_in_month(current_year, current_month, off_mask)
+            if month_holidays:
+                working_days -= holidays_between(month_holidays, month_start, next_month_start, off_mask)
             
             # Calculate absent days and attendance percentage
             absent_days = max(0, working_days - present_days)
@@ -1732,6 +1683,7 @@ class AttendanceViewSet(viewsets.ReadOnlyModelViewSet):
         from django.db.models import Sum, Case, When, FloatField, Value, Count
         from datetime import datetime, date
         import calendar
+        from ..services.calendar_service import month_range_filter
         
         # Get current month/year for aggregation
         now = datetime.now()
@@ -1742,8 +1694,7 @@ class AttendanceViewSet(viewsets.ReadOnlyModelViewSet):
         daily_aggregated = DailyAttendance.objects.filter(
             tenant=tenant,
             employee_id__in=active_employees.values_list('employee_id', flat=True),
-            date__year=current_year,
-            date__month=current_month
+            **month_range_filter(current_year, current_month)
         ).values('employee_id', 'employee_name', 'department').annotate(
             present_days=Sum(
                 Case(
@@ -1944,13 +1895,17 @@ class DailyAttendanceViewSet(viewsets.ModelViewSet):
         2. year + month   : When time_period=custom, provide numeric month (1-12) and four-digit year.
         3. start_date & end_date : When time_period=custom_range, provide ISO dates (YYYY-MM-DD).
         4. no_cache=true  : Bypass the cache.
+
+        Month periods are summed per employee by the database (one GROUP BY over
+        a year/month range) and working days come from each employee's off days,
+        joining date and the tenant's holidays.
         """
         import time
         from datetime import datetime, timedelta, date
         from collections import defaultdict
         from django.utils import timezone
         from django.core.cache import cache
-        from django.db.models import Q, Sum, Case, When, FloatField, Value
+        from django.db.models import Sum
 
         # COMPREHENSIVE TIMING TRACKING
         start_time = time.time()
@@ -1978,8 +1933,11 @@ class DailyAttendanceViewSet(viewsets.ModelViewSet):
 
         # Build cache key that is aware of the selected parameters so that each
         # combination is cached independently.
+        # attendance_all_records_{tenant} holds a version stamp, so deleting that
+        # one key (attendance writes, holiday changes) drops every combination.
         param_signature = f"{time_period}_{month_param}_{year_param}_{start_date_str}_{end_date_str}"
-        cache_key       = f"attendance_all_records_{tenant.id}_{param_signature}"
+        cache_version   = cache.get_or_set(f"attendance_all_records_{tenant.id}", uuid.uuid4().hex, None)
+        cache_key       = f"attendance_all_records_{tenant.id}_{cache_version}_{param_signature}"
         timing_breakdown['params_extraction_ms'] = round((time.time() - step_start) * 1000, 2)
 
         step_start = time.time()
@@ -2026,6 +1984,7 @@ class DailyAttendanceViewSet(viewsets.ModelViewSet):
             if year_param and month_param:
                 try:
                     selected_months = [(int(year_param), int(month_param))]
+                    date(*selected_months[0], 1)
                 except ValueError:
                     # Fallback to current month if params invalid
                     now = timezone.now()
@@ -2064,6 +2023,7 @@ class DailyAttendanceViewSet(viewsets.ModelViewSet):
         
         # OPTIMIZATION: Cache employee data for 15 minutes (employees don't change often)
         from django.core.cache import cache
+        from ..services.calendar_service import OFF_DAY_FIELDS
         employee_cache_key = f"employee_profiles_{tenant.id}_{time_period}"
         employees_dict = cache.get(employee_cache_key)
         
@@ -2072,12 +2032,9 @@ class DailyAttendanceViewSet(viewsets.ModelViewSet):
             employees_qs = EmployeeProfile.objects.filter(
                 tenant=tenant,
                 is_active=True
-            ).only(  # CRITICAL: Only fetch needed fields to reduce transfer time
-                'employee_id', 'first_name', 'last_name', 'department', 'designation',
-                'date_of_joining', 'shift_start_time', 'shift_end_time'
             ).values(
                 'employee_id', 'first_name', 'last_name', 'department', 'designation',
-                'date_of_joining', 'shift_start_time', 'shift_end_time'
+                'date_of_joining', 'shift_start_time', 'shift_end_time', *OFF_DAY_FIELDS
             )
             
             employees_dict = {emp['employee_id']: emp for emp in employees_qs}
@@ -2096,106 +2053,83 @@ class DailyAttendanceViewSet(viewsets.ModelViewSet):
         # --------------------------------------------------
         step_start = time.time()
         aggregated = defaultdict(lambda: {'present_days': 0.0, 'ot_hours': 0.0, 'late_minutes': 0})
-        total_working_days = 0  # Used later for absent calculation
 
         if use_daily_data:
-            # ---------------- DailyAttendance aggregation (custom_range) ----------------
-            from ..models import DailyAttendance
+            # ---------------- Attendance bitmap aggregation (custom_range) ----------------
+            # One MonthlyAttendanceBitmap per employee-month instead of a DailyAttendance row per day
+            from ..services.attendance_bitmap_service import attendance_range_totals
 
             query_start = time.time()
-            daily_qs = DailyAttendance.objects.filter(
-                tenant=tenant,
-                date__range=[start_date_obj, end_date_obj]
-            )
-            
-            # Debug: Log the query and results
-            logger.info(f"DailyAttendance query - date range: {start_date_obj} to {end_date_obj}")
-            logger.info(f"DailyAttendance query - tenant: {tenant.id if tenant else 'None'}")
-            
-            # Get sample records to debug
-            sample_records = daily_qs.values('employee_id', 'date', 'attendance_status')[:5]
-            logger.info(f"Sample records from query: {list(sample_records)}")
-            logger.info(f"Total records found: {daily_qs.count()}")
+            range_totals = attendance_range_totals(tenant.id, start_date_obj, end_date_obj)
+            timing_breakdown['attendance_bitmap_query_ms'] = round((time.time() - query_start) * 1000, 2)
 
-            # Check if this is a single day request
+            # Single day requests also report the date of the record
             is_single_day = start_date_obj == end_date_obj
-            
-            if is_single_day:
-                # For single day requests, return individual records without aggregation
-                logger.info(f"Single day request detected for date: {start_date_obj}")
-                daily_agg = daily_qs.values('employee_id', 'date').annotate(
-                    present_days=Sum(
-                        Case(
-                            When(attendance_status__in=['PRESENT', 'PAID_LEAVE'], then=Value(1.0)),
-                            When(attendance_status='HALF_DAY', then=Value(0.5)),
-                            default=Value(0.0),
-                            output_field=FloatField()
-                        )
-                    ),
-                    ot_hours=Sum('ot_hours'),
-                    late_minutes=Sum('late_minutes')
-                )
-            else:
-                # For multi-day requests, aggregate by employee_id
-                daily_agg = daily_qs.values('employee_id').annotate(
-                    present_days=Sum(
-                        Case(
-                            When(attendance_status__in=['PRESENT', 'PAID_LEAVE'], then=Value(1.0)),
-                            When(attendance_status='HALF_DAY', then=Value(0.5)),
-                            default=Value(0.0),
-                            output_field=FloatField()
-                        )
-                    ),
-                    ot_hours=Sum('ot_hours'),
-                    late_minutes=Sum('late_minutes')
-                )
-            timing_breakdown['daily_attendance_query_ms'] = round((time.time() - query_start) * 1000, 2)
 
             process_start = time.time()
-            # OPTIMIZATION: Use list comprehension for faster processing
-            for row in daily_agg:
-                emp_id = row['employee_id']
+            for emp_id, totals in range_totals.items():
                 agg_data = aggregated[emp_id]
-                agg_data['present_days'] += float(row['present_days'] or 0)
-                agg_data['ot_hours'] += float(row['ot_hours'] or 0)
-                agg_data['late_minutes'] += int(row['late_minutes'] or 0)
-                
-                # For single day requests, also store the date information
-                if is_single_day and 'date' in row:
-                    agg_data['date'] = row['date']
-                    
+                agg_data['present_days'] += float(totals['present_days'])
+                agg_data['ot_hours'] += float(totals['ot_hours'])
+                agg_data['late_minutes'] += totals['late_minutes']
+                if is_single_day:
+                    agg_data['date'] = start_date_obj
+
             timing_breakdown['daily_data_processing_ms'] = round((time.time() - process_start) * 1000, 2)
 
-            # Calculate working days in range (inclusive)
-            total_working_days = (end_date_obj - start_date_obj).days + 1
+            range_start, range_end = start_date_obj, end_date_obj
         else:
             # ---------------- MonthlyAttendanceSummary aggregation --------------------
+            # The selected months are consecutive, so one (year, month) range covers them
+            # and the database returns a single summed row per employee
             from ..models import MonthlyAttendanceSummary
-            from django.db.models import Q
+            from ..services.calendar_service import month_bounds, month_span_filter
 
-            query_start = time.time()
-            # Build ORed Q for (year, month) combinations
-            month_filter = Q()
-            for y, m in selected_months:
-                month_filter |= Q(year=y, month=m)
+            range_start = month_bounds(*min(selected_months))[0]
+            range_end = month_bounds(*max(selected_months))[1] - timedelta(days=1)
 
+            query_start = time.time()
             summaries_qs = MonthlyAttendanceSummary.objects.filter(
-                tenant=tenant
-            ).filter(month_filter).values('employee_id', 'present_days', 'ot_hours', 'late_minutes')
+                month_span_filter(range_start, range_end),
+                tenant=tenant,
+            ).values('employee_id').annotate(
+                total_present=Sum('present_days'),
+                total_ot=Sum('ot_hours'),
+                total_late=Sum('late_minutes'),
+            ).order_by()
+
+            for summary in summaries_qs.iterator(chunk_size=2000):
+                aggregated[summary['employee_id']] = {
+                    'present_days': float(summary['total_present'] or 0),
+                    'ot_hours': float(summary['total_ot'] or 0),
+                    'late_minutes': summary['total_late'] or 0,
+                }
             timing_breakdown['monthly_summary_query_ms'] = round((time.time() - query_start) * 1000, 2)
 
-            process_start = time.time()
-            # OPTIMIZATION: Faster data processing with reduced lookups
-            # OPTIMIZATION: Faster data processing with reduced lookups
-            for summary in summaries_qs:
-                emp_id = summary['employee_id']
-                agg_data = aggregated[emp_id]
-                agg_data['present_days'] += float(summary['present_days'])
-                agg_data['ot_hours'] += float(summary['ot_hours'])
-                agg_data['late_minutes'] += summary['late_minutes']
-            timing_breakdown['monthly_data_processing_ms'] = round((time.time() - process_start) * 1000, 2)
+        # --------------------------------------------------
+        # Working days per employee from the calendar
+        # --------------------------------------------------
+        from ..services.calendar_service import holidays_between, working_days_between
+        from ..services.holiday_service import tenant_holidays
+
+        range_holidays = [day for day in tenant_holidays(tenant.id) if range_start <= day <= range_end]
+        working_days_by_key = {}
+
+        def employee_working_days(emp_info):
+            # Counted from the joining date when the employee joined inside the range
+            off_mask = sum(1 << weekday for weekday, field in enumerate(OFF_DAY_FIELDS) if emp_info.get(field))
+            joining_date = emp_info.get('date_of_joining')
+            first_day = max(range_start, joining_date) if joining_date else range_start
+            key = (off_mask, first_day)
+            if key not in working_days_by_key:
+                working_days_by_key[key] = (
+                    working_days_between(first_day, range_end, off_mask)
+                    - holidays_between(range_holidays, first_day, range_end, off_mask)
+                )
+            return working_days_by_key[key]
 
-            total_working_days = len(selected_months) * 30  # Approximation – can be enhanced
+        # Reported in month_context: a full range without off days
+        total_working_days = employee_working_days({})
 
         timing_breakdown['total_aggregation_ms'] = round((time.time() - step_start) * 1000, 2)
 
@@ -2214,8 +2148,9 @@ class DailyAttendanceViewSet(viewsets.ModelViewSet):
         for emp_id, emp_info in employees_dict.items():
             data = aggregated.get(emp_id, default_data)
 
-            absent_days = max(0, total_working_days - data['present_days'])
-            attendance_percentage = (data['present_days'] / total_working_days * 100) if total_working_days > 0 else 0
+            working_days = employee_working_days(emp_info)
+            absent_days = max(0, working_days - data['present_days'])
+            attendance_percentage = (data['present_days'] / working_days * 100) if working_days > 0 else 0
 
             # FRONTEND COMPATIBILITY: Add year/month for current period
             current_time = timezone.now()
@@ -2240,6 +2175,7 @@ class DailyAttendanceViewSet(viewsets.ModelViewSet):
                 'year': display_year,  # Added for frontend compatibility
                 'month': display_month,  # Added for frontend compatibility
                 'date': record_date.isoformat() if record_date else None,  # Include specific date for single day requests
+                'working_days': working_days,
                 'present_days': round(data['present_days'], 1),
                 'absent_days': round(absent_days, 1),
                 'attendance_percentage': round(attendance_percentage, 1),
@@ -2299,8 +2235,6 @@ class DailyAttendanceViewSet(viewsets.ModelViewSet):
         timing_breakdown['optimization_applied'] = 'employee_caching + faster_processing'
 
         # Log performance for analysis
-        import logging
-        logger = logging.getLogger(__name__)
         logger.info(f"all_records API Performance - Total: {total_time_ms}ms, Breakdown: {timing_breakdown}")
         
         # OPTIMIZATION: Always use DRF Response for consistency (JsonResponse can cause frontend issues)
@@ -2311,7 +2245,7 @@ class AdvanceLedgerViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['employee_id', 'employee_name', 'remarks', 'for_month']
-    ordering_fields = ['advance_date', 'amount', 'for_month', 'status']
+    ordering_fields = ['advance_date', 'amount', 'for_month', 'for_period', 'status']
 
     def get_queryset(self):
         return AdvanceLedger.objects.all().order_by('-advance_date', '-created_at')
@@ -2326,3 +2260,31 @@ class PaymentViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return Payment.objects.all().order_by('-payment_date', '-created_at')
 
+class TenantHolidayViewSet(viewsets.ModelViewSet):
+    """
+    Tenant holiday calendar. Holidays are non-working days for every employee:
+    they are left out of working-day counts and eligible-employee lists, so no
+    OFF attendance has to be entered for them. Optional ?year= filter.
+    """
+    serializer_class = TenantHolidaySerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    search_fields = ['name', 'description']
+    ordering_fields = ['date', 'name']
+
+    def get_queryset(self):
+        tenant = getattr(self.request, 'tenant', None)
+        if not tenant:
+            return TenantHoliday.objects.none()
+        queryset = TenantHoliday.objects.filter(tenant=tenant)
+        from datetime import date
+        year = self.request.query_params.get('year')
+        if year and year.isdigit() and 1 <= int(year) < 9999:
+            # Range on (tenant, date) instead of EXTRACT(year) on every row
+            year = int(year)
+            queryset = queryset.filter(date__gte=date(year, 1, 1), date__lt=date(year + 1, 1, 1))
+        return queryset.order_by('date')
+
+    def perform_create(self, serializer):
+        serializer.save(tenant=self.request.tenant)
+
@@ -32,6 +32,8 @@ from ..utils.utils import (
     validate_excel_columns,
     generate_employee_id,
 )
+from ..services.calendar_service import month_number
+from ..services.payroll_change_tracker import mark_employees_dirty
 
 
 def excel_to_dict_list(excel_file):
@@ -406,6 +408,16 @@ class UploadSalaryDataAPIView(APIView):
                             ],
                             batch_size=100,
                         )
+
+                    # Bulk writes bypass model signals, so record the payroll change explicitly
+                    mark_employees_dirty(
+                        tenant.id,
+                        [
+                            (record.employee_id, record.year, record.month)
+                            for record in salary_records_to_create + salary_records_to_update
+                        ],
+                        reason="salary_data",
+                    )
                     # Deduplicate employee profiles to create (in case same employee appears multiple times in upload)
                     if employee_profiles_to_create:
                         # Create a dictionary to deduplicate by employee_id
@@ -455,34 +467,7 @@ class UploadSalaryDataAPIView(APIView):
 
     def _get_month_number(self, month_name):
         """Convert month name to number"""
-
-        months = {
-            "JANUARY": 1,
-            "JAN": 1,
-            "FEBRUARY": 2,
-            "FEB": 2,
-            "MARCH": 3,
-            "MAR": 3,
-            "APRIL": 4,
-            "APR": 4,
-            "MAY": 5,
-            "JUNE": 6,
-            "JUN": 6,
-            "JULY": 7,
-            "JUL": 7,
-            "AUGUST": 8,
-            "AUG": 8,
-            "SEPTEMBER": 9,
-            "SEP": 9,
-            "OCTOBER": 10,
-            "OCT": 10,
-            "NOVEMBER": 11,
-            "NOV": 11,
-            "DECEMBER": 12,
-            "DEC": 12,
-        }
-
-        return months.get(month_name.upper(), 1)
+        return month_number(month_name) or 1
 
 
 class DownloadTemplateAPIView(APIView):
@@ -21,6 +21,7 @@
 # - AdvancePaymentViewSet
 # - auto_payroll_settings
 # - manual_calculate_payroll
+# - payroll_job_status
 # - save_payroll_period_direct
 # - bulk_update_payroll_period
 
@@ -33,6 +34,7 @@ from decimal import Decimal, InvalidOperation
 from datetime import datetime
 import time
 from django.db.models import Q
+from django.urls import reverse
 from django.utils import timezone
 from rest_framework.permissions import IsAuthenticated
 from django.db import transaction
@@ -47,6 +49,8 @@ from ..models import (
     PayrollPeriod,
     CalculatedSalary,
     DataSource,
+    BackgroundJob,
+    JobType,
 )
 
 from ..serializers import (
@@ -56,6 +60,12 @@ from rest_framework import serializers
 
 # Email verification views will be defined in this file
 from ..services.salary_service import SalaryCalculationService
+from ..services.job_service import enqueue_payroll_calculation, serialize_job
+from ..services.calendar_service import month_bounds, month_range_filter, month_number
+from ..services.advance_balance_service import get_advance_balances
+from ..services.advance_repayment_service import apply_advance_repayments
+from ..services.keyset_pagination import keyset_page
+from ..services.payroll_rollup_service import refresh_period_rollups
 
 
 
@@ -106,17 +116,14 @@ class PayrollPeriodViewSet(viewsets.ModelViewSet):
                     'error': f'Cannot delete payroll period with {paid_salaries_count} paid salaries'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Delete associated calculated salaries first
-            deleted_salaries = CalculatedSalary.objects.filter(payroll_period=period).delete()
-            
-            # Delete the payroll period
+            # Delete the payroll period; its calculated salaries and rollup go with it
             period_name = f"{period.month} {period.year}"
-            period.delete()
+            _, deleted_by_model = period.delete()
             
             return Response({
                 'success': True,
                 'message': f'Payroll period {period_name} deleted successfully',
-                'deleted_salaries': deleted_salaries[0] if deleted_salaries[0] else 0
+                'deleted_salaries': deleted_by_model.get(CalculatedSalary._meta.label, 0)
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -170,11 +177,24 @@ class CalculatedSalaryViewSet(viewsets.ModelViewSet):
                 ]
         return CalculatedSalarySerializer
 
+def _payroll_job_response(job, created, **extra):
+    """202 for a queued payroll calculation job, with the URL to poll"""
+    return Response({
+        'success': True,
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': reverse('payroll:payroll-job-status', args=[job.id]),
+        'already_queued': not created,
+        'message': f"Payroll calculation queued for {job.params['month']} {job.params['year']}",
+        **extra,
+    }, status=status.HTTP_202_ACCEPTED)
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def calculate_payroll(request):
     """
-    Calculate payroll for a specific period with different modes
+    Queue payroll calculation for a specific period with different modes.
+    Returns 202 with a job id; poll GET /api/payroll-jobs/<id>/ for progress.
     """
     try:
         tenant = getattr(request, 'tenant', None)
@@ -185,8 +205,17 @@ def calculate_payroll(request):
         period_id = data.get('period_id')
         force_recalculate = data.get('force_recalculate', False)
         mode = data.get('mode', 'calculate')  # 'tentative', 'calculate', 'save'
+        # Recalculations only touch employees with changed inputs unless a full run is requested
+        incremental = not data.get('full', False)
         
-        if not period_id:
+        if period_id:
+            try:
+                payroll_period = PayrollPeriod.objects.get(id=period_id, tenant=tenant)
+            except PayrollPeriod.DoesNotExist:
+                return Response({"error": "Payroll period not found"}, status=404)
+            year = payroll_period.year
+            month = payroll_period.month
+        else:
             # Legacy support - try to get year and month
             year = data.get('year')
             month = data.get('month')
@@ -200,59 +229,17 @@ def calculate_payroll(request):
                 month = str(month).upper()
             except (ValueError, TypeError):
                 return Response({"error": "Invalid year or month format"}, status=400)
-            
-            # Calculate payroll using legacy method
-            results = SalaryCalculationService.calculate_salary_for_period(
-                tenant, year, month, force_recalculate
-            )
-        # CLEAR CACHE: Invalidate payroll overview cache when payroll data changes
-        from django.core.cache import cache
-        cache_key = f"payroll_overview_{tenant.id}"
-        cache.delete(cache_key)
-        logger.info(f"Cleared payroll overview cache for tenant {tenant.id}")
         
-        return Response({
-            'success': True,
-            'results': results,
-            'message': f'Payroll calculation completed for {month} {year}'
-        })
-        
-        # New method using period_id
-        try:
-            payroll_period = PayrollPeriod.objects.get(id=period_id, tenant=tenant)
-        except PayrollPeriod.DoesNotExist:
-            return Response({"error": "Payroll period not found"}, status=404)
-        
-        # Calculate payroll for the period
-        results = SalaryCalculationService.calculate_salary_for_period(
-            tenant, payroll_period.year, payroll_period.month, force_recalculate
+        # 'save' locks the period once the calculation has finished
+        job, created = enqueue_payroll_calculation(
+            tenant, year, month,
+            force_recalculate=force_recalculate,
+            incremental=incremental,
+            lock_after=(mode == 'save'),
+            user=request.user,
         )
         
-        # Handle different modes
-        if mode == 'save':
-            # Lock the period after calculation
-            payroll_period.is_locked = True
-            payroll_period.calculation_date = timezone.now()
-            payroll_period.save()
-            message = f'Payroll calculated and saved for {payroll_period.month} {payroll_period.year}'
-        elif mode == 'tentative':
-            message = f'Tentative payroll calculation completed for {payroll_period.month} {payroll_period.year}'
-        else:
-            message = f'Payroll calculation completed for {payroll_period.month} {payroll_period.year}'
-        
-        # CLEAR CACHE: Invalidate payroll overview cache when payroll data changes
-        from django.core.cache import cache
-        cache_key = f"payroll_overview_{tenant.id}"
-        cache.delete(cache_key)
-        logger.info(f"Cleared payroll overview cache for tenant {tenant.id}")
-        
-        return Response({
-            'success': True,
-            'results': results,
-            'message': message,
-            'mode': mode,
-            'cache_cleared': True
-        })
+        return _payroll_job_response(job, created, mode=mode)
         
     except Exception as e:
         logger.error(f"Error in calculate_payroll: {str(e)}")
@@ -412,70 +399,14 @@ def mark_salary_paid(request):
                 ['is_paid', 'payment_date'], 
                 batch_size=100
             )
+            refresh_period_rollups({salary.payroll_period_id for salary in bulk_updates})
             
             # OPTIMIZATION: Bulk process advance ledger updates ONLY when marking as paid
             if mark_as_paid and employee_advance_deductions:
                 logger.info(f"Processing advance deductions for {len(employee_advance_deductions)} employees: {employee_advance_deductions}")
-                from ..models import AdvanceLedger
-                
-                # Get all relevant advance records in one query
-                all_employee_ids = list(employee_advance_deductions.keys())
-                all_advances = AdvanceLedger.objects.filter(
-                    tenant=tenant,
-                    employee_id__in=all_employee_ids,
-                    status__in=['PENDING','PARTIALLY_PAID']
-                ).order_by('employee_id', 'advance_date')
-                
-                logger.info(f"Found {all_advances.count()} pending advances for employees: {all_employee_ids}")
-                
-                # Group advances by employee for efficient processing
-                advances_by_employee = {}
-                for advance in all_advances:
-                    if advance.employee_id not in advances_by_employee:
-                        advances_by_employee[advance.employee_id] = []
-                    advances_by_employee[advance.employee_id].append(advance)
-                
-                # Process advance deductions for each employee
-                advances_to_update = []
-                advances_to_mark_repaid = []
-                
-                for employee_id, total_deduction in employee_advance_deductions.items():
-                    remaining_deduction = Decimal(str(total_deduction))  # Convert to Decimal
-                    employee_advances = advances_by_employee.get(employee_id, [])
-                    
-                    logger.info(f"Processing employee {employee_id}: deduction={remaining_deduction}, advances={len(employee_advances)}")
-                    
-                    for advance in employee_advances:
-                        if remaining_deduction <= 0:
-                            break
-                            
-                        current_balance = advance.remaining_balance
-                        if current_balance <= remaining_deduction:
-                            # This advance is fully paid
-                            logger.info(f"Fully repaying advance {advance.id}: {current_balance}")
-                            advance.status = 'REPAID'
-                            advance.remaining_balance = Decimal('0')
-                            advances_to_mark_repaid.append(advance)
-                            remaining_deduction -= current_balance
-                        else:
-                            # This advance is partially paid - reduce the remaining_balance
-                            logger.info(f"Partially repaying advance {advance.id}: {remaining_deduction} out of {current_balance}")
-                            advance.remaining_balance -= remaining_deduction
-                            advance.status = 'PARTIALLY_PAID'
-                            advances_to_update.append(advance)
-                            remaining_deduction = Decimal('0')
-                
-                # Execute bulk updates and status changes
-                if advances_to_update:
-                    AdvanceLedger.objects.bulk_update(advances_to_update, ['remaining_balance', 'status'], batch_size=100)
-                    logger.info(f"Bulk updated {len(advances_to_update)} advance remaining balances")
-                
-                if advances_to_mark_repaid:
-                    AdvanceLedger.objects.bulk_update(advances_to_mark_repaid, ['status', 'remaining_balance'], batch_size=100)
-                    logger.info(f"Bulk marked {len(advances_to_mark_repaid)} advances as REPAID")
-                
+                stats = apply_advance_repayments(tenant.id, employee_advance_deductions)
                 logger.info(
-                    f"Advance processing completed: {len(advances_to_update)} updated, {len(advances_to_mark_repaid)} marked as REPAID"
+                    f"Advance processing completed: {stats['partially_paid']} updated, {stats['repaid']} marked as REPAID"
                 )
             elif not mark_as_paid:
                 logger.info("Marked salaries as unpaid - no advance processing needed")
@@ -542,47 +473,49 @@ def available_calculation_periods(request):
         if not tenant:
             return Response({"error": "No tenant found"}, status=400)
         
-        from ..models import PayrollPeriod, CalculatedSalary, EmployeeProfile
-        from datetime import datetime, timedelta
+        from ..models import PayrollPeriod, EmployeeProfile
+        from ..services.calendar_service import add_months, working_days_in_month, SATURDAY, SUNDAY
+        from django.db.models import Count
+        from datetime import datetime
         import calendar
         
         # Get current date
         current_date = datetime.now()
         
-        # Generate available periods (last 6 months + current + next 3 months)
+        # Generate available periods (last 6 months + current + next 5 months)
         available_periods = []
         
         # Start from 6 months ago
-        start_date = current_date - timedelta(days=180)  # Approximately 6 months
+        start_date = add_months(current_date.date().replace(day=1), -6)
+        end_date = add_months(start_date, 12)
+        
+        # Existing periods in the window, with their calculation counts, in one query
+        existing_periods = {
+            period.period_start: period for period in PayrollPeriod.objects.filter(
+                tenant=tenant,
+                period_start__gte=start_date,
+                period_start__lt=end_date,
+            ).annotate(
+                calculated_count=Count('calculated_salaries'),
+                paid_count=Count('calculated_salaries', filter=Q(calculated_salaries__is_paid=True)),
+            )
+        }
+        
+        # Get employee count for this tenant
+        total_employees = EmployeeProfile.objects.filter(tenant=tenant, is_active=True).count()
         
         for i in range(12):  # 12 months total
-            calc_date = start_date + timedelta(days=30 * i)
+            calc_date = add_months(start_date, i)
             year = calc_date.year
             month_name = calc_date.strftime('%B').upper()
             month_num = calc_date.month
             
-            # Check if period already exists
-            existing_period = PayrollPeriod.objects.filter(
-                tenant=tenant,
-                year=year,
-                month=month_name
-            ).first()
-            
-            # Get employee count for this tenant
-            total_employees = EmployeeProfile.objects.filter(tenant=tenant, is_active=True).count()
+            existing_period = existing_periods.get(calc_date)
             
             if existing_period:
                 # Period exists - get calculation status
-                calculated_count = CalculatedSalary.objects.filter(
-                    tenant=tenant,
-                    payroll_period=existing_period
-                ).count()
-                
-                paid_count = CalculatedSalary.objects.filter(
-                    tenant=tenant,
-                    payroll_period=existing_period,
-                    is_paid=True
-                ).count()
+                calculated_count = existing_period.calculated_count
+                paid_count = existing_period.paid_count
                 
                 # Determine status
                 if existing_period.is_locked:
@@ -620,9 +553,8 @@ def available_calculation_periods(request):
                 }
             else:
                 # Period doesn't exist - can be created and calculated
-                # Calculate working days for the month
-                working_days = len([d for d in range(1, calendar.monthrange(year, month_num)[1] + 1)
-                                  if calendar.weekday(year, month_num, d) < 5])  # Monday=0, Sunday=6
+                # Calculate working days for the month (Monday to Friday)
+                working_days = working_days_in_month(year, month_num, SATURDAY | SUNDAY)
                 
                 period_data = {
                     'id': None,  # No ID since it doesn't exist yet
@@ -646,8 +578,8 @@ def available_calculation_periods(request):
             
             available_periods.append(period_data)
         
-        # Sort by year and month (newest first)
-        available_periods.sort(key=lambda x: (x['year'], x['month']), reverse=True)
+        # Newest first
+        available_periods.reverse()
         
         return Response({
             'success': True,
@@ -671,24 +603,20 @@ def payroll_periods_list(request):
             return Response({"error": "No tenant found"}, status=400)
         
         # Import models locally to avoid any import issues
-        from ..models import PayrollPeriod, CalculatedSalary
+        from ..models import PayrollPeriod
+        from django.db.models import F
         
-        periods = PayrollPeriod.objects.filter(tenant=tenant).order_by('-year', '-month')
+        # Chronological order via period_start; counts come from the period rollups
+        periods = PayrollPeriod.objects.filter(tenant=tenant).select_related('rollup').order_by(
+            F('period_start').desc(nulls_last=True), '-year'
+        )
         
         periods_data = []
         for period in periods:
             try:
-                # Get basic summary for each period
-                calculated_count = CalculatedSalary.objects.filter(
-                    tenant=tenant,
-                    payroll_period=period
-                ).count()
-                
-                paid_count = CalculatedSalary.objects.filter(
-                    tenant=tenant,
-                    payroll_period=period,
-                    is_paid=True
-                ).count()
+                rollup = getattr(period, 'rollup', None)
+                calculated_count = rollup.employee_count if rollup else 0
+                paid_count = rollup.paid_count if rollup else 0
                 
                 periods_data.append({
                     'id': period.id,
@@ -723,8 +651,9 @@ def payroll_overview(request):
     Optimized comprehensive payroll overview with all periods and their status
     """
     import time
-    from django.db.models import Count, Sum, Q
+    from django.db.models import F
     from django.core.cache import cache
+    from datetime import date
     
     start_time = time.time()
     
@@ -769,71 +698,35 @@ def payroll_overview(request):
         current_month = current_date.strftime('%B').upper()
         current_year = current_date.year
         
-        # Get all payroll periods with related salary calculations in single query (ordered by calendar date)
-        from django.db.models import Case, When, IntegerField
-        
-        # Define month ordering for proper calendar sorting (complete mapping)
-        month_order = {
-            'JANUARY': 1, 'FEBRUARY': 2, 'MARCH': 3, 'APRIL': 4,
-            'MAY': 5, 'JUNE': 6, 'JULY': 7, 'AUGUST': 8,
-            'SEPTEMBER': 9, 'OCTOBER': 10, 'NOVEMBER': 11, 'DECEMBER': 12,
-            # Also handle common abbreviations that might be stored
-            'JAN': 1, 'FEB': 2, 'MAR': 3, 'APR': 4,
-            'JUN': 6, 'JUL': 7, 'AUG': 8, 'SEP': 9,
-            'OCT': 10, 'NOV': 11, 'DEC': 12
-        }
-        
-        # Create Case/When conditions with proper string quoting
-        when_conditions = []
-        for month_name, month_num in month_order.items():
-            # Case-insensitive match so variations like "June" or "june" are handled
-            when_conditions.append(When(month__iexact=month_name, then=month_num))
-        
-        periods = PayrollPeriod.objects.filter(tenant=tenant).prefetch_related(
-            'calculated_salaries'
-        ).annotate(
-            month_num=Case(
-                *when_conditions,
-                default=13,  # Put unknown months at the end
-                output_field=IntegerField()
-            )
-        ).order_by('-year', '-month_num')  # Now properly ordered by calendar date
+        # Get all payroll periods ordered by calendar date through the (tenant, period_start) index,
+        # each joined to its one-row salary rollup
+        periods = list(PayrollPeriod.objects.filter(tenant=tenant).select_related('rollup').order_by(
+            F('period_start').desc(nulls_last=True), '-year'
+        ))
         
         # Check if current month period exists
-        current_period_exists = periods.filter(
-            year=current_year, 
-            month=current_month
-        ).exists()
-        
-        # Optimize with single aggregated query for all periods at once
-        salary_aggregates = CalculatedSalary.objects.filter(
-            tenant=tenant,
-            payroll_period__in=periods
-        ).values('payroll_period').annotate(
-            total_employees=Count('id'),
-            paid_employees=Count('id', filter=Q(is_paid=True)),
-            total_gross_salary=Sum('gross_salary'),
-            total_net_salary=Sum('net_payable'),
-            total_advance_deductions=Sum('advance_deduction_amount'),
-            total_tds=Sum('tds_amount')
-        )
-        
-        # Create lookup dictionary for O(1) access
-        salary_lookup = {
-            agg['payroll_period']: agg for agg in salary_aggregates
-        }
+        current_period_start = date(current_year, current_date.month, 1)
+        current_period_exists = any(period.period_start == current_period_start for period in periods)
         
         overview_data = []
         for period in periods:
-            # Get aggregated data for this period (O(1) lookup)
-            agg_data = salary_lookup.get(period.id, {
+            # Periods without salaries yet have no rollup row
+            rollup = getattr(period, 'rollup', None)
+            agg_data = {
+                'total_employees': rollup.employee_count,
+                'paid_employees': rollup.paid_count,
+                'total_gross_salary': rollup.total_gross_salary,
+                'total_net_salary': rollup.total_net_salary,
+                'total_advance_deductions': rollup.total_advance_deductions,
+                'total_tds': rollup.total_tds,
+            } if rollup else {
                 'total_employees': 0,
                 'paid_employees': 0,
                 'total_gross_salary': 0,
                 'total_net_salary': 0,
                 'total_advance_deductions': 0,
                 'total_tds': 0
-            })
+            }
             
             total_employees = agg_data['total_employees']
             paid_employees = agg_data['paid_employees']
@@ -889,7 +782,7 @@ def payroll_overview(request):
             'total_periods': len(overview_data),
             'performance': {
                 'query_time': f"{query_time:.3f}s",
-                'optimization': 'Single aggregated query with prefetch_related',
+                'optimization': 'Period rollups joined in one query ordered by period_start',
                 'periods_processed': len(periods),
                 'cached': False,
                 'response_time': f"{query_time:.3f}s"
@@ -909,7 +802,9 @@ def payroll_overview(request):
 @permission_classes([IsAuthenticated])
 def create_current_month_payroll(request):
     """
-    Create payroll period for current month
+    Create payroll period for current month.
+    Pass calculate=true to also queue its payroll calculation (returns 202
+    with a job_id).
     """
     try:
         tenant = getattr(request, 'tenant', None)
@@ -942,7 +837,7 @@ def create_current_month_payroll(request):
             tds_rate=request.data.get('tds_rate', 5.0)
         )
         
-        return Response({
+        response_data = {
             'success': True,
             'message': f'Payroll period created for {current_month} {current_year}',
             'period_id': new_period.id,
@@ -954,19 +849,56 @@ def create_current_month_payroll(request):
                 'working_days': new_period.working_days_in_month,
                 'tds_rate': float(new_period.tds_rate)
             }
-        })
+        }
+        
+        if request.data.get('calculate', False):
+            job, _ = enqueue_payroll_calculation(
+                tenant, current_year, current_month, user=request.user
+            )
+            response_data['job_id'] = job.id
+            response_data['job_status'] = job.status
+            response_data['status_url'] = reverse('payroll:payroll-job-status', args=[job.id])
+            return Response(response_data, status=status.HTTP_202_ACCEPTED)
+        
+        return Response(response_data)
         
     except Exception as e:
         logger.error(f"Error in create_current_month_payroll: {str(e)}")
         return Response({"error": f"Failed to create period: {str(e)}"}, status=500)
 
+# Columns returned per employee by payroll_period_detail
+PERIOD_DETAIL_DECIMAL_FIELDS = [
+    'basic_salary', 'present_days', 'absent_days', 'ot_hours', 'gross_salary', 'tds_amount',
+    'salary_after_tds', 'total_advance_balance', 'advance_deduction_amount',
+    'remaining_advance_balance', 'net_payable',
+]
+PERIOD_DETAIL_FIELDS = [
+    'id', 'employee_id', 'employee_name', 'department', 'late_minutes',
+    'advance_deduction_editable', 'is_paid', 'payment_date',
+] + PERIOD_DETAIL_DECIMAL_FIELDS
+
+# Indexed sort keys accepted by payroll_period_detail
+PERIOD_DETAIL_SORT_FIELDS = ['employee_name', 'employee_id', 'net_payable']
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def payroll_period_detail(request, period_id):
     """
     Get detailed view of a specific payroll period
+    
+    Query params (all optional):
+        department: only this department
+        is_paid: 'true' / 'false'
+        sort: employee_name (default), employee_id or net_payable; prefix '-' for descending
+        page_size: return one page of at most this many employees (max 1000)
+        cursor: next_cursor from the previous page
+    
+    Without page_size/cursor every matching employee is returned. The summary
+    covers all matching employees, not just the page.
     """
     try:
+        from django.db.models import Count, Sum
+        
         tenant = getattr(request, 'tenant', None)
         if not tenant:
             return Response({"error": "No tenant found"}, status=400)
@@ -975,43 +907,58 @@ def payroll_period_detail(request, period_id):
         if not period:
             return Response({"error": "Payroll period not found"}, status=404)
         
-        # Get all calculated salaries for this period
         calculated_salaries = CalculatedSalary.objects.filter(
             tenant=tenant,
             payroll_period=period
-        ).order_by('employee_name')
+        )
         
-        employees_data = []
-        for calc in calculated_salaries:
-            employees_data.append({
-                'id': calc.id,
-                'employee_id': calc.employee_id,
-                'employee_name': calc.employee_name,
-                'department': calc.department,
-                'basic_salary': float(calc.basic_salary),
-                'present_days': float(calc.present_days),
-                'absent_days': float(calc.absent_days),
-                'ot_hours': float(calc.ot_hours),
-                'late_minutes': calc.late_minutes,
-                'gross_salary': float(calc.gross_salary),
-                'tds_amount': float(calc.tds_amount),
-                'salary_after_tds': float(calc.salary_after_tds),
-                'total_advance_balance': float(calc.total_advance_balance),
-                'advance_deduction_amount': float(calc.advance_deduction_amount),
-                'advance_deduction_editable': calc.advance_deduction_editable,
-                'remaining_advance_balance': float(calc.remaining_advance_balance),
-                'net_payable': float(calc.net_payable),
-                'is_paid': calc.is_paid,
-                'payment_date': calc.payment_date.isoformat() if calc.payment_date else None
-            })
+        department = request.query_params.get('department')
+        if department:
+            calculated_salaries = calculated_salaries.filter(department=department)
+        is_paid = request.query_params.get('is_paid')
+        if is_paid is not None and is_paid != '':
+            if is_paid.lower() not in ('true', 'false', '1', '0'):
+                return Response({"error": "is_paid must be true or false"}, status=400)
+            calculated_salaries = calculated_salaries.filter(is_paid=is_paid.lower() in ('true', '1'))
+        
+        sort = request.query_params.get('sort', 'employee_name')
+        if sort.lstrip('-') not in PERIOD_DETAIL_SORT_FIELDS:
+            return Response({
+                "error": f"sort must be one of: {', '.join(PERIOD_DETAIL_SORT_FIELDS)} (prefix '-' for descending)"
+            }, status=400)
+        ordering = [sort, '-id' if sort.startswith('-') else 'id']
         
-        # Calculate summary
-        total_gross = sum(float(calc.gross_salary) for calc in calculated_salaries)
-        total_net = sum(float(calc.net_payable) for calc in calculated_salaries)
-        total_advances = sum(float(calc.advance_deduction_amount) for calc in calculated_salaries)
-        total_tds = sum(float(calc.tds_amount) for calc in calculated_salaries)
+        # Summary of every matching row in one query
+        summary = calculated_salaries.aggregate(
+            total_employees=Count('id'),
+            paid_employees=Count('id', filter=Q(is_paid=True)),
+            total_gross_salary=Sum('gross_salary'),
+            total_net_salary=Sum('net_payable'),
+            total_advance_deductions=Sum('advance_deduction_amount'),
+            total_tds=Sum('tds_amount'),
+        )
         
-        return Response({
+        rows = calculated_salaries.values(*PERIOD_DETAIL_FIELDS)
+        page_size = request.query_params.get('page_size')
+        cursor = request.query_params.get('cursor')
+        next_cursor = None
+        if page_size or cursor:
+            try:
+                page_size = min(max(int(page_size or 100), 1), 1000)
+                rows, next_cursor = keyset_page(rows, ordering, cursor, page_size)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=400)
+        else:
+            rows = rows.order_by(*ordering).iterator(chunk_size=2000)
+        
+        employees_data = []
+        for row in rows:
+            for field in PERIOD_DETAIL_DECIMAL_FIELDS:
+                row[field] = float(row[field])
+            row['payment_date'] = row['payment_date'].isoformat() if row['payment_date'] else None
+            employees_data.append(row)
+        
+        response_data = {
             'success': True,
             'period': {
                 'id': period.id,
@@ -1025,15 +972,22 @@ def payroll_period_detail(request, period_id):
             },
             'employees': employees_data,
             'summary': {
-                'total_employees': len(employees_data),
-                'paid_employees': sum(1 for emp in employees_data if emp['is_paid']),
-                'pending_employees': sum(1 for emp in employees_data if not emp['is_paid']),
-                'total_gross_salary': total_gross,
-                'total_net_salary': total_net,
-                'total_advance_deductions': total_advances,
-                'total_tds': total_tds
+                'total_employees': summary['total_employees'],
+                'paid_employees': summary['paid_employees'],
+                'pending_employees': summary['total_employees'] - summary['paid_employees'],
+                'total_gross_salary': float(summary['total_gross_salary'] or 0),
+                'total_net_salary': float(summary['total_net_salary'] or 0),
+                'total_advance_deductions': float(summary['total_advance_deductions'] or 0),
+                'total_tds': float(summary['total_tds'] or 0)
             }
-        })
+        }
+        if page_size:
+            response_data['pagination'] = {
+                'page_size': page_size,
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None,
+            }
+        return Response(response_data)
         
     except Exception as e:
         logger.error(f"Error in payroll_period_detail: {str(e)}")
@@ -1076,18 +1030,19 @@ def add_employee_advance(request):
         if not employee:
             return Response({"error": "Employee not found"}, status=404)
         
-        # Create advance record
-        advance = AdvanceLedger.objects.create(
-            tenant=tenant,
-            employee_id=employee_id,
-            employee_name=employee.full_name,
-            advance_date=datetime.now().date(),
-            amount=amount,
-            for_month=for_month,
-            payment_method=payment_method,
-            status='PENDING',
-            remarks=remarks
-        )
+        # Create advance record (and update the employee's advance balance) atomically
+        with transaction.atomic():
+            advance = AdvanceLedger.objects.create(
+                tenant=tenant,
+                employee_id=employee_id,
+                employee_name=employee.full_name,
+                advance_date=datetime.now().date(),
+                amount=amount,
+                for_month=for_month,
+                payment_method=payment_method,
+                status='PENDING',
+                remarks=remarks
+            )
         
         
         # CLEAR CACHE: Invalidate payroll overview cache when payroll data changes
@@ -1125,7 +1080,7 @@ class AdvancePaymentViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['employee_id', 'employee_name', 'remarks']
-    ordering_fields = ['advance_date', 'amount', 'for_month']
+    ordering_fields = ['advance_date', 'amount', 'for_month', 'for_period']
     
     def dispatch(self, request, *args, **kwargs):
         logger.info(f"AdvancePaymentViewSet dispatch: {request.method} {request.path}")
@@ -1254,8 +1209,9 @@ class AdvancePaymentViewSet(viewsets.ModelViewSet):
             serializer = self.get_serializer(data=data)
             serializer.is_valid(raise_exception=True)
             
-            # Save with tenant
-            advance = serializer.save(tenant=tenant)
+            # Save with tenant; the employee's advance balance is updated in the same transaction
+            with transaction.atomic():
+                advance = serializer.save(tenant=tenant)
             
             # CLEAR CACHE: Invalidate payroll overview cache when payroll data changes
             from django.core.cache import cache
@@ -1288,7 +1244,8 @@ class AdvancePaymentViewSet(viewsets.ModelViewSet):
             
             serializer = self.get_serializer(instance, data=data, partial=partial)
             serializer.is_valid(raise_exception=True)
-            serializer.save()
+            with transaction.atomic():
+                serializer.save()
             
             # CLEAR CACHE: Invalidate payroll overview cache when payroll data changes
             from django.core.cache import cache
@@ -1319,7 +1276,8 @@ class AdvancePaymentViewSet(viewsets.ModelViewSet):
                     "error": "Cannot delete advance that has already been deducted from salary"
                 }, status=400)
             
-            instance.delete()
+            with transaction.atomic():
+                instance.delete()
             
             return Response({
                 'success': True,
@@ -1340,6 +1298,7 @@ def get_months_with_attendance(request):
     import time
     from django.core.cache import cache
     from django.db.models import Count, Q
+    from django.db.models.functions import TruncMonth
     import calendar
     
     start_time = time.time()
@@ -1382,18 +1341,16 @@ def get_months_with_attendance(request):
         
         from ..models import DailyAttendance, SalaryData
         
-        # Get attendance data periods
+        # Get attendance data periods, grouped on the truncated date so the
+        # tenant's rows are read through the (tenant, employee_id, date) index
         attendance_aggregated = DailyAttendance.objects.filter(
             tenant=tenant
-        ).extra(
-            select={
-                'year': "EXTRACT(year FROM date)", 
-                'month': "EXTRACT(month FROM date)"
-            }
-        ).values('year', 'month').annotate(
+        ).annotate(
+            period_start=TruncMonth('date')
+        ).values('period_start').annotate(
             attendance_records=Count('id'),
             employees_with_attendance=Count('employee_id', distinct=True)
-        ).order_by('-year', '-month')
+        ).order_by('-period_start')
         
         # Get salary data periods
         salary_aggregated = SalaryData.objects.filter(
@@ -1409,8 +1366,8 @@ def get_months_with_attendance(request):
         
         # Process attendance data
         for period in attendance_aggregated:
-            year = int(period['year'])
-            month_num = int(period['month'])
+            year = period['period_start'].year
+            month_num = period['period_start'].month
             month_name = calendar.month_name[month_num].upper()
             key = f"{year}-{month_num}"
             
@@ -1425,16 +1382,14 @@ def get_months_with_attendance(request):
                 'employees_with_salary': 0
             }
         
-        # Process salary data
-        month_name_to_num = {
-            'JAN': 1, 'FEB': 2, 'MAR': 3, 'APR': 4, 'MAY': 5, 'JUN': 6,
-            'JUL': 7, 'AUG': 8, 'SEP': 9, 'OCT': 10, 'NOV': 11, 'DEC': 12
-        }
-        
+        # Process salary data (month is stored as a full name or an abbreviation)
         for period in salary_aggregated:
             year = int(period['year'])
-            month_name = period['month']
-            month_num = month_name_to_num.get(month_name, 1)  # Default to 1 if not found
+            month_num = month_number(period['month'])
+            if not month_num:
+                # Unrecognised month text; previously these were silently filed under January
+                continue
+            month_name = calendar.month_name[month_num].upper()
             key = f"{year}-{month_num}"
             
             if key in periods_dict:
@@ -1515,13 +1470,12 @@ def calculate_simple_payroll(request):
         
         try:
             year = int(year)
-            if isinstance(month, str):
-                # Convert month name to number
-                month_num = list(calendar.month_name).index(month.title())
-            else:
-                month_num = int(month)
         except (ValueError, TypeError):
             return Response({"error": "Invalid year or month format"}, status=400)
+        # Month name ('June', 'Jun') or number
+        month_num = month_number(month)
+        if not month_num:
+            return Response({"error": "Invalid year or month format"}, status=400)
         
         # Get working days in the month (excluding weekends)
         working_days = len([d for d in range(1, calendar.monthrange(year, month_num)[1] + 1)
@@ -1560,8 +1514,7 @@ def calculate_simple_payroll(request):
         attendance_summary = Attendance.objects.filter(
             tenant=tenant,
             employee_id__in=employee_ids,
-            date__year=year,
-            date__month=month_num
+            **month_range_filter(year, month_num)
         ).values('employee_id').annotate(
             total_present=Sum('present_days', output_field=DecimalField(max_digits=5, decimal_places=1)),
             total_absent=Sum('absent_days', output_field=DecimalField(max_digits=5, decimal_places=1)),
@@ -1582,12 +1535,11 @@ def calculate_simple_payroll(request):
         
         logger.info(f"Attendance data aggregated for {len(attendance_dict)} employees")
         
-        # OPTIMIZATION 3: Bulk fetch all advance deductions
-        month_year_string = f"{calendar.month_name[month_num]} {year}"
+        # OPTIMIZATION 3: Bulk fetch all advance deductions (equality on the indexed for_period)
         advance_summary = AdvanceLedger.objects.filter(
             tenant=tenant,
             employee_id__in=employee_ids,
-            for_month__icontains=month_year_string,
+            for_period=month_bounds(year, month_num)[0],
             status__in=['PENDING', 'PARTIALLY_PAID']
         ).values('employee_id').annotate(
             total_advance=Sum('remaining_balance', output_field=DecimalField(max_digits=12, decimal_places=2))
@@ -1600,18 +1552,9 @@ def calculate_simple_payroll(request):
         }
         
         # OPTIMIZATION 3.5: Get total advance balance for each employee (all pending advances)
-        total_advance_summary = AdvanceLedger.objects.filter(
-            tenant=tenant,
-            employee_id__in=employee_ids,
-            status__in=['PENDING', 'PARTIALLY_PAID']
-        ).values('employee_id').annotate(
-            total_balance=Sum('remaining_balance', output_field=DecimalField(max_digits=12, decimal_places=2))
-        )
-        
-        # Convert to dictionary for fast lookup
         total_advance_dict = {
-            item['employee_id']: float(item['total_balance'] or 0)
-            for item in total_advance_summary
+            employee_id: float(balance)
+            for employee_id, balance in get_advance_balances(tenant, employee_ids).items()
         }
         
         logger.info(f"Advance deductions aggregated for {len(advance_dict)} employees")
@@ -1842,7 +1785,8 @@ def auto_payroll_settings(request):
 @permission_classes([IsAuthenticated])
 def manual_calculate_payroll(request):
     """
-    Manually calculate payroll for a specific month/year
+    Manually calculate payroll for a specific month/year.
+    Returns 202 with a job id; poll GET /api/payroll-jobs/<id>/ for progress.
     """
     try:
         tenant = getattr(request, 'tenant', None)
@@ -1863,26 +1807,48 @@ def manual_calculate_payroll(request):
         except (ValueError, TypeError):
             return Response({"error": "Invalid year or month format"}, status=400)
         
-        # Calculate payroll
-        results = SalaryCalculationService.calculate_salary_for_period(
-            tenant, year, month, force_recalculate=True
+        # Only employees with changed inputs are recalculated unless full=true
+        incremental = not data.get('full', False)
+        
+        # The job clears the overview cache when it finishes
+        job, created = enqueue_payroll_calculation(
+            tenant, year, month,
+            force_recalculate=True,
+            incremental=incremental,
+            user=request.user,
         )
-        # CLEAR CACHE: Invalidate payroll overview cache when payroll data changes
-        from django.core.cache import cache
-        cache_key = f"payroll_overview_{tenant.id}"
-        cache.delete(cache_key)
-        logger.info(f"Cleared payroll overview cache for tenant {tenant.id}")
         
-        return Response({
-            'success': True,
-            'message': f'Payroll calculated successfully for {month} {year}',
-            'results': results
-        })
+        return _payroll_job_response(job, created)
         
     except Exception as e:
         logger.error(f"Error in manual_calculate_payroll: {str(e)}")
         return Response({"error": f"Calculation failed: {str(e)}"}, status=500)
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def payroll_job_status(request, job_id):
+    """
+    Progress (employees done/total), timings, result and errors of a queued
+    payroll calculation job
+    """
+    try:
+        tenant = getattr(request, 'tenant', None)
+        if not tenant:
+            return Response({"error": "No tenant found"}, status=400)
+        
+        try:
+            job = BackgroundJob.objects.get(
+                id=job_id, tenant=tenant, job_type=JobType.PAYROLL_CALCULATION
+            )
+        except BackgroundJob.DoesNotExist:
+            return Response({"error": "Payroll job not found"}, status=404)
+        
+        return Response(serialize_job(job))
+        
+    except Exception as e:
+        logger.error(f"Error in payroll_job_status: {str(e)}")
+        return Response({"error": f"Failed to get job status: {str(e)}"}, status=500)
+
 # Add a new super-optimized payroll calculation function after the existing one
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -1911,19 +1877,20 @@ def calculate_simple_payroll_ultra_fast(request):
         
         try:
             year = int(year)
-            if isinstance(month, str):
-                month_num = list(calendar.month_name).index(month.title())
-            else:
-                month_num = int(month)
         except (ValueError, TypeError):
             return Response({"error": "Invalid year or month format"}, status=400)
+        # Month name ('June', 'Jun') or number
+        month_num = month_number(month)
+        if not month_num:
+            return Response({"error": "Invalid year or month format"}, status=400)
         
         # Get total days in the month (actual working days = total days - off days for each employee)
         # For summary display, we'll show total days in month
         total_days_in_month = calendar.monthrange(year, month_num)[1]
         working_days = total_days_in_month  # Use total days for summary display
         
-        month_year_string = f"{calendar.month_name[month_num]} {year}"
+        # Half-open date range so the (tenant, date) index is used; advances match on for_period
+        month_start, next_month_start = month_bounds(year, month_num)
         
         # Ultra-optimized SQL query that calculates everything in the database
         with connection.cursor() as cursor:
@@ -1963,7 +1930,7 @@ def calculate_simple_payroll_ultra_fast(request):
                 
                 -- Advance deductions
                 COALESCE(adv.advance_deduction, 0) as advance_deduction,
-                COALESCE(total_adv.total_advance_balance, 0) as total_advance_balance,
+                COALESCE(total_adv.balance, 0) as total_advance_balance,
                 
                 -- Employee rates
                 COALESCE(e.ot_charge_per_hour, 0) as ot_rate
@@ -1979,8 +1946,8 @@ def calculate_simple_payroll_ultra_fast(request):
                     SUM(COALESCE(late_minutes, 0)) as late_minutes
                 FROM excel_data_dailyattendance 
                 WHERE tenant_id = %s 
-                    AND EXTRACT(YEAR FROM date) = %s 
-                    AND EXTRACT(MONTH FROM date) = %s
+                    AND date >= %s 
+                    AND date < %s
                 GROUP BY employee_id
             ) att ON e.employee_id = att.employee_id
             
@@ -1990,20 +1957,13 @@ def calculate_simple_payroll_ultra_fast(request):
                     SUM(COALESCE(remaining_balance, 0)) as advance_deduction
                 FROM excel_data_advanceledger 
                 WHERE tenant_id = %s 
-                    AND for_month LIKE %s
+                    AND for_period = %s
                     AND status IN ('PENDING', 'PARTIALLY_PAID')
                 GROUP BY employee_id
             ) adv ON e.employee_id = adv.employee_id
             
-            LEFT JOIN (
-                SELECT 
-                    employee_id,
-                    SUM(COALESCE(remaining_balance, 0)) as total_advance_balance
-                FROM excel_data_advanceledger 
-                WHERE tenant_id = %s 
-                    AND status IN ('PENDING', 'PARTIALLY_PAID')
-                GROUP BY employee_id
-            ) total_adv ON e.employee_id = total_adv.employee_id
+            LEFT JOIN excel_data_employeeadvancebalance total_adv
+                ON total_adv.tenant_id = %s AND total_adv.employee_id = e.employee_id
             
             WHERE e.tenant_id = %s 
                 AND e.is_active = true
@@ -2012,9 +1972,9 @@ def calculate_simple_payroll_ultra_fast(request):
             
             cursor.execute(sql, [
                 working_days, working_days, working_days,  # working days parameters
-                tenant.id, year, month_num,  # attendance parameters
-                tenant.id, f'%{month_year_string}%',  # advance parameters
-                tenant.id,  # total advance parameters
+                tenant.id, month_start, next_month_start,  # attendance parameters
+                tenant.id, month_start,  # advance parameters
+                tenant.id,  # advance balance parameters
                 tenant.id  # employee filter
             ])
             
@@ -2128,14 +2088,16 @@ def calculate_simple_payroll_ultra_fast(request):
 def save_payroll_period_direct(request):
     """
     Save payroll period directly with the provided data (no recalculation)
-    This preserves any manual edits made to advance deductions or other fields
+    This preserves any manual edits made to advance deductions or other fields.
+    Only rows that differ from the stored ones are written; the response
+    reports inserted/updated/unchanged/deleted counts.
     """
     try:
         tenant = getattr(request, 'tenant', None)
         if not tenant:
             return Response({"error": "No tenant found"}, status=400)
         
-        from ..models import PayrollPeriod, CalculatedSalary
+        from ..models import PayrollPeriod
         import calendar
         
         # Get request data
@@ -2148,19 +2110,13 @@ def save_payroll_period_direct(request):
         
         try:
             year = int(year)
-            if isinstance(month, str):
-                # Handle both month name and number
-                if month.isdigit():
-                    month_num = int(month)
-                    month_name = calendar.month_name[month_num].upper()
-                else:
-                    month_name = month.upper()
-                    month_num = list(calendar.month_name).index(month.title())
-            else:
-                month_num = int(month)
-                month_name = calendar.month_name[month_num].upper()
-        except (ValueError, TypeError, IndexError):
+        except (ValueError, TypeError):
+            return Response({"error": "Invalid year or month format"}, status=400)
+        # Month name ('June', 'Jun') or number; stored under the full month name
+        month_num = month_number(month)
+        if not month_num:
             return Response({"error": "Invalid year or month format"}, status=400)
+        month_name = calendar.month_name[month_num].upper()
         
         # Create or get payroll period
         payroll_period, created = PayrollPeriod.objects.get_or_create(
@@ -2173,50 +2129,11 @@ def save_payroll_period_direct(request):
             }
         )
         
-        # Delete existing calculated salaries for this period (to replace with new data)
-        CalculatedSalary.objects.filter(
-            tenant=tenant,
-            payroll_period=payroll_period
-        ).delete()
-        
-        # Create new calculated salary records directly from the provided data
-        calculated_salaries = []
-        for entry in payroll_entries:
-            calculated_salary = CalculatedSalary(
-                tenant=tenant,
-                payroll_period=payroll_period,
-                employee_id=entry.get('employee_id'),
-                employee_name=entry.get('employee_name'),
-                department=entry.get('department'),
-                basic_salary=entry.get('base_salary', 0),
-                basic_salary_per_hour=0,  # Can be calculated if needed
-                basic_salary_per_minute=0,  # Can be calculated if needed
-                employee_ot_rate=0,  # Set from employee profile if needed
-                employee_tds_rate=entry.get('tds_percentage', 0),
-                total_working_days=entry.get('working_days', 0),
-                present_days=entry.get('present_days', 0),
-                absent_days=entry.get('absent_days', 0),
-                ot_hours=entry.get('ot_hours', 0),
-                late_minutes=entry.get('late_minutes', 0),
-                salary_for_present_days=entry.get('gross_salary', 0),
-                ot_charges=entry.get('ot_charges', 0),
-                late_deduction=entry.get('late_deduction', 0),
-                incentive=0,  # Add if needed
-                gross_salary=entry.get('gross_salary', 0) + entry.get('ot_charges', 0) - entry.get('late_deduction', 0),
-                tds_amount=entry.get('tds_amount', 0),
-                salary_after_tds=entry.get('gross_salary', 0) + entry.get('ot_charges', 0) - entry.get('late_deduction', 0) - entry.get('tds_amount', 0),
-                total_advance_balance=entry.get('total_advance_balance', 0),
-                advance_deduction_amount=entry.get('advance_deduction', 0),
-                advance_deduction_editable=True,
-                remaining_advance_balance=entry.get('remaining_balance', 0),
-                net_payable=entry.get('net_salary', 0),
-                data_source='FRONTEND',
-                is_paid=entry.get('is_paid', False),
-            )
-            calculated_salaries.append(calculated_salary)
-        
-        # Bulk create all calculated salary records
-        CalculatedSalary.objects.bulk_create(calculated_salaries)
+        # Write only what differs from the stored rows (see SalaryCalculationService.save_direct_entries)
+        try:
+            counts = SalaryCalculationService.save_direct_entries(tenant, payroll_period, payroll_entries)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
         
         # CLEAR CACHE: Invalidate payroll overview cache when payroll data changes
         from django.core.cache import cache
@@ -2224,13 +2141,20 @@ def save_payroll_period_direct(request):
         cache.delete(cache_key)
         logger.info(f"Cleared payroll overview cache for tenant {tenant.id}")
         
-        logger.info(f"Saved payroll period {month_name} {year} with {len(calculated_salaries)} entries directly")
+        logger.info(
+            f"Saved payroll period {month_name} {year} directly: {counts['inserted']} inserted, "
+            f"{counts['updated']} updated, {counts['unchanged']} unchanged, {counts['deleted']} deleted"
+        )
         
         return Response({
             'success': True,
             'message': f'Payroll period saved successfully for {month_name} {year}',
             'payroll_period_id': payroll_period.id,
-            'saved_entries': len(calculated_salaries),
+            'saved_entries': counts['inserted'] + counts['updated'] + counts['unchanged'],
+            'inserted': counts['inserted'],
+            'updated': counts['updated'],
+            'unchanged': counts['unchanged'],
+            'deleted': counts['deleted'],
             'created_new_period': created,
             'cache_cleared': True
         })
@@ -2331,60 +2255,16 @@ def bulk_update_payroll_period(request, period_id):
                 ['is_paid', 'payment_date', 'advance_deduction_amount', 'net_payable'],
                 batch_size=100
             )
+            refresh_period_rollups([payroll_period.id])
 
-            # Process advance ledger updates for paid salaries (similar to mark_salary_paid logic)
+            # Repay advances for paid salaries (same FIFO allocation as mark_salary_paid)
             if advance_deductions_processed:
                 logger.info(f"Processing advance deductions for {len(advance_deductions_processed)} employees")
-                
-                # Get all relevant advance records in one query
-                all_employee_ids = list(advance_deductions_processed.keys())
-                all_advances = AdvanceLedger.objects.filter(
-                    tenant=tenant,
-                    employee_id__in=all_employee_ids,
-                    status__in=['PENDING','PARTIALLY_PAID']
-                ).order_by('employee_id', 'advance_date')
-
-                # Group advances by employee for efficient processing
-                advances_by_employee = {}
-                for advance in all_advances:
-                    if advance.employee_id not in advances_by_employee:
-                        advances_by_employee[advance.employee_id] = []
-                    advances_by_employee[advance.employee_id].append(advance)
-
-                # Process advance deductions for each employee
-                advances_to_update = []
-                advances_to_mark_repaid = []
-
-                for employee_id, total_deduction in advance_deductions_processed.items():
-                    remaining_deduction = Decimal(str(total_deduction))
-                    employee_advances = advances_by_employee.get(employee_id, [])
-
-                    for advance in employee_advances:
-                        if remaining_deduction <= 0:
-                            break
-
-                        current_balance = advance.remaining_balance
-                        if current_balance <= remaining_deduction:
-                            # This advance is fully paid
-                            advance.status = 'REPAID'
-                            advance.remaining_balance = Decimal('0')
-                            advances_to_mark_repaid.append(advance)
-                            remaining_deduction -= current_balance
-                        else:
-                            # This advance is partially paid - reduce the remaining_balance
-                            advance.remaining_balance -= remaining_deduction
-                            advance.status = 'PARTIALLY_PAID'
-                            advances_to_update.append(advance)
-                            remaining_deduction = Decimal('0')
-
-                # Execute bulk updates for advance ledger
-                if advances_to_update:
-                    AdvanceLedger.objects.bulk_update(advances_to_update, ['remaining_balance', 'status'], batch_size=100)
-                    logger.info(f"Bulk updated {len(advances_to_update)} advance remaining balances")
-
-                if advances_to_mark_repaid:
-                    AdvanceLedger.objects.bulk_update(advances_to_mark_repaid, ['status', 'remaining_balance'], batch_size=100)
-                    logger.info(f"Marked {len(advances_to_mark_repaid)} advances as repaid")
+                stats = apply_advance_repayments(tenant.id, advance_deductions_processed)
+                logger.info(
+                    f"Updated {stats['partially_paid']} advance remaining balances, "
+                    f"marked {stats['repaid']} advances as repaid"
+                )
 
         # Clear payroll overview cache
         from django.core.cache import cache
@@ -7,16 +7,23 @@
 # - calculate_ot_rate
 # - attendance_status
 # - bulk_update_attendance
+# - bulk_update_attendance_multi_date
 # - update_monthly_summaries_parallel
+# - background_job_status
+# - run_queued_jobs
 # - get_eligible_employees_for_date
+# - employee_attendance_calendar
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from ..models import EmployeeProfile
 from django.db.models import Q, Sum, Count
+from django.conf import settings
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare
 from django.utils import timezone
 from rest_framework.permissions import IsAuthenticated, AllowAny
 import logging
@@ -39,6 +46,7 @@ from ..models import (
     SalaryAdjustment,
     DataSource,
     MonthlyAttendanceSummary,
+    BackgroundJob,
 )
 
 from ..serializers import (
@@ -71,6 +79,25 @@ from ..utils.utils import (
 )
 
 from ..services.salary_service import SalaryCalculationService
+from ..services.payroll_change_tracker import mark_employees_dirty
+from ..services.attendance_upsert_service import UPSERT_CHUNK_SIZE, upsert_daily_attendance
+from ..services.attendance_import_service import import_attendance_workbook
+from ..services.job_service import drain_jobs, enqueue_summary_rebuild, serialize_job
+from ..services.calendar_service import month_range_filter
+from ..services.holiday_service import tenant_holidays
+from ..services.attendance_calendar_service import (
+    MAX_CALENDAR_MONTHS,
+    build_attendance_calendar,
+    calendar_span_months,
+    default_calendar_range,
+)
+from ..services.eligible_employees_service import (
+    DEFAULT_PAGE_SIZE as DEFAULT_ELIGIBLE_PAGE_SIZE,
+    MAX_PAGE_SIZE as MAX_ELIGIBLE_PAGE_SIZE,
+    eligible_employees,
+    eligible_employees_after_first_page,
+    eligible_employees_page,
+)
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -293,8 +320,7 @@ def attendance_status(request):
         # Get employees with attendance records this month
         employees_with_records = Attendance.objects.filter(
             tenant=tenant,
-            date__year=current_date.year,
-            date__month=current_date.month
+            **month_range_filter(current_date.year, current_date.month)
         ).count()
         
         # Check if we have day-by-day attendance data (DailyAttendance records)
@@ -318,6 +344,45 @@ def attendance_status(request):
         logger.error(f"Error getting attendance status: {str(e)}")
         return Response({"error": "Failed to get attendance status"}, status=500)
 
+def _attendance_row(employee, record, attendance_date):
+    """
+    DailyAttendance upsert row for one submitted attendance record, or None when
+    the employee hadn't joined by ``attendance_date`` or has that weekday off
+    """
+    # Check if employee has joined by this date
+    if employee.date_of_joining and attendance_date < employee.date_of_joining:
+        return None
+    
+    # OPTIMIZED: Use pre-calculated off day check (Monday = 0, Sunday = 6)
+    off_day_flags = [
+        employee.off_monday, employee.off_tuesday, employee.off_wednesday,
+        employee.off_thursday, employee.off_friday, employee.off_saturday, employee.off_sunday
+    ]
+    if off_day_flags[attendance_date.weekday()]:
+        return None
+    
+    # OPTIMIZED: Minimal data processing
+    ot_hours = float(record.get('ot_hours', 0))
+    late_minutes = int(record.get('late_minutes', 0))
+    
+    # Handle off-day status optimization
+    if record.get('status') == 'off':
+        ot_hours = 0
+        late_minutes = 0
+    
+    return {
+        'employee_id': employee.employee_id,
+        'date': attendance_date,
+        'employee_name': record.get('name') or f"{employee.first_name} {employee.last_name}",
+        'department': record.get('department') or employee.department or 'General',
+        'designation': employee.designation or 'General',
+        'employment_type': employee.employment_type or 'FULL_TIME',
+        # OPTIMIZED: Fast status determination
+        'attendance_status': 'PRESENT' if record.get('status') == 'present' else 'ABSENT',
+        'ot_hours': ot_hours,
+        'late_minutes': late_minutes,
+    }
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def bulk_update_attendance(request):
@@ -351,9 +416,6 @@ def bulk_update_attendance(request):
         if attendance_date > datetime.now().date():
             return Response({"error": "Cannot mark attendance for future dates"}, status=400)
         
-        # Get day of week for off-day checks
-        day_of_week = attendance_date.weekday()  # Monday = 0, Sunday = 6
-        
         # Extract all employee IDs from attendance records
         employee_ids = [record.get('employee_id') for record in attendance_records if record.get('employee_id')]
         
@@ -370,17 +432,8 @@ def bulk_update_attendance(request):
         # Create employee lookup dictionary for fast access
         employee_lookup = {emp.employee_id: emp for emp in employees}
         
-        # Get existing attendance records for this date to determine updates vs creates
-        existing_attendance = DailyAttendance.objects.filter(
-            tenant=tenant,
-            employee_id__in=employee_ids,
-            date=attendance_date
-        )
-        existing_lookup = {att.employee_id: att for att in existing_attendance}
-        
-        # Prepare batch data
-        records_to_create = []
-        records_to_update = []
+        # Prepare batch data (the upsert decides between create and update)
+        attendance_rows = []
         created_count = 0
         updated_count = 0
         skipped_count = 0
@@ -408,64 +461,13 @@ def bulk_update_attendance(request):
                     errors.append(f"Employee {employee_id} not found or inactive")
                     continue
                 
-                # Check if employee has joined by this date
-                if employee.date_of_joining and attendance_date < employee.date_of_joining:
+                # Skips dates before joining and the employee's off days
+                row = _attendance_row(employee, record, attendance_date)
+                if row is None:
                     skipped_count += 1
                     continue
                 
-                # OPTIMIZED: Use pre-calculated off day check
-                off_day_flags = [
-                    employee.off_monday, employee.off_tuesday, employee.off_wednesday,
-                    employee.off_thursday, employee.off_friday, employee.off_saturday, employee.off_sunday
-                ]
-                
-                if off_day_flags[day_of_week]:
-                    skipped_count += 1
-                    continue  # Skip attendance for off days
-                
-                # OPTIMIZED: Minimal data processing
-                ot_hours = float(record.get('ot_hours', 0))
-                late_minutes = int(record.get('late_minutes', 0))
-                employee_name = record.get('name') or f"{employee.first_name} {employee.last_name}"
-                department = record.get('department') or employee.department or 'General'
-                
-                # Handle off-day status optimization
-                if record.get('status') == 'off':
-                    ot_hours = 0
-                    late_minutes = 0
-                
-                # OPTIMIZED: Fast status determination
-                attendance_status = 'PRESENT' if record.get('status') == 'present' else 'ABSENT'
-                
-                # OPTIMIZED: Prepare record data with minimal overhead
-                record_data = {
-                    'employee_name': employee_name,
-                    'department': department,
-                    'designation': employee.designation or 'General',
-                    'employment_type': employee.employment_type or 'FULL_TIME',
-                    'attendance_status': attendance_status,
-                    'ot_hours': ot_hours,
-                    'late_minutes': late_minutes,
-                }
-                
-                # OPTIMIZED: Fast update/create decision
-                if employee_id in existing_lookup:
-                    # Update existing record
-                    existing_record = existing_lookup[employee_id]
-                    for key, value in record_data.items():
-                        setattr(existing_record, key, value)
-                    records_to_update.append(existing_record)
-                    updated_count += 1
-                else:
-                    # Create new record
-                    new_record = DailyAttendance(
-                        tenant=tenant,
-                        employee_id=employee_id,
-                        date=attendance_date,
-                        **record_data
-                    )
-                    records_to_create.append(new_record)
-                    created_count += 1
+                attendance_rows.append(row)
                     
             except Exception as e:
                 errors.append(f"Error processing employee {record.get('employee_id', 'unknown')}: {str(e)}")
@@ -473,104 +475,40 @@ def bulk_update_attendance(request):
         processing_time = time.time() - processing_start_time
         logger.info(f"OPTIMIZED: Processed {len(attendance_records)} records in {processing_time:.3f}s")
         
-        # ULTRA OPTIMIZED: Perform bulk operations with raw SQL for maximum speed
+        # Upsert in chunked, parameterised INSERT ... ON CONFLICT statements; the
+        # monthly summaries get the old/new differences in the same transaction
         db_start_time = time.time()
         
         with transaction.atomic():
-            # ULTRA FAST: Use raw SQL for bulk operations instead of ORM
-            from django.db import connection
-            
-            # OPTIMIZED: Bulk create with raw SQL (much faster than ORM)
-            if records_to_create:
-                cursor = connection.cursor()
-                
-                # Prepare bulk insert query
-                insert_values = []
-                for record in records_to_create:
-                    # Escape single quotes properly for SQL
-                    safe_name = record.employee_name.replace("'", "''")
-                    safe_dept = record.department.replace("'", "''")
-                    safe_designation = record.designation.replace("'", "''")
-                    
-                    insert_values.append(
-                        f"('{record.tenant.id}', '{record.employee_id}', '{record.date}', "
-                        f"'{safe_name}', '{safe_dept}', "
-                        f"'{safe_designation}', '{record.employment_type}', '{record.attendance_status}', "
-                        f"{record.ot_hours}, {record.late_minutes}, NOW(), NOW())"
-                    )
-                
-                if insert_values:
-                    insert_query = f"""
-                        INSERT INTO excel_data_dailyattendance 
-                        (tenant_id, employee_id, date, employee_name, department, designation, 
-                         employment_type, attendance_status, ot_hours, late_minutes, created_at, updated_at)
-                        VALUES {', '.join(insert_values)}
-                    """
-                    cursor.execute(insert_query)
-                    logger.info(f"ULTRA FAST: Raw SQL bulk created {len(records_to_create)} records")
+            upserted = upsert_daily_attendance(tenant.id, attendance_rows)
+            created_count = upserted['created']
+            updated_count = upserted['updated']
             
-            # OPTIMIZED: Bulk update with raw SQL (much faster than ORM)
-            if records_to_update:
-                cursor = connection.cursor()
-                
-                # Prepare bulk update queries (using CASE statements for efficiency)
-                employee_ids = [f"'{record.employee_id}'" for record in records_to_update]
-                
-                # Build CASE statements for each field
-                name_cases = []
-                dept_cases = []
-                status_cases = []
-                ot_cases = []
-                late_cases = []
-                
-                for record in records_to_update:
-                    eid = record.employee_id
-                    safe_name = record.employee_name.replace("'", "''")
-                    safe_dept = record.department.replace("'", "''")
-                    
-                    name_cases.append(f"WHEN employee_id = '{eid}' THEN '{safe_name}'")
-                    dept_cases.append(f"WHEN employee_id = '{eid}' THEN '{safe_dept}'")
-                    status_cases.append(f"WHEN employee_id = '{eid}' THEN '{record.attendance_status}'")
-                    ot_cases.append(f"WHEN employee_id = '{eid}' THEN {record.ot_hours}")
-                    late_cases.append(f"WHEN employee_id = '{eid}' THEN {record.late_minutes}")
-                
-                update_query = f"""
-                    UPDATE excel_data_dailyattendance SET
-                        employee_name = CASE {' '.join(name_cases)} END,
-                        department = CASE {' '.join(dept_cases)} END,
-                        attendance_status = CASE {' '.join(status_cases)} END,
-                        ot_hours = CASE {' '.join(ot_cases)} END,
-                        late_minutes = CASE {' '.join(late_cases)} END,
-                        updated_at = NOW()
-                    WHERE tenant_id = '{tenant.id}' 
-                    AND date = '{attendance_date}' 
-                    AND employee_id IN ({', '.join(employee_ids)})
-                """
-                cursor.execute(update_query)
-                logger.info(f"ULTRA FAST: Raw SQL bulk updated {len(records_to_update)} records")
+            # The upsert bypasses model signals, so record the payroll change explicitly
+            mark_employees_dirty(
+                tenant.id,
+                [(row['employee_id'], attendance_date.year, attendance_date.month) for row in attendance_rows],
+                reason='attendance',
+            )
         
         db_operation_time = time.time() - db_start_time
         logger.info(f"OPTIMIZED: Core DB operations completed in {db_operation_time:.3f}s")
         
-        # LIGHTNING FAST: Skip monthly summary recalculation for bulk uploads
-        # Instead, defer this to a background task or make it optional
+        # Monthly summaries were delta-updated inside the upsert transaction
         summary_start_time = time.time()
-        summaries_updated = 0
+        summaries_updated = upserted['summaries_updated'] + upserted['summaries_created']
         
-        # Get all affected employee IDs for cache clearing only
+        # Get all affected employee IDs for cache clearing
         affected_employee_ids = set()
-        for record in records_to_create + records_to_update:
-            affected_employee_ids.add(record.employee_id)
-        
-        # PERFORMANCE DECISION: Skip heavy monthly summary calculation
-        # This reduces 7+ seconds to nearly instant for bulk operations
-        # Monthly summaries can be calculated on-demand or via background job
+        for row in attendance_rows:
+            affected_employee_ids.add(row['employee_id'])
         
-        logger.info(f"LIGHTNING FAST: Skipped monthly summary recalculation for {len(affected_employee_ids)} employees")
-        logger.info("Monthly summaries will be calculated on-demand when needed")
+        logger.info(
+            f"Monthly summaries: {upserted['summaries_updated']} delta-updated, "
+            f"{upserted['summaries_created']} created for {len(affected_employee_ids)} employees"
+        )
         
         summary_time = time.time() - summary_start_time
-        logger.info(f"LIGHTNING OPTIMIZED: Summary processing completed in {summary_time:.3f}s")
         
         # CLEAR CACHE: Invalidate ALL attendance-related caches
         from django.core.cache import cache
@@ -634,12 +572,6 @@ def bulk_update_attendance(request):
         cache.delete(dashboard_stats_cache_key)
         cache_keys_cleared.append('dashboard_stats')
         
-        # 9. NEW: Clear employee attendance history caches for affected employees
-        for employee_id in affected_employee_ids:
-            emp_cache_key = f"employee_attendance_{tenant.id}_{employee_id}"
-            cache.delete(emp_cache_key)
-        cache_keys_cleared.append('employee_attendance_history')
-        
         cache_clear_time = time.time() - cache_start_time
         logger.info(f"OPTIMIZED: Cleared {len(cache_keys_cleared)} cache types in {cache_clear_time:.3f}s")
         
@@ -659,9 +591,9 @@ def bulk_update_attendance(request):
                 'employees_processed': len(attendance_records)
             },
             'monthly_summary_update': {
-                'summaries_updated': 0,
-                'update_method': 'lightning_fast_deferred',
-                'note': 'Monthly summaries will be calculated on-demand for maximum upload speed'
+                'summaries_updated': summaries_updated,
+                'update_method': 'delta_in_transaction',
+                'note': 'Monthly summaries were updated with the attendance changes'
             },
             'performance': {
                 'total_time': f"{total_function_time:.3f}s",
@@ -672,8 +604,7 @@ def bulk_update_attendance(request):
                 'bulk_operations': True,
                 'optimization_level': 'lightning_fast',
                 'batch_sizes': {
-                    'attendance_records': 250,
-                    'deferred_summaries': 'on_demand'
+                    'attendance_records': UPSERT_CHUNK_SIZE,
                 },
                 'avg_time_per_record': f"{(total_function_time / len(attendance_records)):.3f}s" if attendance_records else '0s',
                 'records_per_second': int(len(attendance_records) / total_function_time) if total_function_time > 0 and attendance_records else 0,
@@ -683,7 +614,7 @@ def bulk_update_attendance(request):
                     'summary_calculations': f"{(summary_time / total_function_time * 100):.1f}%" if total_function_time > 0 else '0%',
                     'cache_clearing': f"{(cache_clear_time / total_function_time * 100):.1f}%" if total_function_time > 0 else '0%'
                 },
-                'optimization_note': 'Monthly summaries deferred for instant bulk upload performance'
+                'optimization_note': 'Monthly summaries delta-updated in the attendance transaction'
             }
         }
         
@@ -705,6 +636,178 @@ def bulk_update_attendance(request):
         logger.error(f"Error in bulk update attendance: {str(e)}")
         return Response({"error": "Failed to update attendance"}, status=500)
 
+# Largest back-fill accepted by bulk_update_attendance_multi_date in one request
+MAX_MULTI_DATE_RECORDS = 50000
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_update_attendance_multi_date(request):
+    """
+    Bulk attendance across any number of dates in one request, e.g. back-filling
+    a week or a month from punch-clock exports.
+    
+    Body: {"attendance_records": [{"employee_id", "date", "status", "ot_hours", "late_minutes"}, ...]}
+    
+    Employees are fetched once, joining dates and off days are checked in the
+    same pass, rows are upserted in chunks, caches are cleared once and each
+    affected employee-month summary is updated once in the same transaction.
+    """
+    try:
+        from datetime import datetime
+        from django.db import transaction
+        from django.core.cache import cache
+        
+        start_time = time.time()
+        
+        tenant = getattr(request, 'tenant', None)
+        if not tenant:
+            return Response({"error": "No tenant found"}, status=400)
+        
+        attendance_records = request.data.get('attendance_records', [])
+        if not attendance_records or not isinstance(attendance_records, list):
+            return Response({"error": "Attendance records are required"}, status=400)
+        if len(attendance_records) > MAX_MULTI_DATE_RECORDS:
+            return Response(
+                {"error": f"At most {MAX_MULTI_DATE_RECORDS} attendance records can be submitted per request"},
+                status=400
+            )
+        
+        employee_ids = {str(record.get('employee_id')) for record in attendance_records if record.get('employee_id')}
+        if not employee_ids:
+            return Response({"error": "No valid employee IDs found"}, status=400)
+        
+        # One query for every employee in the batch
+        employee_lookup = {
+            employee.employee_id: employee
+            for employee in EmployeeProfile.objects.filter(
+                tenant=tenant, employee_id__in=employee_ids, is_active=True
+            ).only(
+                'employee_id', 'first_name', 'last_name', 'department', 'designation', 'employment_type',
+                'date_of_joining', 'off_monday', 'off_tuesday', 'off_wednesday', 'off_thursday',
+                'off_friday', 'off_saturday', 'off_sunday',
+            )
+        }
+        
+        today = datetime.now().date()
+        parsed_dates = {}
+        attendance_rows = []
+        skipped_count = 0
+        errors = []
+        
+        for index, record in enumerate(attendance_records):
+            try:
+                employee_id = str(record.get('employee_id') or '')
+                if not employee_id:
+                    errors.append(f"Record {index + 1}: missing employee_id")
+                    continue
+                
+                date_str = record.get('date')
+                if date_str not in parsed_dates:
+                    try:
+                        parsed_dates[date_str] = datetime.strptime(str(date_str), '%Y-%m-%d').date()
+                    except ValueError:
+                        parsed_dates[date_str] = None
+                attendance_date = parsed_dates[date_str]
+                if attendance_date is None:
+                    errors.append(f"Record {index + 1}: invalid date {date_str!r}. Use YYYY-MM-DD")
+                    continue
+                if attendance_date > today:
+                    errors.append(f"Record {index + 1}: cannot mark attendance for future date {date_str}")
+                    continue
+                
+                employee = employee_lookup.get(employee_id)
+                if not employee:
+                    errors.append(f"Record {index + 1}: employee {employee_id} not found or inactive")
+                    continue
+                
+                # Skips dates before joining and the employee's off days
+                row = _attendance_row(employee, record, attendance_date)
+                if row is None:
+                    skipped_count += 1
+                    continue
+                
+                attendance_rows.append(row)
+                
+            except Exception as e:
+                errors.append(f"Record {index + 1}: error processing employee {record.get('employee_id', 'unknown')}: {str(e)}")
+        
+        processing_time = time.time() - start_time
+        
+        db_start_time = time.time()
+        touched_months = {(row['employee_id'], row['date'].year, row['date'].month) for row in attendance_rows}
+        with transaction.atomic():
+            # Also applies each employee-month's summary change once
+            upserted = upsert_daily_attendance(tenant.id, attendance_rows)
+            
+            # The upsert bypasses model signals, so record the payroll change explicitly
+            mark_employees_dirty(tenant.id, touched_months, reason='attendance')
+        db_operation_time = time.time() - db_start_time
+        
+        # CLEAR CACHE once for the whole batch
+        dates = sorted({row['date'] for row in attendance_rows})
+        months = sorted({(year, month) for _, year, month in touched_months})
+        cache_keys = [
+            f"payroll_overview_{tenant.id}",
+            f"months_with_attendance_{tenant.id}",
+            f"directory_data_{tenant.id}",
+            f"attendance_all_records_{tenant.id}",
+            f"attendance_log_{tenant.id}",
+            f"attendance_tracker_{tenant.id}",
+            f"dashboard_stats_{tenant.id}",
+        ]
+        for attendance_date in dates:
+            cache_keys.extend([
+                f"eligible_employees_{tenant.id}_{attendance_date}",
+                f"eligible_employees_opt_{tenant.id}_{attendance_date}_p1_s500",
+                f"eligible_employees_progressive_{tenant.id}_{attendance_date}_initial",
+                f"eligible_employees_progressive_{tenant.id}_{attendance_date}_remaining",
+                f"total_eligible_count_{tenant.id}_{attendance_date}",
+            ])
+        cache_keys.extend(f"monthly_attendance_summary_{tenant.id}_{year}_{month}" for year, month in months)
+        cache.delete_many(cache_keys)
+        
+        total_time = time.time() - start_time
+        total_uploaded = upserted['created'] + upserted['updated']
+        logger.info(
+            f"Multi-date attendance: {total_uploaded} rows over {len(dates)} dates "
+            f"for tenant {tenant.id} in {total_time:.3f}s"
+        )
+        
+        response_data = {
+            'message': f'Attendance uploaded successfully! {total_uploaded} records across {len(dates)} dates processed.',
+            'status': 'success',
+            'attendance_upload': {
+                'total_processed': total_uploaded,
+                'created_count': upserted['created'],
+                'updated_count': upserted['updated'],
+                'skipped_count': skipped_count,
+                'records_received': len(attendance_records),
+                'dates_processed': len(dates),
+                'date_range': {
+                    'from': dates[0].isoformat() if dates else None,
+                    'to': dates[-1].isoformat() if dates else None,
+                },
+                'employee_months_refreshed': len(touched_months),
+            },
+            'performance': {
+                'total_time': f"{total_time:.3f}s",
+                'processing_time': f"{processing_time:.3f}s",
+                'db_operation_time': f"{db_operation_time:.3f}s",
+                'cache_keys_cleared': len(cache_keys),
+                'upsert_chunk_size': UPSERT_CHUNK_SIZE,
+            },
+        }
+        
+        if errors:
+            response_data['errors'] = errors
+            response_data['message'] += f' ({len(errors)} notes/errors)'
+        
+        return Response(response_data, status=200)
+        
+    except Exception as e:
+        logger.error(f"Error in multi-date bulk attendance update: {str(e)}")
+        return Response({"error": "Failed to update attendance"}, status=500)
+
 # Clean replacement for the update_monthly_summaries_parallel function
 
 @api_view(['POST'])
@@ -712,16 +815,17 @@ def bulk_update_attendance(request):
 def update_monthly_summaries_parallel(request):
     """
     Asynchronous API for updating monthly summaries after bulk attendance upload.
-    Returns immediately while processing summaries in background thread.
+    Returns immediately with a background job id while the summaries are rebuilt
+    by a worker (manage.py run_workers, or the scheduled run_queued_jobs call).
     
     Expected usage:
     1. Frontend calls this API after bulk attendance upload
-    2. Returns success immediately 
-    3. Processing happens in background thread using ULTRA-FAST bulk operations
-    4. Cache is cleared immediately for instant UI updates
+    2. Returns success immediately with the job id
+    3. A worker rebuilds the month's summaries with bulk operations, retrying on failure
+    4. Cache is cleared immediately for instant UI updates (and again when the job finishes)
+    5. GET /api/jobs/<job_id>/ reports the job's progress
     """
     try:
-        import threading
         from datetime import datetime
         from django.core.cache import cache
         
@@ -796,51 +900,42 @@ def update_monthly_summaries_parallel(request):
         logger.info(f"🗑️ ASYNC SUMMARY: Cleared {len(cache_keys_to_clear) + 4} cache keys in {cache_time:.3f}s")
         logger.info(f"🗑️ ASYNC SUMMARY: Cache keys cleared: {cache_keys_to_clear[:5]}{'...' if len(cache_keys_to_clear) > 5 else ''}")
         
-        # Define ULTRA-FAST background processing function with bulk operations
-        def process_summaries_background():
-            """ULTRA-OPTIMIZED: Use dedicated ultra-fast function for maximum performance"""
-            from ultra_fast_summary import ultra_fast_process_summaries_background
-            ultra_fast_process_summaries_background(tenant, attendance_date, employee_ids, cache)
-        
-        # Start background processing thread
-        if employee_ids:
-            logger.info(f"🧵 ASYNC SUMMARY: About to start background thread for {len(employee_ids)} employees")
-            print(f"🧵 CONSOLE: About to start background thread for {len(employee_ids)} employees")  # Console fallback
-            
-            background_thread = threading.Thread(target=process_summaries_background, daemon=True)
-            background_thread.start()
-            
-            logger.info(f"🧵 ASYNC SUMMARY: Background thread started successfully - Thread ID: {background_thread.ident}")
-            logger.info(f"🧵 ASYNC SUMMARY: Thread is alive: {background_thread.is_alive()}")
-            print(f"🧵 CONSOLE: Background thread started - ID: {background_thread.ident}, Alive: {background_thread.is_alive()}")
-        else:
-            logger.warning(f"⚠️ ASYNC SUMMARY: No employee IDs provided - skipping background processing")
-            print(f"⚠️ CONSOLE: No employee IDs provided - skipping background processing")
+        # Rebuild the month's summaries in a background job (all employees when none are given)
+        job, created = enqueue_summary_rebuild(
+            tenant, attendance_date.year, attendance_date.month,
+            employee_ids=employee_ids or None,
+            user=request.user,
+        )
+        logger.info(f"🧵 ASYNC SUMMARY: {'Queued' if created else 'Merged into'} summary rebuild job {job.id}")
         
         # Return immediately with success response
         total_time = time.time() - start_time
         
         response_data = {
-            'message': f'✅ Monthly summary update started! Processing {len(employee_ids)} employees in background.',
+            'message': f'✅ Monthly summary update queued! Processing {len(employee_ids) or "all"} employees in background.',
             'status': 'success',
+            'job_id': job.id,
+            'job_status': job.status,
+            'status_url': reverse('utils:background-job-status', args=[job.id]),
+            'already_queued': not created,
             'summary_update': {
                 'employees_to_process': len(employee_ids),
                 'date': date_str,
                 'month': f"{attendance_date.year}-{attendance_date.month:02d}",
-                'update_method': 'async_background',
-                'processing_status': 'started'
+                'update_method': 'background_job',
+                'processing_status': 'queued'
             },
             'performance': {
                 'response_time': f"{total_time:.3f}s",
                 'cache_clear_time': f"{cache_time:.3f}s",
                 'cache_keys_cleared': len(cache_keys_to_clear) + 2,
-                'processing_mode': 'ultra_fast_background_thread'
+                'processing_mode': 'background_job'
             },
             'cache_cleared': True,
             'background_processing': True
         }
         
-        logger.info(f"ASYNC SUMMARY: Returned response in {total_time:.3f}s, background processing started")
+        logger.info(f"ASYNC SUMMARY: Returned response in {total_time:.3f}s, background job queued")
         
         return Response(response_data, status=200)
         
@@ -848,28 +943,79 @@ def update_monthly_summaries_parallel(request):
         logger.error(f"Error in async monthly summary update: {str(e)}")
         return Response({"error": "Failed to start monthly summary update"}, status=500)
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def background_job_status(request, job_id):
+    """
+    Status, progress, attempts, result and errors of any background job of the
+    tenant (payroll calculations, monthly summary rebuilds)
+    """
+    try:
+        tenant = getattr(request, 'tenant', None)
+        if not tenant:
+            return Response({"error": "No tenant found"}, status=400)
+        
+        try:
+            job = BackgroundJob.objects.get(id=job_id, tenant=tenant)
+        except BackgroundJob.DoesNotExist:
+            return Response({"error": "Job not found"}, status=404)
+        
+        return Response(serialize_job(job))
+        
+    except Exception as e:
+        logger.error(f"Error in background_job_status: {str(e)}")
+        return Response({"error": f"Failed to get job status: {str(e)}"}, status=500)
+
+
+@api_view(['GET', 'POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def run_queued_jobs(request):
+    """
+    Run queued background jobs of every tenant for about DRAIN_SECONDS.
+    Deployments without a worker process call this from a scheduler (the
+    cron in vercel.json) with 'Authorization: Bearer <CRON_SECRET>'.
+    """
+    secret = settings.CRON_SECRET
+    if not secret or not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {secret}'):
+        return Response({"error": "Not allowed"}, status=403)
+    
+    try:
+        start_time = time.time()
+        jobs = drain_jobs()
+        return Response({
+            'jobs': [
+                {'id': job.id, 'job_type': job.job_type, 'tenant_id': job.tenant_id, 'status': job.status}
+                for job in jobs
+            ],
+            'duration': f"{time.time() - start_time:.3f}s",
+        })
+        
+    except Exception as e:
+        logger.error(f"Error in run_queued_jobs: {str(e)}")
+        return Response({"error": f"Failed to run queued jobs: {str(e)}"}, status=500)
+
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_eligible_employees_for_date(request):
     """
-    PROGRESSIVE LOADING API - Load first 50 employees immediately, then lazy load the rest
+    Employees eligible for attendance on a date, in employee_id order
     
-    Two modes:
-    1. initial=true: Returns first 50 employees instantly
-    2. remaining=true: Returns all remaining employees for lazy loading
+    Query params:
+        date: YYYY-MM-DD (required)
+        page_size: employees per page (default 500, max 2000)
+        cursor: next_cursor from the previous page
     
-    PERFORMANCE IMPROVEMENTS:
-    - Database-level slicing for instant first batch
-    - Bulk attendance lookup with single query
-    - Minimized Python loops and processing
-    - Optimized data serialization
+    Pages use keyset pagination (see eligible_employees_service), so a page
+    costs the same however many employees the tenant has. Keep requesting
+    with next_cursor until pagination.has_more is false.
     
-    EXPECTED: ~50ms for first 50, ~200ms for remaining
+    The older progressive loading calls still work: initial=true returns the
+    first page and remaining=true returns every employee after it.
     """
     try:
         from datetime import datetime
-        from django.db.models import Q
         from django.core.cache import cache
         
         # Performance timing
@@ -899,38 +1045,32 @@ def get_eligible_employees_for_date(request):
         if not date_str:
             return Response({"error": "Date parameter is required"}, status=400)
         
-        # PROGRESSIVE LOADING PARAMETERS
-        load_initial = request.query_params.get('initial', 'true').lower() == 'true'
-        load_remaining = request.query_params.get('remaining', 'false').lower() == 'true'
-        
-        # Determine batch size and offset based on loading mode
-        if load_initial and not load_remaining:
-            # Mode 1: Load first 500 employees immediately (increased from 50)
-            page_size = 500
-            offset = 0
-            cache_suffix = 'initial'
-            load_mode = 'initial'
-        elif load_remaining:
-            # Mode 2: Load remaining employees (skip first 500)
-            page_size = 2000  # Load all remaining at once
-            offset = 500
-            cache_suffix = 'remaining'
-            load_mode = 'remaining'
-        else:
-            # Fallback: load first 500 (backward compatibility)
-            page_size = 500
-            offset = 0
-            cache_suffix = 'initial'
-            load_mode = 'fallback'
-        
         try:
             target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
         except ValueError:
             return Response({"error": "Invalid date format. Use YYYY-MM-DD"}, status=400)
         
-        # Check cache first
-        cache_key = f"eligible_employees_progressive_{tenant.id}_{date_str}_{cache_suffix}"
-        use_cache = request.GET.get('no_cache', '').lower() != 'true'
+        page_size_param = request.query_params.get('page_size')
+        cursor = request.query_params.get('cursor') or None
+        try:
+            page_size = min(max(int(page_size_param or DEFAULT_ELIGIBLE_PAGE_SIZE), 1), MAX_ELIGIBLE_PAGE_SIZE)
+        except ValueError:
+            return Response({"error": "page_size must be a number"}, status=400)
+        
+        # Progressive loading: remaining=true (without a cursor) is everything after the first page
+        load_remaining = (
+            request.query_params.get('remaining', 'false').lower() == 'true'
+            and not cursor and not page_size_param
+        )
+        is_initial_load = not cursor and not load_remaining
+        
+        # Only the two progressive loading responses are cached; their keys are
+        # cleared whenever attendance for the date is saved
+        cache_key = None
+        if not cursor and not page_size_param:
+            cache_suffix = 'remaining' if load_remaining else 'initial'
+            cache_key = f"eligible_employees_progressive_{tenant.id}_{date_str}_{cache_suffix}"
+        use_cache = cache_key is not None and request.GET.get('no_cache', '').lower() != 'true'
         
         if use_cache:
             cached_data = cache.get(cache_key)
@@ -938,135 +1078,69 @@ def get_eligible_employees_for_date(request):
                 cached_data['performance'] = {
                     'query_time': f"{(time.time() - start_time):.3f}s",
                     'cached': True,
-                    'load_mode': 'initial' if load_initial and not load_remaining else 'remaining'
+                    'load_mode': cache_suffix
                 }
                 return Response(cached_data)
         
-        # Get day of week for off-day checks
-        day_of_week = target_date.weekday()
-        day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        day_name = day_names[day_of_week]
-        
-        # Build off-day filter efficiently
-        off_day_filters = {
-            0: Q(off_monday=True),    # Monday
-            1: Q(off_tuesday=True),   # Tuesday
-            2: Q(off_wednesday=True), # Wednesday
-            3: Q(off_thursday=True),  # Thursday
-            4: Q(off_friday=True),    # Friday
-            5: Q(off_saturday=True),  # Saturday
-            6: Q(off_sunday=True),    # Sunday
-        }
-        off_day_filter = off_day_filters.get(day_of_week, Q())
+        day_name = target_date.strftime('%A')
         
-        # PROGRESSIVE LOADING: Get total count once (cached for both requests)
-        total_count_cache_key = f"total_eligible_count_{tenant.id}_{date_str}"
-        total_count = cache.get(total_count_cache_key)
+        # Nobody is expected to work on a tenant holiday
+        holiday_name = tenant_holidays(tenant.id).get(target_date)
+        eligible = eligible_employees(tenant, target_date)
+        if holiday_name:
+            eligible = eligible.none()
         
+        # Total for the date (cached for every page of it)
+        total_count_cache_key = f"total_eligible_count_{tenant.id}_{date_str}"
+        total_count = 0 if holiday_name else cache.get(total_count_cache_key)
         if total_count is None:
-            total_count = EmployeeProfile.objects.filter(
-                tenant=tenant,
-                is_active=True
-            ).exclude(
-                off_day_filter
-            ).exclude(
-                date_of_joining__gt=target_date
-            ).count()
-            # Cache total count for 5 minutes
+            total_count = eligible.count()
             cache.set(total_count_cache_key, total_count, 300)
         
-        # OPTIMIZATION 1: Database-level slicing for progressive loading
-        eligible_employees_query = EmployeeProfile.objects.filter(
-            tenant=tenant,
-            is_active=True
-        ).exclude(
-            off_day_filter
-        ).exclude(
-            date_of_joining__gt=target_date
-        ).only(
-            # OPTIMIZATION 2: Only fetch required fields
-            'employee_id', 'first_name', 'last_name', 'department',
-            'shift_start_time', 'shift_end_time', 'is_active', 'date_of_joining'
-        ).order_by('employee_id')[offset:offset + page_size]  # Progressive loading slice
-        
-        # OPTIMIZATION 4: Single bulk query for all attendance records  
-        employee_ids = [emp.employee_id for emp in eligible_employees_query]
-        
-        # Bulk fetch attendance records in one query
-        attendance_records = DailyAttendance.objects.filter(
-            tenant=tenant,
-            date=target_date,
-            employee_id__in=employee_ids
-        ).only(
-            'employee_id', 'attendance_status', 'ot_hours', 'late_minutes', 'check_in', 'check_out'
-        )
-        
-        # OPTIMIZATION 5: Build attendance lookup dictionary efficiently
-        attendance_lookup = {
-            record.employee_id: {
-                'status': record.attendance_status,
-                'ot_hours': float(record.ot_hours),
-                'late_minutes': record.late_minutes,
-                'check_in': record.check_in.strftime('%H:%M') if record.check_in else None,
-                'check_out': record.check_out.strftime('%H:%M') if record.check_out else None,
-            }
-            for record in attendance_records
-        }
-        
-        # OPTIMIZATION 4: Efficient data serialization with minimal processing
-        eligible_employees = []
-        for employee in eligible_employees_query:
-            current_attendance = attendance_lookup.get(employee.employee_id, {})
-            
-            # Quick status determination
-            if current_attendance:
-                default_status = 'present' if current_attendance['status'] in ['PRESENT', 'PAID_LEAVE'] else 'absent'
-            else:
-                default_status = 'absent'
-            
-            # Minimal data processing
-            eligible_employees.append({
-                'employee_id': employee.employee_id,
-                'name': f"{employee.first_name} {employee.last_name}",
-                'first_name': employee.first_name,
-                'last_name': employee.last_name,
-                'department': employee.department or 'General',
-                'shift_start_time': employee.shift_start_time.strftime('%H:%M') if employee.shift_start_time else '09:00',
-                'shift_end_time': employee.shift_end_time.strftime('%H:%M') if employee.shift_end_time else '18:00',
-                'default_status': default_status,
-                'current_attendance': current_attendance,
-                'ot_hours': current_attendance.get('ot_hours', 0),
-                'late_minutes': current_attendance.get('late_minutes', 0)
-            })
+        if load_remaining:
+            employees = eligible_employees_after_first_page(tenant, target_date, page_size, eligible)
+            next_cursor = None
+        else:
+            try:
+                employees, next_cursor = eligible_employees_page(tenant, target_date, cursor, page_size, eligible)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=400)
         
-        # PROGRESSIVE LOADING METADATA
-        is_initial_load = load_initial and not load_remaining
-        is_remaining_load = load_remaining
-        remaining_count = max(0, total_count - 50) if is_initial_load else 0
+        has_more = next_cursor is not None
+        remaining_count = max(0, total_count - len(employees)) if is_initial_load else 0
         
         response_data = {
             'date': date_str,
             'day_name': day_name,
-            'eligible_employees': eligible_employees,
+            'is_holiday': bool(holiday_name),
+            'holiday_name': holiday_name,
+            'eligible_employees': employees,
+            'pagination': {
+                'page_size': page_size,
+                'next_cursor': next_cursor,
+                'has_more': has_more,
+            },
             'progressive_loading': {
                 'is_initial_load': is_initial_load,
-                'is_remaining_load': is_remaining_load,
-                'employees_in_batch': len(eligible_employees),
+                'is_remaining_load': load_remaining,
+                'employees_in_batch': len(employees),
                 'total_employees': total_count,
                 'remaining_employees': remaining_count,
-                'has_more': remaining_count > 0 if is_initial_load else False,
-                'next_batch_url': f"/api/eligible-employees/?date={date_str}&remaining=true" if remaining_count > 0 and is_initial_load else None,
+                'has_more': has_more,
+                'next_batch_url': (
+                    f"/api/eligible-employees/?date={date_str}&page_size={page_size}&cursor={next_cursor}"
+                    if has_more else None
+                ),
                 'preserve_user_changes': True,  # Frontend should preserve user modifications
-                'auto_trigger_remaining': is_initial_load and remaining_count > 0,  # Should auto-trigger background load
-                'batch_offset': offset,
+                'auto_trigger_remaining': is_initial_load and has_more,  # Should auto-trigger background load
                 'recommended_delay_ms': 100  # Suggested delay before background load
             },
-            'total_count': len(eligible_employees),
+            'total_count': len(employees),
             'performance': {
                 'query_time': f"{(time.time() - start_time):.3f}s",
                 'cached': False,
-                'load_mode': 'initial' if is_initial_load else 'remaining',
-                'batch_size': len(eligible_employees),
+                'load_mode': 'remaining' if load_remaining else ('initial' if is_initial_load else 'cursor'),
+                'batch_size': len(employees),
                 'total_employees': total_count
             }
         }
@@ -1082,34 +1156,60 @@ def get_eligible_employees_for_date(request):
         return Response({"error": "Failed to get eligible employees"}, status=500)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def employee_attendance_calendar(request, employee_id):
+    """
+    One employee's attendance history, compactly encoded (see
+    attendance_calendar_service): a run-length encoded status string plus
+    sparse OT/late values and the tenant's holidays.
+    
+    Query params (optional):
+        from: YYYY-MM-DD, default the first day of the month 11 months ago
+        to: YYYY-MM-DD, default today
+    
+    At most MAX_CALENDAR_MONTHS months per request. Months are cached per
+    employee and dropped whenever that employee-month's attendance changes.
+    """
+    from datetime import datetime
+    
+    tenant = getattr(request, 'tenant', None)
+    if not tenant:
+        return Response({"error": "No tenant found"}, status=400)
+    
+    start_date, end_date = default_calendar_range(timezone.localdate())
+    try:
+        if request.query_params.get('from'):
+            start_date = datetime.strptime(request.query_params['from'], '%Y-%m-%d').date()
+        if request.query_params.get('to'):
+            end_date = datetime.strptime(request.query_params['to'], '%Y-%m-%d').date()
+    except ValueError:
+        return Response({"error": "Invalid date format. Use YYYY-MM-DD"}, status=400)
+    if start_date > end_date:
+        return Response({"error": "from must not be after to"}, status=400)
+    if calendar_span_months(start_date, end_date) > MAX_CALENDAR_MONTHS:
+        return Response({"error": f"The range can cover at most {MAX_CALENDAR_MONTHS} months"}, status=400)
+    
+    if not EmployeeProfile.objects.filter(tenant=tenant, employee_id=employee_id).exists():
+        return Response({"error": "Employee not found"}, status=404)
+    
+    try:
+        return Response(build_attendance_calendar(tenant.id, employee_id, start_date, end_date))
+    except Exception as e:
+        logger.error(f"Error building attendance calendar for {employee_id}: {str(e)}")
+        return Response({"error": "Failed to get attendance calendar"}, status=500)
+
+
 class UploadAttendanceDataAPIView(APIView):
     """
-    API endpoint for uploading attendance data from Excel files
+    API endpoint for uploading attendance data from Excel files.
+    The workbook is streamed and written in chunks (see attendance_import_service).
     """
     parser_classes = [MultiPartParser, FormParser]
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
         try:
-            from datetime import datetime, date
-            from django.db import transaction
-            import os
-            
-            # Check if pandas is available
-            USE_PANDAS = os.environ.get('DJANGO_USE_LIGHTWEIGHT', 'false').lower() != 'true'
-            if USE_PANDAS:
-                try:
-                    from ..utils.utils import (
-                        excel_to_dict_list,
-                        lightweight_notna,
-                        lightweight_to_datetime,
-                        safe_float_conversion,
-                        safe_int_conversion
-                    )
-                except ImportError:
-                    USE_PANDAS = False
-            from ..models import DailyAttendance
-            
             # Get tenant
             tenant = getattr(request, 'tenant', None)
             if not tenant:
@@ -1132,6 +1232,15 @@ class UploadAttendanceDataAPIView(APIView):
                     'error': 'Month and year are required'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
+            try:
+                month, year = int(month), int(year)
+                if not 1 <= month <= 12:
+                    raise ValueError
+            except (TypeError, ValueError):
+                return Response({
+                    'error': 'Month must be a number between 1 and 12 and year a number'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
             # Validate file type
             if not (file_obj.name.endswith('.xlsx') or file_obj.name.endswith('.xls')):
                 return Response({
@@ -1139,240 +1248,30 @@ class UploadAttendanceDataAPIView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
             
             try:
-                # Read Excel file
-                data, headers = excel_to_dict_list(file_obj, 'xlsx')
-                
-                # Check if this is daily attendance format or monthly summary format
-                daily_columns = ['Employee ID', 'Employee Name', 'Date', 'Status']
-                monthly_columns = ['Employee ID', 'Name', 'Department', 'Present Days', 'Absent Days', 'OT Hours', 'Late Minutes']
-                
-                is_daily_format = all(col in headers for col in daily_columns)
-                is_monthly_format = all(col in headers for col in monthly_columns)
-                
-                if not is_daily_format and not is_monthly_format:
-                    return Response({
-                        'error': f'Invalid file format. Expected either daily attendance columns: {", ".join(daily_columns)} or monthly summary columns: {", ".join(monthly_columns)}',
-                        'available_columns': headers
-                    }, status=status.HTTP_400_BAD_REQUEST)
-                
-                # Process data
-                records_created = 0
-                records_updated = 0
-                errors = []
-                warnings = []
-                
-                if is_monthly_format:
-                    # Process monthly summary format
-                    # Get all employee IDs from the file for validation
-                    employee_ids = df['Employee ID'].dropna().unique()
-                    
-                    # Validate employees exist
-                    existing_employees = EmployeeProfile.objects.filter(
-                        tenant=tenant,
-                        employee_id__in=employee_ids,
-                        is_active=True
-                    ).values_list('employee_id', flat=True)
-                    
-                    existing_employee_set = set(existing_employees)
-                    invalid_employees = set(employee_ids) - existing_employee_set
-                    
-                    if invalid_employees:
-                        errors.append(f'Invalid employee IDs found: {", ".join(list(invalid_employees)[:5])}{"..." if len(invalid_employees) > 5 else ""}')
-                    
-                    # Process each row for monthly format
-                    attendance_records = []
-                else:
-                    # Process daily attendance format (original logic)
-                    # Get all employee IDs from the file for validation
-                    employee_ids = df['Employee ID'].dropna().unique()
-                    
-                    # Validate employees exist
-                    existing_employees = EmployeeProfile.objects.filter(
-                        tenant=tenant,
-                        employee_id__in=employee_ids,
-                        is_active=True
-                    ).values_list('employee_id', flat=True)
-                    
-                    existing_employee_set = set(existing_employees)
-                    invalid_employees = set(employee_ids) - existing_employee_set
-                    
-                    if invalid_employees:
-                        errors.append(f'Invalid employee IDs found: {", ".join(list(invalid_employees)[:5])}{"..." if len(invalid_employees) > 5 else ""}')
-                    
-                    # Process each row for daily format
-                    attendance_records = []
-                
-                for index, row in enumerate(data):
-                    try:
-                        employee_id = str(row['Employee ID']).strip()
-                        
-                        if is_monthly_format:
-                            # Process monthly summary format
-                            name = str(row['Name']).strip()
-                            department = str(row.get('Department', '')).strip()
-                            
-                            # Validate employee exists
-                            if employee_id not in existing_employee_set:
-                                errors.append(f'Row {index + 2}: Employee {employee_id} not found or inactive')
-                                continue
-                            
-                            # Get numeric values
-                            present_days = safe_float_conversion(row.get('Present Days', 0))
-                            absent_days = safe_float_conversion(row.get('Absent Days', 0))
-                            ot_hours = safe_float_conversion(row.get('OT Hours', 0))
-                            late_minutes = safe_int_conversion(row.get('Late Minutes', 0))
-                            
-                            # Calculate total working days
-                            total_working_days = present_days + absent_days
-                            
-                            # Create attendance date (first day of the month)
-                            from datetime import date
-                            attendance_date = date(int(year), int(month), 1)
-                            
-                            # Check if record already exists
-                            existing_record = Attendance.objects.filter(
-                                tenant=tenant,
-                                employee_id=employee_id,
-                                date=attendance_date
-                            ).first()
-                            
-                            if existing_record:
-                                # Update existing record
-                                existing_record.name = name
-                                existing_record.department = department
-                                existing_record.total_working_days = total_working_days
-                                existing_record.present_days = present_days
-                                existing_record.absent_days = absent_days
-                                existing_record.ot_hours = ot_hours
-                                existing_record.late_minutes = late_minutes
-                                existing_record.save()
-                                records_updated += 1
-                            else:
-                                # Create new record
-                                Attendance.objects.create(
-                                    tenant=tenant,
-                                    employee_id=employee_id,
-                                    name=name,
-                                    department=department,
-                                    date=attendance_date,
-                                    calendar_days=30,  # Default for month
-                                    total_working_days=total_working_days,
-                                    present_days=present_days,
-                                    absent_days=absent_days,
-                                    ot_hours=ot_hours,
-                                    late_minutes=late_minutes
-                                )
-                                records_created += 1
-                        else:
-                            # Process daily attendance format
-                            employee_name = str(row['Employee Name']).strip()
-                            date_str = str(row['Date']).strip()
-                            attendance_status = str(row['Status']).strip().upper()
-                            
-                            # Validate employee exists
-                            if employee_id not in existing_employee_set:
-                                errors.append(f'Row {index + 2}: Employee {employee_id} not found or inactive')
-                                continue
-                            
-                            # Parse date
-                            try:
-                                if '/' in date_str:
-                                    attendance_date = datetime.strptime(date_str, '%m/%d/%Y').date()
-                                elif '-' in date_str:
-                                    attendance_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-                                else:
-                                    attendance_date = lightweight_to_datetime(date_str)
-                            except:
-                                errors.append(f'Row {index + 2}: Invalid date format for {date_str}')
-                                continue
-                            
-                            # Validate status
-                            valid_statuses = ['PRESENT', 'ABSENT', 'HALF_DAY', 'PAID_LEAVE', 'OFF']
-                            if attendance_status not in valid_statuses:
-                                warnings.append(f'Row {index + 2}: Invalid status "{attendance_status}". Using ABSENT.')
-                                attendance_status = 'ABSENT'
-                            
-                            # Get optional fields
-                            ot_hours = safe_float_conversion(row.get('OT Hours', 0))
-                            late_minutes = safe_int_conversion(row.get('Late Minutes', 0))
-                            department = str(row.get('Department', '')).strip()
-                            designation = str(row.get('Designation', '')).strip()
-                            
-                            # Get employee info if department/designation not provided
-                            if not department or not designation:
-                                employee = EmployeeProfile.objects.get(tenant=tenant, employee_id=employee_id)
-                                department = department or employee.department or 'General'
-                                designation = designation or employee.designation or 'Employee'
-                            
-                            # Check if record already exists
-                            existing_record = DailyAttendance.objects.filter(
-                                tenant=tenant,
-                                employee_id=employee_id,
-                                date=attendance_date
-                            ).first()
-                            
-                            if existing_record:
-                                # Update existing record
-                                existing_record.employee_name = employee_name
-                                existing_record.department = department
-                                existing_record.designation = designation
-                                existing_record.attendance_status = attendance_status
-                                existing_record.ot_hours = ot_hours
-                                existing_record.late_minutes = late_minutes
-                                existing_record.save()
-                                records_updated += 1
-                            else:
-                                # Create new record
-                                attendance_records.append(DailyAttendance(
-                                    tenant=tenant,
-                                    employee_id=employee_id,
-                                    employee_name=employee_name,
-                                    department=department,
-                                    designation=designation,
-                                    employment_type='FULL_TIME',
-                                    attendance_status=attendance_status,
-                                    date=attendance_date,
-                                    ot_hours=ot_hours,
-                                    late_minutes=late_minutes
-                                ))
-                                records_created += 1
-                            
-                    except Exception as e:
-                        errors.append(f'Row {index + 2}: {str(e)}')
-                
-                # Bulk create new records (only for daily format)
-                if attendance_records and not is_monthly_format:
-                    with transaction.atomic():
-                        DailyAttendance.objects.bulk_create(attendance_records, batch_size=1000)
-                
-                # Clear relevant caches
-                from django.core.cache import cache
-                cache_keys = [
-                    f"payroll_overview_{tenant.id}",
-                    f"attendance_all_records_{tenant.id}",
-                    f"directory_data_{tenant.id}",
-                    f"months_with_attendance_{tenant.id}"
-                ]
-                for key in cache_keys:
-                    cache.delete(key)
-                
+                result = import_attendance_workbook(tenant, file_obj, year, month)
+            except ValueError as e:
                 return Response({
-                    'message': 'Attendance data uploaded successfully!',
-                    'records_created': records_created,
-                    'records_updated': records_updated,
-                    'total_errors': len(errors),
-                    'total_warnings': len(warnings),
-                    'errors': errors[:10],  # Show first 10 errors
-                    'warnings': warnings[:10],  # Show first 10 warnings
-                    'month': month,
-                    'year': year,
-                    'file_name': file_obj.name
-                }, status=status.HTTP_201_CREATED)
-                
-            except Exception as e:
-                return Response({
-                    'error': f'Failed to process file: {str(e)}'
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+                    'error': str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            # Clear relevant caches
+            from django.core.cache import cache
+            cache_keys = [
+                f"payroll_overview_{tenant.id}",
+                f"attendance_all_records_{tenant.id}",
+                f"directory_data_{tenant.id}",
+                f"months_with_attendance_{tenant.id}"
+            ]
+            for key in cache_keys:
+                cache.delete(key)
+            
+            return Response({
+                'message': 'Attendance data uploaded successfully!',
+                **result,
+                'month': month,
+                'year': year,
+                'file_name': file_obj.name
+            }, status=status.HTTP_201_CREATED)
                 
         except Exception as e:
             logger.error(f"Error in attendance upload: {str(e)}")
@@ -1460,6 +1359,12 @@ class UploadMonthlyAttendanceAPIView(APIView):
             if attendance_records:
                 with transaction.atomic():
                     Attendance.objects.bulk_create(attendance_records, ignore_conflicts=True)
+                    # bulk_create() skips the signal that marks payroll for recalculation
+                    mark_employees_dirty(
+                        tenant.id,
+                        [(record.employee_id, attendance_date.year, attendance_date.month) for record in attendance_records],
+                        reason='attendance',
+                    )
             
             return Response({
                 'message': 'Monthly attendance data uploaded successfully',
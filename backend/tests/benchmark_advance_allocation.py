@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Benchmark FIFO advance repayment: Python loop vs set-based SQL allocation
+
+Replays the per-advance loop that mark_salary_paid / bulk_update_payroll_period
+used (load every open advance, walk them in date order, bulk_update) against
+advance_repayment_service.apply_advance_repayments on the same generated
+ledger, checks that both leave identical balances and prints timings.
+
+Everything runs for a throw-away tenant inside a transaction that is rolled
+back at the end, so nothing is left in the database.
+
+Usage:
+    python tests/benchmark_advance_allocation.py [--employees 2000] [--advances 6] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dashboard.settings')
+django.setup()
+
+from django.db import transaction
+from excel_data.models import AdvanceLedger, Tenant
+from excel_data.services.advance_balance_service import refresh_advance_balances
+from excel_data.services.advance_repayment_service import apply_advance_repayments
+
+
+class Rollback(Exception):
+    pass
+
+
+def seed(tenant, employees, advances):
+    """``advances`` open advances per employee plus a deduction per employee"""
+    print(f"📥 Seeding {employees * advances:,} advances ({employees} employees x {advances})...")
+    rng = random.Random(42)
+    rows = []
+    deductions = {}
+    for e in range(employees):
+        employee_id = f'BENCH-{e:05d}'
+        total = Decimal('0')
+        for a in range(advances):
+            amount = Decimal(rng.randrange(500, 5000))
+            rows.append(AdvanceLedger(
+                tenant=tenant,
+                employee_id=employee_id,
+                employee_name=f'Bench {e}',
+                advance_date=date(2024, 1, 1) + timedelta(days=30 * a + rng.randrange(0, 20)),
+                amount=amount,
+                remaining_balance=amount,
+                for_month='Jan 2024',
+                for_period=date(2024, 1, 1),
+                payment_method='CASH',
+                status='PENDING' if rng.random() < 0.7 else 'PARTIALLY_PAID',
+            ))
+            total += amount
+        # From nothing up to more than everything owed
+        deductions[employee_id] = (total * Decimal(rng.randrange(0, 120)) / 100).quantize(Decimal('0.01'))
+    AdvanceLedger.all_objects.bulk_create(rows, batch_size=1000)
+    return deductions
+
+
+def legacy_allocation(tenant, deductions):
+    """The per-advance Python loop the payment endpoints used before"""
+    all_employee_ids = list(deductions.keys())
+    all_advances = AdvanceLedger.all_objects.filter(
+        tenant=tenant,
+        employee_id__in=all_employee_ids,
+        status__in=['PENDING', 'PARTIALLY_PAID']
+    ).order_by('employee_id', 'advance_date', 'id')
+
+    advances_by_employee = {}
+    for advance in all_advances:
+        advances_by_employee.setdefault(advance.employee_id, []).append(advance)
+
+    advances_to_update = []
+    advances_to_mark_repaid = []
+    for employee_id, total_deduction in deductions.items():
+        remaining_deduction = Decimal(str(total_deduction))
+        for advance in advances_by_employee.get(employee_id, []):
+            if remaining_deduction <= 0:
+                break
+            current_balance = advance.remaining_balance
+            if current_balance <= remaining_deduction:
+                advance.status = 'REPAID'
+                advance.remaining_balance = Decimal('0')
+                advances_to_mark_repaid.append(advance)
+                remaining_deduction -= current_balance
+            else:
+                advance.remaining_balance -= remaining_deduction
+                advance.status = 'PARTIALLY_PAID'
+                advances_to_update.append(advance)
+                remaining_deduction = Decimal('0')
+
+    AdvanceLedger.all_objects.bulk_update(advances_to_update, ['remaining_balance', 'status'], batch_size=100)
+    AdvanceLedger.all_objects.bulk_update(advances_to_mark_repaid, ['status', 'remaining_balance'], batch_size=100)
+    refresh_advance_balances(tenant.id, all_employee_ids)
+
+
+def ledger_state(tenant):
+    return list(
+        AdvanceLedger.all_objects.filter(tenant=tenant).order_by('id').values_list('id', 'remaining_balance', 'status')
+    )
+
+
+def timed(label, func, tenant, deductions, repeat):
+    """Run ``func`` ``repeat`` times, each inside a rolled-back savepoint; return (median, final state)"""
+    timings = []
+    state = None
+    for _ in range(repeat):
+        savepoint = transaction.savepoint()
+        start = time.perf_counter()
+        func(tenant, deductions)
+        timings.append(time.perf_counter() - start)
+        state = ledger_state(tenant)
+        transaction.savepoint_rollback(savepoint)
+    timings.sort()
+    median = timings[len(timings) // 2]
+    print(f"\n📊 {label}: median {median * 1000:.1f} ms over {repeat} runs")
+    return median, state
+
+
+def run(employees, advances, repeat):
+    tenant = Tenant.objects.create(name='Advance allocation benchmark', subdomain=f'bench-{int(time.time())}')
+    deductions = seed(tenant, employees, advances)
+    refresh_advance_balances(tenant.id, deductions.keys())
+
+    old, old_state = timed('Python FIFO loop', legacy_allocation, tenant, deductions, repeat)
+    new, new_state = timed('Set-based SQL allocation', lambda t, d: apply_advance_repayments(t.id, d),
+                           tenant, deductions, repeat)
+
+    print("\n" + "=" * 60)
+    print(f"{'Employees':<12}{'Loop':>12}{'SQL':>12}{'Speedup':>10}")
+    print(f"{employees:<12}{old * 1000:>10.1f}ms{new * 1000:>10.1f}ms{old / new:>9.1f}x")
+    if old_state == new_state:
+        print("✅ Both allocations produced identical ledgers")
+    else:
+        mismatches = sum(1 for a, b in zip(old_state, new_state) if a != b)
+        print(f"❌ Ledgers differ in {mismatches} rows")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--employees', type=int, default=2000)
+    parser.add_argument('--advances', type=int, default=6)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print("🧪 ADVANCE ALLOCATION BENCHMARK")
+    print("=" * 60)
+    try:
+        with transaction.atomic():
+            run(args.employees, args.advances, args.repeat)
+            raise Rollback()
+    except Rollback:
+        print("\n🧹 Benchmark data rolled back")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Benchmark bulk attendance writes: hand-built SQL vs parameterised chunked upsert
+
+Replays the statements bulk_update_attendance used to build (one multi-row
+INSERT for new rows with every value spliced into the SQL, one UPDATE with a
+CASE ladder per column for existing rows) against
+attendance_upsert_service.upsert_daily_attendance on the same batch, checks
+that both leave identical rows and prints timings for each batch size. Half
+of every batch already has a row for the date, so both paths insert and update.
+The upsert's time includes its in-transaction monthly summary update (the
+hand-built SQL left summaries stale).
+
+Everything runs for a throw-away tenant inside a transaction that is rolled
+back at the end, so nothing is left in the database.
+
+Usage:
+    python tests/benchmark_attendance_upsert.py [--sizes 100 1000 10000] [--chunk-size 1000] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dashboard.settings')
+django.setup()
+
+from django.db import connection, transaction
+from excel_data.models import DailyAttendance, Tenant
+from excel_data.services.attendance_upsert_service import upsert_daily_attendance
+
+ATTENDANCE_DATE = date(2024, 3, 12)
+
+
+class Rollback(Exception):
+    pass
+
+
+def make_batch(size):
+    """Attendance rows for ``size`` employees; names include quotes like real ones do"""
+    rng = random.Random(size)
+    return [
+        {
+            'employee_id': f'BENCH-{e:05d}',
+            'date': ATTENDANCE_DATE,
+            'employee_name': f"Bench O'Employee {e}",
+            'department': rng.choice(['Production', 'Sales', "Workers' Canteen"]),
+            'designation': 'Operator',
+            'employment_type': 'FULL_TIME',
+            'attendance_status': 'PRESENT' if rng.random() < 0.85 else 'ABSENT',
+            'ot_hours': rng.choice([0, 0, 0.5, 1.5, 2]),
+            'late_minutes': rng.choice([0, 0, 0, 5, 20]),
+        }
+        for e in range(size)
+    ]
+
+
+def seed(tenant, batch):
+    """Existing rows for every other employee, with values the batch will overwrite"""
+    DailyAttendance.all_objects.bulk_create([
+        DailyAttendance(
+            tenant=tenant,
+            employee_id=row['employee_id'],
+            date=row['date'],
+            employee_name='Old name',
+            department='Old department',
+            designation=row['designation'],
+            employment_type=row['employment_type'],
+            attendance_status='ABSENT',
+            ot_hours=0,
+            late_minutes=0,
+        )
+        for row in batch[::2]
+    ], batch_size=1000)
+
+
+def legacy_write(tenant, batch):
+    """The SQL bulk_update_attendance built by hand before"""
+    now = 'NOW()' if connection.vendor == 'postgresql' else 'CURRENT_TIMESTAMP'
+    existing = set(
+        DailyAttendance.all_objects.filter(
+            tenant=tenant, employee_id__in=[row['employee_id'] for row in batch], date=ATTENDANCE_DATE
+        ).values_list('employee_id', flat=True)
+    )
+    records_to_create = [row for row in batch if row['employee_id'] not in existing]
+    records_to_update = [row for row in batch if row['employee_id'] in existing]
+
+    cursor = connection.cursor()
+    if records_to_create:
+        insert_values = []
+        for record in records_to_create:
+            safe_name = record['employee_name'].replace("'", "''")
+            safe_dept = record['department'].replace("'", "''")
+            safe_designation = record['designation'].replace("'", "''")
+            insert_values.append(
+                f"('{tenant.id}', '{record['employee_id']}', '{record['date']}', "
+                f"'{safe_name}', '{safe_dept}', "
+                f"'{safe_designation}', '{record['employment_type']}', '{record['attendance_status']}', "
+                f"{record['ot_hours']}, {record['late_minutes']}, {now}, {now})"
+            )
+        cursor.execute(f"""
+            INSERT INTO excel_data_dailyattendance
+            (tenant_id, employee_id, date, employee_name, department, designation,
+             employment_type, attendance_status, ot_hours, late_minutes, created_at, updated_at)
+            VALUES {', '.join(insert_values)}
+        """)
+
+    if records_to_update:
+        employee_ids = [f"'{record['employee_id']}'" for record in records_to_update]
+        name_cases, dept_cases, status_cases, ot_cases, late_cases = [], [], [], [], []
+        for record in records_to_update:
+            eid = record['employee_id']
+            safe_name = record['employee_name'].replace("'", "''")
+            safe_dept = record['department'].replace("'", "''")
+            name_cases.append(f"WHEN employee_id = '{eid}' THEN '{safe_name}'")
+            dept_cases.append(f"WHEN employee_id = '{eid}' THEN '{safe_dept}'")
+            status_cases.append(f"WHEN employee_id = '{eid}' THEN '{record['attendance_status']}'")
+            ot_cases.append(f"WHEN employee_id = '{eid}' THEN {record['ot_hours']}")
+            late_cases.append(f"WHEN employee_id = '{eid}' THEN {record['late_minutes']}")
+        cursor.execute(f"""
+            UPDATE excel_data_dailyattendance SET
+                employee_name = CASE {' '.join(name_cases)} END,
+                department = CASE {' '.join(dept_cases)} END,
+                attendance_status = CASE {' '.join(status_cases)} END,
+                ot_hours = CASE {' '.join(ot_cases)} END,
+                late_minutes = CASE {' '.join(late_cases)} END,
+                updated_at = {now}
+            WHERE tenant_id = '{tenant.id}'
+            AND date = '{ATTENDANCE_DATE}'
+            AND employee_id IN ({', '.join(employee_ids)})
+        """)
+
+
+def attendance_state(tenant):
+    return list(
+        DailyAttendance.all_objects.filter(tenant=tenant).order_by('employee_id').values_list(
+            'employee_id', 'employee_name', 'department', 'designation', 'employment_type',
+            'attendance_status', 'ot_hours', 'late_minutes'
+        )
+    )
+
+
+def timed(func, tenant, batch, repeat):
+    """Run ``func`` ``repeat`` times, each inside a rolled-back savepoint; return (median, final state)"""
+    timings = []
+    state = None
+    for _ in range(repeat):
+        savepoint = transaction.savepoint()
+        start = time.perf_counter()
+        func(tenant, batch)
+        timings.append(time.perf_counter() - start)
+        state = attendance_state(tenant)
+        transaction.savepoint_rollback(savepoint)
+    timings.sort()
+    return timings[len(timings) // 2], state
+
+
+def run(sizes, chunk_size, repeat):
+    tenant = Tenant.objects.create(name='Attendance upsert benchmark', subdomain=f'bench-{int(time.time())}')
+    results = []
+    for size in sizes:
+        batch = make_batch(size)
+        savepoint = transaction.savepoint()
+        seed(tenant, batch)
+        print(f"📥 {size:,} records ({len(batch[::2]):,} already stored)")
+
+        old, old_state = timed(legacy_write, tenant, batch, repeat)
+        new, new_state = timed(
+            lambda t, b: upsert_daily_attendance(t.id, b, chunk_size=chunk_size),
+            tenant, batch, repeat,
+        )
+        results.append((size, old, new, old_state == new_state))
+        transaction.savepoint_rollback(savepoint)
+
+    print("\n" + "=" * 72)
+    print(f"{'Records':<10}{'Hand-built':>14}{'Upsert':>12}{'Speedup':>10}  Same rows")
+    for size, old, new, same in results:
+        print(
+            f"{size:<10}{old * 1000:>12.1f}ms{new * 1000:>10.1f}ms{old / new:>9.1f}x"
+            f"  {'✅' if same else '❌'}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--chunk-size', type=int, default=None)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"🧪 ATTENDANCE UPSERT BENCHMARK ({connection.vendor})")
+    print("=" * 72)
+    try:
+        with transaction.atomic():
+            run(args.sizes, args.chunk_size, args.repeat)
+            raise Rollback()
+    except Rollback:
+        print("\n🧹 Benchmark data rolled back")
+
+
+if __name__ == '__main__':
+    main()
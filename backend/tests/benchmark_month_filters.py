@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark month filters on a large DailyAttendance table (PostgreSQL)
+
+Compares the old EXTRACT-based month predicates (date__year/date__month and
+raw EXTRACT(YEAR/MONTH FROM date)) with the half-open range used now
+(calendar_service.month_range_filter), printing EXPLAIN ANALYZE plans and
+timings for each.
+
+The rows are generated for a throw-away tenant inside a transaction that is
+rolled back at the end, so nothing is left in the database.
+
+Usage:
+    python tests/benchmark_month_filters.py [--rows 5000000] [--employees 2000] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dashboard.settings')
+django.setup()
+
+from django.db import connection, transaction
+from excel_data.models import DailyAttendance, Tenant
+from excel_data.services.calendar_service import month_bounds, month_range_filter
+
+
+class Rollback(Exception):
+    pass
+
+
+def seed(tenant, rows, employees):
+    """Insert ``rows`` attendance rows: ``employees`` employees x consecutive days"""
+    days = max(1, rows // employees)
+    print(f"📥 Seeding {employees * days:,} rows ({employees} employees x {days} days)...")
+    start = time.time()
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO excel_data_dailyattendance (
+                tenant_id, employee_id, employee_name, department, designation, employment_type,
+                attendance_status, date, ot_hours, late_minutes, created_at, updated_at
+            )
+            SELECT %s, 'BENCH-' || e, 'Bench ' || e, 'Bench', 'Bench', 'FULL_TIME',
+                   CASE WHEN (e + d) %% 7 = 0 THEN 'ABSENT' ELSE 'PRESENT' END,
+                   DATE '2019-01-01' + d, 0, 0, now(), now()
+            FROM generate_series(1, %s) AS e, generate_series(0, %s) AS d
+        """, [tenant.id, employees, days - 1])
+        cursor.execute('ANALYZE excel_data_dailyattendance')
+    print(f"   done in {time.time() - start:.1f}s")
+    return days
+
+
+def explain(label, sql, params, repeat):
+    """Print the plan of one run and the median wall time over ``repeat`` runs"""
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (ANALYZE, BUFFERS) ' + sql, params)
+        plan = '\n'.join(row[0] for row in cursor.fetchall())
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            cursor.execute(sql, params)
+            cursor.fetchall()
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    median = timings[len(timings) // 2]
+    print(f"\n📊 {label}: median {median * 1000:.1f} ms over {repeat} runs")
+    print('   ' + plan.replace('\n', '\n   '))
+    return median
+
+
+def queryset_sql(queryset):
+    sql, params = queryset.query.sql_with_params()
+    return sql, list(params)
+
+
+def run(rows, employees, repeat):
+    if connection.vendor != 'postgresql':
+        print("❌ This benchmark needs PostgreSQL")
+        return
+
+    tenant = Tenant.objects.create(name='Month filter benchmark', subdomain=f'bench-{int(time.time())}')
+    days = seed(tenant, rows, employees)
+
+    # A month in the middle of the generated range
+    middle = DailyAttendance.all_objects.filter(tenant=tenant).order_by('date').values_list(
+        'date', flat=True
+    )[days // 2]
+    year, month = middle.year, middle.month
+    month_start, next_month_start = month_bounds(year, month)
+    print(f"\n🗓️  Benchmark month: {year}-{month:02d}")
+
+    results = []
+
+    # 1. ORM month count (signals, salary_service, summaries)
+    old_qs = DailyAttendance.all_objects.filter(tenant=tenant, date__year=year, date__month=month)
+    new_qs = DailyAttendance.all_objects.filter(tenant=tenant, **month_range_filter(year, month))
+    old = explain('ORM date__year/date__month count', *queryset_sql(old_qs.values('id')), repeat)
+    new = explain('ORM month_range_filter count', *queryset_sql(new_qs.values('id')), repeat)
+    results.append(('Month rows (ORM)', old, new))
+
+    # 2. Ultra-fast payroll attendance subquery
+    aggregate_sql = """
+        SELECT employee_id,
+               SUM(CASE WHEN attendance_status = 'PRESENT' THEN 1 ELSE 0 END) AS present_days,
+               SUM(COALESCE(ot_hours, 0)) AS ot_hours
+        FROM excel_data_dailyattendance
+        WHERE tenant_id = %s AND {predicate}
+        GROUP BY employee_id
+    """
+    old = explain(
+        'Raw EXTRACT(YEAR/MONTH) aggregate',
+        aggregate_sql.format(predicate='EXTRACT(YEAR FROM date) = %s AND EXTRACT(MONTH FROM date) = %s'),
+        [tenant.id, year, month],
+        repeat,
+    )
+    new = explain(
+        'Raw half-open range aggregate',
+        aggregate_sql.format(predicate='date >= %s AND date < %s'),
+        [tenant.id, month_start, next_month_start],
+        repeat,
+    )
+    results.append(('Ultra-fast aggregate', old, new))
+
+    print("\n" + "=" * 60)
+    print(f"{'Query':<25}{'EXTRACT':>12}{'Range':>12}{'Speedup':>10}")
+    for label, old, new in results:
+        print(f"{label:<25}{old * 1000:>10.1f}ms{new * 1000:>10.1f}ms{old / new:>9.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, default=5_000_000)
+    parser.add_argument('--employees', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print("🧪 MONTH FILTER BENCHMARK")
+    print("=" * 60)
+    try:
+        with transaction.atomic():
+            run(args.rows, args.employees, args.repeat)
+            raise Rollback()
+    except Rollback:
+        print("\n🧹 Benchmark data rolled back")
+
+
+if __name__ == '__main__':
+    main()